@@ -0,0 +1,96 @@
+"""
+Read-replica routing.
+
+Views decorated with `use_replica` (reports, exports, dashboard aggregates)
+read warehouse data from the `replica` database alias when one is
+configured. Everything else, and all writes, use `default`.
+
+After a write request (POST, PUT, PATCH, DELETE) the client gets a short
+lived cookie that pins its reads to `default`, so a user who just added or
+moved items sees them even while the replica is catching up.
+"""
+
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'ksp_pin_primary'
+
+# Whether the current view asked for replica reads
+_use_replica = ContextVar('use_replica', default=False)
+# Whether the current client recently wrote and must read its own writes
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def use_replica(view_func):
+    """Route warehouse reads of the decorated view to the replica"""
+
+    @wraps(view_func)
+    def wrapper(*args, **kwargs):
+        token = _use_replica.set(True)
+        try:
+            return view_func(*args, **kwargs)
+        finally:
+            _use_replica.reset(token)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """Send reads of replica-enabled views to the replica, everything else to default"""
+
+    route_app_labels = {'warehouse'}
+
+    def db_for_read(self, model, **hints):
+        if (
+            _use_replica.get()
+            and not _pinned.get()
+            and model._meta.app_label in self.route_app_labels
+            and replica_configured()
+        ):
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is kept in sync by the database, never migrated directly
+        return db != REPLICA_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """Read-your-writes: pin a client to default for a while after it writes"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_configured():
+            return self.get_response(request)
+
+        token = _pinned.set(PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 15),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
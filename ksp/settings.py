@@ -66,6 +66,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'ksp.routers.ReplicaPinningMiddleware',
 ]
 
 ROOT_URLCONF = 'ksp.urls'
@@ -94,10 +95,36 @@ WSGI_APPLICATION = 'ksp.wsgi.application'
 # Default SQLite database
 DB_ENGINE = get_env_variable('DB_ENGINE', 'django.db.backends.sqlite3')
 if DB_ENGINE == 'django.db.backends.sqlite3':
+    # Production tuning profile, applied on every new connection (Django 5.1+):
+    # WAL lets page loads read while a bulk add writes, synchronous=NORMAL
+    # skips the fsync on each commit (safe with WAL), and IMMEDIATE
+    # transactions take the write lock up front so busy_timeout applies
+    # instead of failing with "database is locked" on lock upgrade.
+    # Set SQLITE_TUNING=False to get SQLite's defaults back.
+    SQLITE_BUSY_TIMEOUT = int(get_env_variable('SQLITE_BUSY_TIMEOUT', '20000'))  # ms
+    SQLITE_MMAP_SIZE = int(get_env_variable('SQLITE_MMAP_SIZE', '268435456'))  # bytes
+    SQLITE_CACHE_SIZE = int(get_env_variable('SQLITE_CACHE_SIZE', '-65536'))  # -KiB
+    SQLITE_OPTIONS = {'timeout': SQLITE_BUSY_TIMEOUT / 1000}
+    if get_bool_env_variable('SQLITE_TUNING', True):
+        SQLITE_OPTIONS.update(
+            transaction_mode='IMMEDIATE',
+            init_command=(
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT};'
+                'PRAGMA temp_store=MEMORY;'
+                f'PRAGMA mmap_size={SQLITE_MMAP_SIZE};'
+                f'PRAGMA cache_size={SQLITE_CACHE_SIZE};'
+            ),
+        )
     DATABASES = {
         'default': {
             'ENGINE': DB_ENGINE,
             'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': SQLITE_OPTIONS,
+            # A file, not Django's in-memory default, so concurrency tests can
+            # open one connection per thread like the real server does
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
 else:
@@ -112,6 +139,50 @@ else:
         }
     }
 
+# Collation of Shelf.sort_key: the key only orders like (room, rack, number)
+# when compared byte by byte. SQLite compares with BINARY by default and has
+# no "C" collation. Under "C", uppercase sorts before lowercase and Polish
+# letters after all ASCII ones.
+SORT_KEY_COLLATION = 'C' if DB_ENGINE == 'django.db.backends.postgresql' else None
+
+# Connection management: keep connections open between requests (checked
+# before reuse) instead of paying TCP and auth on every scan.
+DATABASES['default']['CONN_MAX_AGE'] = int(get_env_variable('DB_CONN_MAX_AGE', '60'))
+DATABASES['default']['CONN_HEALTH_CHECKS'] = get_bool_env_variable(
+    'DB_CONN_HEALTH_CHECKS', True
+)
+
+# Alternatively, a psycopg 3 connection pool shared by the threads of a worker
+# (PostgreSQL only; needs `psycopg[pool]` instead of psycopg2).
+if DB_ENGINE == 'django.db.backends.postgresql' and get_bool_env_variable(
+    'DB_POOL', False
+):
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # Pooling replaces persistent connections
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(get_env_variable('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(get_env_variable('DB_POOL_MAX_SIZE', '10')),
+        'timeout': float(get_env_variable('DB_POOL_TIMEOUT', '30')),
+    }
+
+# Optional read replica for reports and exports (see ksp/routers.py). For
+# SQLite, DB_REPLICA_NAME is the path of the replica file.
+if get_env_variable('DB_REPLICA_NAME') or get_env_variable('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': get_env_variable('DB_REPLICA_NAME') or DATABASES['default']['NAME'],
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        # The test runner reuses the default test database instead
+        'TEST': {'MIRROR': 'default'},
+    }
+    for key in ('HOST', 'PORT', 'USER', 'PASSWORD'):
+        value = get_env_variable(f'DB_REPLICA_{key}')
+        if value:
+            DATABASES['replica'][key] = value
+
+DATABASE_ROUTERS = ['ksp.routers.ReplicaRouter']
+# Seconds a client reads from default after a write (read-your-writes)
+REPLICA_PIN_SECONDS = int(get_env_variable('REPLICA_PIN_SECONDS', '15'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -162,9 +233,31 @@ STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+# Outside DEBUG, collectstatic writes content-hashed names and compressed
+# copies that nginx caches forever; {% static %} then needs the manifest, so
+# run collectstatic before starting the server.
+STATIC_MANIFEST = get_bool_env_variable('STATIC_MANIFEST', not DEBUG)
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'ksp.storage.CompressedManifestStaticFilesStorage'
+            if STATIC_MANIFEST
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Let nginx send cached QR labels (X-Accel-Redirect) once the view has checked
+# the login; nginx/nginx.conf keeps /media/qrcodes/ internal for this
+QR_LABEL_X_ACCEL_REDIRECT = get_bool_env_variable('QR_LABEL_X_ACCEL_REDIRECT', False)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -192,6 +285,12 @@ else:
 
 # Expiry notification settings
 ENABLE_EXPIRY_NOTIFICATIONS = get_bool_env_variable('ENABLE_EXPIRY_NOTIFICATIONS', True)
+# Daily history archiving, stock statistics and snapshots, run by the same
+# scheduler whether or not notifications are enabled
+ENABLE_MAINTENANCE_JOBS = get_bool_env_variable('ENABLE_MAINTENANCE_JOBS', True)
+# Whether this service runs the scheduler at all. Among the processes that
+# do, a lock file lets only one of them start it (see warehouse.scheduler)
+RUN_SCHEDULER = get_bool_env_variable('RUN_SCHEDULER', True)
 
 # Authentication backends
 AUTHENTICATION_BACKENDS = [
@@ -0,0 +1,63 @@
+"""
+Static files storage.
+
+collectstatic writes every asset under a content-hashed name and a
+pre-compressed .gz copy (and .br when the brotli package is installed) next
+to it. Nginx serves the compressed copies with gzip_static and caches the
+hashed names forever, so a changed file is picked up through its new name.
+"""
+
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.ttf', '.json', '.txt', '.map')
+
+# Files smaller than this don't gain enough to pay for the extra request check
+MIN_COMPRESS_SIZE = 1024
+
+
+def compressed_variants(content):
+    """(suffix, bytes) pairs for the compressed copies of the content"""
+    variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(content)))
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Hashed file names plus pre-compressed copies of text assets"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            self._write_compressed(hashed_name)
+
+    def _write_compressed(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compressed in compressed_variants(content):
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
@@ -22,14 +22,22 @@ from django.conf.urls.static import static
 from django.views.generic import RedirectView
 from warehouse.views.account import register
 from warehouse.views.custom_password_reset import CustomPasswordResetView
+from warehouse.views.scan import resolve_qr_code, resolve_qr_code_json
 
 urlpatterns = [
     path('i18n/', include('django.conf.urls.i18n')),  # Language switching
     path('admin/', admin.site.urls),
     path('accounts/register/', register, name='register'),
-    path('accounts/password_reset/', CustomPasswordResetView.as_view(), name='password_reset'),
+    path(
+        'accounts/password_reset/',
+        CustomPasswordResetView.as_view(),
+        name='password_reset',
+    ),
     path('accounts/', include('django.contrib.auth.urls')),
     path('warehouse/', include('warehouse.urls')),
+    # Short QR code targets (shelves, racks and rooms by UUID)
+    path('s/<uuid:qr_uuid>/', resolve_qr_code, name='resolve_qr_code'),
+    path('s/<uuid:qr_uuid>.json', resolve_qr_code_json, name='resolve_qr_code_json'),
     path('', RedirectView.as_view(url='/warehouse/', permanent=True)),
 ]
 
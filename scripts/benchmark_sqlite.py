@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent SQLite reads and writes with and without the tuning
+profile from ksp/settings.py (WAL, synchronous=NORMAL, mmap, cache,
+busy_timeout, IMMEDIATE transactions).
+
+Writer threads mimic bulk adds (batched INSERTs in one transaction), reader
+threads mimic page loads (shelf counts). Runs on a temporary database file,
+so it does not touch db.sqlite3.
+
+Usage: python scripts/benchmark_sqlite.py [--seconds 10] [--writers 2] [--readers 8]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+DEFAULT_PROFILE = {
+    'pragmas': [],
+    'begin': 'BEGIN',
+}
+TUNED_PROFILE = {
+    'pragmas': [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA busy_timeout=20000',
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA mmap_size=268435456',
+        'PRAGMA cache_size=-65536',
+    ],
+    'begin': 'BEGIN IMMEDIATE',
+}
+
+
+def connect(path, profile):
+    # Django's default busy timeout is Python's sqlite3 default of 5 seconds
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    for pragma in profile['pragmas']:
+        connection.execute(pragma)
+    return connection
+
+
+def setup(path, rows):
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.executescript(
+        """
+        CREATE TABLE assignment (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            shelf_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            add_date TEXT NOT NULL,
+            remove_date TEXT
+        );
+        CREATE INDEX assignment_shelf ON assignment (shelf_id, remove_date);
+        """
+    )
+    connection.execute('BEGIN')
+    connection.executemany(
+        'INSERT INTO assignment (shelf_id, name, add_date) VALUES (?, ?, ?)',
+        ((n % 200, f'Item {n % 500}', '2025-01-01') for n in range(rows)),
+    )
+    connection.execute('COMMIT')
+    connection.close()
+
+
+def writer(path, profile, stop, stats, batch):
+    connection = connect(path, profile)
+    shelf = 0
+    while not stop.is_set():
+        try:
+            connection.execute(profile['begin'])
+            connection.executemany(
+                'INSERT INTO assignment (shelf_id, name, add_date) VALUES (?, ?, ?)',
+                ((shelf, 'Bulk', '2025-01-02') for _ in range(batch)),
+            )
+            connection.execute('COMMIT')
+            stats['writes'] += batch
+        except sqlite3.OperationalError:
+            stats['errors'] += 1
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+        shelf = (shelf + 1) % 200
+    connection.close()
+
+
+def reader(path, profile, stop, stats):
+    connection = connect(path, profile)
+    shelf = 0
+    while not stop.is_set():
+        try:
+            connection.execute(
+                'SELECT name, COUNT(*) FROM assignment '
+                'WHERE shelf_id = ? AND remove_date IS NULL GROUP BY name',
+                (shelf,),
+            ).fetchall()
+            stats['reads'] += 1
+        except sqlite3.OperationalError:
+            stats['errors'] += 1
+        shelf = (shelf + 1) % 200
+    connection.close()
+
+
+def run(name, profile, args):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite3')
+        setup(path, args.rows)
+        # journal_mode=WAL is persistent, so set it once before the threads start
+        connect(path, profile).close()
+
+        stop = threading.Event()
+        stats = {'reads': 0, 'writes': 0, 'errors': 0}
+        threads = [
+            threading.Thread(
+                target=writer, args=(path, profile, stop, stats, args.batch)
+            )
+            for _ in range(args.writers)
+        ] + [
+            threading.Thread(target=reader, args=(path, profile, stop, stats))
+            for _ in range(args.readers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    print(
+        f'{name:8} reads/s: {stats["reads"] / args.seconds:10.1f}  '
+        f'rows written/s: {stats["writes"] / args.seconds:10.1f}  '
+        f'lock errors: {stats["errors"]}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--batch', type=int, default=1000, help='rows per write')
+    parser.add_argument('--rows', type=int, default=200000, help='initial rows')
+    args = parser.parse_args()
+
+    run('default', DEFAULT_PROFILE, args)
+    run('tuned', TUNED_PROFILE, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+// Live stock events (server-sent events) for dashboards.
+//
+// EventSource reconnects by itself when a stream ends, but gives up when the
+// server is busy and answers 503. Reconnect by hand after a pause then,
+// resuming from the last event seen.
+(function() {
+    const BUSY_RETRY_MS = 30000;
+
+    window.subscribeStockEvents = function(url, listeners) {
+        if (!window.EventSource) return null;
+        const subscription = { source: null, closed: false, lastEventId: '' };
+
+        function remember(handler) {
+            return function(message) {
+                if (message.lastEventId) subscription.lastEventId = message.lastEventId;
+                handler(message);
+            };
+        }
+
+        function connect() {
+            if (subscription.closed) return;
+            const query = subscription.lastEventId
+                ? '?last_event_id=' + encodeURIComponent(subscription.lastEventId)
+                : '';
+            const source = new EventSource(url + query);
+            subscription.source = source;
+            Object.keys(listeners).forEach(function(name) {
+                source.addEventListener(name, remember(listeners[name]));
+            });
+            source.onerror = function() {
+                if (source.readyState === EventSource.CLOSED) {
+                    setTimeout(connect, BUSY_RETRY_MS);
+                }
+            };
+        }
+
+        subscription.close = function() {
+            subscription.closed = true;
+            if (subscription.source) subscription.source.close();
+        };
+
+        connect();
+        return subscription;
+    };
+})();
@@ -1,5 +1,14 @@
 from django.contrib import admin
-from .models import Room, Rack, Shelf, Category, Item, ItemShelfAssignment
+from .models import (
+    Room,
+    Rack,
+    Shelf,
+    Category,
+    Item,
+    ItemShelfAssignment,
+    ProductThreshold,
+    BulkOperation,
+)
 
 
 @admin.register(Room)
@@ -17,14 +26,23 @@ class RackAdmin(admin.ModelAdmin):
 
 @admin.register(Shelf)
 class ShelfAdmin(admin.ModelAdmin):
-    list_display = ('number', 'rack', 'full_location')
+    list_display = ('number', 'rack', 'location_path')
     list_filter = ('rack__room', 'rack')
-    search_fields = ('number', 'rack__name', 'rack__room__name')
+    search_fields = ('number', 'location_path')
+    ordering = ('sort_key',)
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('name',)
+    list_display = ('name', 'min_stock')
+    list_editable = ('min_stock',)
+    search_fields = ('name',)
+
+
+@admin.register(ProductThreshold)
+class ProductThresholdAdmin(admin.ModelAdmin):
+    list_display = ('name', 'min_stock')
+    list_editable = ('min_stock',)
     search_fields = ('name',)
 
 
@@ -57,3 +75,11 @@ class ItemShelfAssignmentAdmin(admin.ModelAdmin):
 
     is_active_status.boolean = True
     is_active_status.short_description = 'Active'
+
+
+@admin.register(BulkOperation)
+class BulkOperationAdmin(admin.ModelAdmin):
+    list_display = ('key', 'kind', 'user', 'processed', 'total', 'status', 'updated_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('key', 'user__username')
+    readonly_fields = ('created_at', 'updated_at')
@@ -0,0 +1,189 @@
+"""
+Stock movement analytics.
+
+Every unit on a shelf is an ItemShelfAssignment with an add and a remove
+date, so inflow and outflow per day fall out of two grouped queries. The
+nightly `compute_stock_stats` command stores them per product in
+DailyStockStat, together with the units on hand at the end of each day. The
+dashboard and the forecast API read only that table: rolling sums over a
+window give the consumption rate and the projected days of supply.
+"""
+
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from warehouse.models import (
+    DailyStockStat,
+    ItemShelfAssignment,
+    ItemShelfAssignmentArchive,
+)
+
+# Days of stats used for the consumption rate
+FORECAST_WINDOW_DAYS = 28
+
+# Both tables hold units; archived ones are all removed
+UNIT_MODELS = (ItemShelfAssignment, ItemShelfAssignmentArchive)
+
+PRODUCT_KEY = ('item__category', 'item__name')
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _daily_counts(date_field, start, end):
+    """Units per (day, category, product) whose date_field falls in the range"""
+    counts = Counter()
+    for model in UNIT_MODELS:
+        rows = (
+            model.objects.filter(
+                **{
+                    f'{date_field}__gte': _day_start(start),
+                    f'{date_field}__lt': _day_start(end + timedelta(days=1)),
+                }
+            )
+            .annotate(day=TruncDate(date_field))
+            .order_by()
+            .values('day', *PRODUCT_KEY)
+            .annotate(units=Count('pk'))
+        )
+        for row in rows:
+            counts[row['day'], row['item__category'], row['item__name']] += row['units']
+    return counts
+
+
+def _on_hand_at(moment):
+    """Units per (category, product) on shelves at the given moment"""
+    counts = Counter()
+    for model in UNIT_MODELS:
+        rows = (
+            model.objects.filter(add_date__lt=moment)
+            .filter(Q(remove_date__isnull=True) | Q(remove_date__gte=moment))
+            .order_by()
+            .values(*PRODUCT_KEY)
+            .annotate(units=Count('pk'))
+        )
+        for row in rows:
+            counts[row['item__category'], row['item__name']] += row['units']
+    return counts
+
+
+def compute_daily_stats(start, end):
+    """
+    Build DailyStockStat rows for the days from start to end, inclusive.
+
+    Inflow and outflow come from one grouped query per table. On-hand counts
+    are taken once at the end of the range and walked back day by day, so the
+    cost does not depend on the number of days.
+    """
+    added = _daily_counts('add_date', start, end)
+    removed = _daily_counts('remove_date', start, end)
+    on_hand = _on_hand_at(_day_start(end + timedelta(days=1)))
+
+    stats = []
+    day = end
+    while day >= start:
+        products = set(on_hand) | {
+            key[1:] for key in (*added, *removed) if key[0] == day
+        }
+        for category_id, name in products:
+            stat = DailyStockStat(
+                date=day,
+                category_id=category_id,
+                product_name=name,
+                added=added[day, category_id, name],
+                removed=removed[day, category_id, name],
+                on_hand=on_hand[category_id, name],
+            )
+            if stat.added or stat.removed or stat.on_hand:
+                stats.append(stat)
+            # Stock at the end of the previous day
+            on_hand[category_id, name] += stat.removed - stat.added
+        day -= timedelta(days=1)
+    return stats
+
+
+def refresh_daily_stats(days=1, today=None):
+    """Recompute the stats of the last `days` complete days"""
+    today = today or timezone.localdate()
+    end = today - timedelta(days=1)
+    start = end - timedelta(days=days - 1)
+    stats = compute_daily_stats(start, end)
+    with transaction.atomic():
+        DailyStockStat.objects.filter(date__gte=start, date__lte=end).delete()
+        DailyStockStat.objects.bulk_create(stats, batch_size=1000)
+    return len(stats)
+
+
+def supply_forecast(level='category', window_days=FORECAST_WINDOW_DAYS):
+    """
+    Consumption rate and projected days of supply from the stored stats.
+
+    Args:
+        level (str): 'category' or 'product'
+        window_days (int): Number of days the rates are averaged over, at
+            most; days without stats are not counted
+
+    Returns:
+        list: Dicts with name, category, on_hand, inflow, outflow,
+        net_per_day, days_of_supply and run_out_date, soonest to run out
+        first. days_of_supply is None when stock is not going down.
+    """
+    latest = DailyStockStat.objects.aggregate(latest=Max('date'))['latest']
+    if latest is None:
+        return []
+
+    if level == 'product':
+        key = ('category__name', 'product_name')
+    else:
+        key = ('category__name',)
+    window = DailyStockStat.objects.filter(
+        date__gt=latest - timedelta(days=window_days), date__lte=latest
+    ).order_by()
+    # Average over the days that have stats, so a fresh install or a gap in
+    # the nightly job doesn't dilute the rates
+    days = window.values('date').distinct().count() or 1
+
+    rows = window.values(*key).annotate(
+        inflow=Sum('added'),
+        outflow=Sum('removed'),
+        on_hand=Sum('on_hand', filter=Q(date=latest)),
+    )
+
+    forecast = []
+    for row in rows:
+        on_hand = row['on_hand'] or 0
+        net_per_day = (row['outflow'] - row['inflow']) / days
+        days_of_supply = on_hand / net_per_day if net_per_day > 0 else None
+        forecast.append(
+            {
+                'name': row.get('product_name', row['category__name']),
+                'category': row['category__name'],
+                'on_hand': on_hand,
+                'inflow': row['inflow'],
+                'outflow': row['outflow'],
+                'net_per_day': round(net_per_day, 2),
+                'days_of_supply': (
+                    round(days_of_supply, 1) if days_of_supply is not None else None
+                ),
+                'run_out_date': (
+                    latest + timedelta(days=int(days_of_supply))
+                    if days_of_supply is not None
+                    else None
+                ),
+            }
+        )
+
+    forecast.sort(
+        key=lambda entry: (
+            entry['days_of_supply'] is None,
+            entry['days_of_supply'] or 0,
+            entry['name'],
+        )
+    )
+    return forecast
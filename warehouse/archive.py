@@ -0,0 +1,83 @@
+"""
+Archiving of closed item-shelf assignments.
+
+Removed assignments older than a threshold are moved to
+ItemShelfAssignmentArchive in chunks, keeping the live table small for
+active-stock queries. History views and exports read both tables.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from ksp.env import get_env_variable
+from warehouse.models import ItemShelfAssignment, ItemShelfAssignmentArchive
+
+# Rows moved per transaction
+ARCHIVE_CHUNK_SIZE = 5000
+
+ARCHIVED_FIELDS = (
+    'id',
+    'item_id',
+    'shelf_id',
+    'added_by_id',
+    'removed_by_id',
+    'add_date',
+    'remove_date',
+    'added_batch_id',
+    'removed_batch_id',
+)
+
+
+def archive_after_days():
+    """Age in days after which removed assignments are archived (0 disables)"""
+    try:
+        return int(get_env_variable('HISTORY_ARCHIVE_DAYS', '365'))
+    except ValueError:
+        return 365
+
+
+def archivable_assignments(days):
+    cutoff = timezone.now() - timedelta(days=days)
+    return ItemShelfAssignment.objects.filter(
+        remove_date__isnull=False, remove_date__lt=cutoff
+    )
+
+
+def archive_chunk(days, chunk_size=ARCHIVE_CHUNK_SIZE):
+    """Move one chunk of closed assignments to the archive; returns the count"""
+    with transaction.atomic():
+        rows = list(
+            archivable_assignments(days)
+            .order_by('id')
+            .values_list(*ARCHIVED_FIELDS)[:chunk_size]
+        )
+        if not rows:
+            return 0
+
+        ItemShelfAssignmentArchive.objects.bulk_create(
+            [
+                ItemShelfAssignmentArchive(**dict(zip(ARCHIVED_FIELDS, row)))
+                for row in rows
+            ]
+        )
+        ItemShelfAssignment.objects.filter(id__in=[row[0] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_history(days=None, chunk_size=ARCHIVE_CHUNK_SIZE, max_chunks=None):
+    """Archive closed assignments chunk by chunk; returns the number moved"""
+    days = archive_after_days() if days is None else days
+    if days <= 0:
+        return 0
+
+    moved = 0
+    chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        count = archive_chunk(days, chunk_size)
+        if not count:
+            break
+        moved += count
+        chunks += 1
+    return moved
@@ -0,0 +1,190 @@
+"""
+Backend-aware bulk insert for large stock operations.
+
+`Model.objects.bulk_create` builds a model instance per row and a single
+multi-row INSERT per batch. For hundreds of thousands of identical items
+this writer skips the instances and uses the fastest path of the backend:
+
+- PostgreSQL: ids are reserved from the table sequence in one query and the
+  rows are streamed with COPY FROM STDIN (psycopg2 or psycopg 3).
+- SQLite: one prepared INSERT run with executemany; ids are read back from
+  last_insert_rowid(), which is a contiguous range inside the transaction
+  because SQLite serializes writers.
+- Anything else falls back to bulk_create.
+
+All paths return the new primary keys in row order.
+"""
+
+import io
+from itertools import islice
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+# Rows sent per COPY / executemany call
+BULK_INSERT_BATCH_SIZE = 10000
+
+
+def _insert_fields(model, fields):
+    """Resolve field names and the concrete fields filled with defaults"""
+    meta = model._meta
+    given = [meta.get_field(name) for name in fields]
+    given_names = {field.name for field in given}
+    defaults = [
+        field
+        for field in meta.concrete_fields
+        if not field.primary_key and field.name not in given_names
+    ]
+    return given, defaults
+
+
+def _default_values(fields, now):
+    values = []
+    for field in fields:
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            values.append(now)
+        else:
+            values.append(field.get_default())
+    return values
+
+
+def _prepare_rows(rows, given, defaults, connection):
+    """Yield rows converted to database values, with defaults appended"""
+    now = timezone.now()
+    callable_defaults = [
+        index
+        for index, field in enumerate(defaults)
+        if field.has_default() and callable(field.default)
+    ]
+    constant = _default_values(defaults, now)
+    fields = given + defaults
+
+    for row in rows:
+        values = list(row) + constant
+        for index in callable_defaults:
+            values[len(given) + index] = defaults[index].get_default()
+        yield [
+            field.get_db_prep_save(value, connection)
+            for field, value in zip(fields, values)
+        ]
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _copy_value(value):
+    """Encode a value for COPY ... FROM STDIN text format"""
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def _insert_postgresql(model, columns, chunk, connection):
+    meta = model._meta
+    qn = connection.ops.quote_name
+    pk_column = meta.pk.column
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+            'FROM generate_series(1, %s)',
+            [meta.db_table, pk_column, len(chunk)],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+
+        buffer = io.StringIO()
+        for pk, values in zip(ids, chunk):
+            buffer.write(str(pk))
+            for value in values:
+                buffer.write('\t')
+                buffer.write(_copy_value(value))
+            buffer.write('\n')
+        buffer.seek(0)
+
+        sql = 'COPY {} ({}) FROM STDIN'.format(
+            qn(meta.db_table), ', '.join(qn(c) for c in [pk_column, *columns])
+        )
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy_expert'):
+            # psycopg2
+            raw_cursor.copy_expert(sql, buffer)
+        else:
+            # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    return ids
+
+
+def _insert_sqlite(model, columns, chunk, connection):
+    meta = model._meta
+    qn = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        qn(meta.db_table),
+        ', '.join(qn(c) for c in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, chunk)
+        cursor.execute('SELECT last_insert_rowid()')
+        last_id = cursor.fetchone()[0]
+    return list(range(last_id - len(chunk) + 1, last_id + 1))
+
+
+def bulk_insert(model, fields, rows, using=None, batch_size=BULK_INSERT_BATCH_SIZE):
+    """
+    Insert `rows` into `model`'s table and return the new primary keys.
+
+    Args:
+        model: Model class with an auto-incrementing primary key
+        fields (list): Field names matching the order of values in each row;
+            foreign keys take the related primary key
+        rows (iterable): Tuples of Python values, e.g. itertools.repeat()
+        using (str): Database alias, defaults to the router's write database
+        batch_size (int): Rows per COPY / executemany call
+
+    Returns:
+        list: Primary keys of the inserted rows, in row order
+
+    Fields not listed are filled with their defaults (auto_now/auto_now_add
+    fields with the current time). Model save() and signals are not run.
+    """
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    given, defaults = _insert_fields(model, fields)
+
+    if connection.vendor == 'postgresql':
+        insert = _insert_postgresql
+    elif connection.vendor == 'sqlite':
+        insert = _insert_sqlite
+    else:
+        created = model._default_manager.using(using).bulk_create(
+            [
+                model(**{field.attname: value for field, value in zip(given, row)})
+                for row in rows
+            ],
+            batch_size=batch_size,
+        )
+        return [obj.pk for obj in created]
+
+    columns = [field.column for field in given + defaults]
+    ids = []
+    with transaction.atomic(using=using):
+        prepared = _prepare_rows(rows, given, defaults, connection)
+        for chunk in _chunks(prepared, batch_size):
+            ids.extend(insert(model, columns, chunk, connection))
+    return ids
@@ -0,0 +1,202 @@
+"""
+Inventory event bus feeding the live dashboards.
+
+Stock mutations publish compact events ("3 x Ryż added to shelf 12") once
+their transaction commits. Each process keeps the latest events in a ring
+buffer, and the server-sent events endpoint streams them to open pages. The
+pages then adjust their counters instead of reloading and re-running the
+aggregate queries.
+
+With PostgreSQL the events go through NOTIFY on one channel. A listener
+thread in every process feeds them into its local buffer, so all gunicorn
+workers see every event. With other backends the buffer is fed directly,
+which only reaches pages served by the same process. Run a single worker
+with threads there.
+
+Event ids are assigned per process. A page reconnecting with a stale
+Last-Event-ID (after a restart, or to another worker) resumes from the
+current event instead of replaying.
+
+Every open stream holds a server thread, so a process serves at most
+EVENTS_MAX_STREAMS of them and answers further pages with 503; they retry
+later. docker-compose runs the streams in a separate gunicorn service so
+they never take threads from ordinary requests.
+"""
+
+import collections
+import json
+import logging
+import select
+import threading
+import time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ksp.env import get_env_variable
+
+logger = logging.getLogger(__name__)
+
+EVENT_ADD = 'add'
+EVENT_REMOVE = 'remove'
+EVENT_MOVE = 'move'
+
+NOTIFY_CHANNEL = 'ksp_inventory'
+
+# Events kept for pages that reconnect
+BUFFER_SIZE = 1000
+
+
+def stream_seconds():
+    """How long one SSE response stays open before the browser reconnects"""
+    try:
+        return int(get_env_variable('EVENTS_STREAM_SECONDS', '55'))
+    except ValueError:
+        return 55
+
+
+def max_streams():
+    """Streams one process keeps open at once, well below its thread count"""
+    try:
+        return int(get_env_variable('EVENTS_MAX_STREAMS', '4'))
+    except ValueError:
+        return 4
+
+
+_open_streams = 0
+_streams_lock = threading.Lock()
+
+
+def acquire_stream():
+    """Reserve a stream slot; False when the process is at its limit"""
+    global _open_streams
+    with _streams_lock:
+        if _open_streams >= max_streams():
+            return False
+        _open_streams += 1
+        return True
+
+
+def release_stream():
+    """Free a slot taken by acquire_stream"""
+    global _open_streams
+    with _streams_lock:
+        _open_streams -= 1
+
+
+class EventBus:
+    """Ring buffer of recent events that stream readers can wait on"""
+
+    def __init__(self, size=BUFFER_SIZE):
+        self._events = collections.deque(maxlen=size)
+        self._condition = threading.Condition()
+        self.last_id = 0
+
+    def publish(self, event):
+        """Store an event under the next id and wake up waiting readers"""
+        with self._condition:
+            self.last_id += 1
+            self._events.append({**event, 'id': self.last_id})
+            self._condition.notify_all()
+
+    def since(self, last_id):
+        """Events newer than `last_id`, oldest first"""
+        with self._condition:
+            return [event for event in self._events if event['id'] > last_id]
+
+    def wait(self, last_id, timeout):
+        """Block up to `timeout` seconds for events newer than `last_id`"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.last_id > last_id, timeout)
+        return self.since(last_id)
+
+
+bus = EventBus()
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def _uses_notify():
+    return connection.vendor == 'postgresql'
+
+
+def _relay(listener):
+    if callable(getattr(listener, 'notifies', None)):
+        # psycopg 3
+        for notify in listener.notifies():
+            bus.publish(json.loads(notify.payload))
+        return
+
+    # psycopg2
+    while True:
+        if select.select([listener], [], [], 30) == ([], [], []):
+            continue
+        listener.poll()
+        while listener.notifies:
+            bus.publish(json.loads(listener.notifies.pop(0).payload))
+
+
+def _listen(database, params):
+    """Relay NOTIFY payloads into the local bus, reconnecting on errors"""
+    while True:
+        try:
+            listener = database.connect(**params)
+            listener.autocommit = True
+            with listener.cursor() as cursor:
+                cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+            _relay(listener)
+        except Exception:
+            logger.exception('Inventory event listener failed, reconnecting')
+            time.sleep(5)
+
+
+def start_listener():
+    """Start this process's NOTIFY listener thread (PostgreSQL only)"""
+    global _listener
+    if not _uses_notify():
+        return
+    with _listener_lock:
+        if _listener is not None:
+            return
+        _listener = threading.Thread(
+            target=_listen,
+            args=(connection.Database, connection.get_connection_params()),
+            name='inventory-events',
+        )
+        _listener.daemon = True
+        _listener.start()
+
+
+def _send(event):
+    if _uses_notify():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, json.dumps(event)]
+            )
+    else:
+        bus.publish(event)
+
+
+def publish_stock_event(kind, shelf_id, quantity, name=None, target_id=None):
+    """
+    Publish a stock event once the current transaction commits.
+
+    Args:
+        kind (str): EVENT_ADD, EVENT_REMOVE or EVENT_MOVE
+        shelf_id (int): Shelf the units were added to, removed or moved from
+        quantity (int): Number of units
+        name (str): Product name, None for mixed products (e.g. an import)
+        target_id (int): Shelf the units were moved to
+    """
+    if not quantity:
+        return
+    event = {
+        'type': kind,
+        'shelf': shelf_id,
+        'target': target_id,
+        'quantity': quantity,
+        'name': name,
+        'time': timezone.now().isoformat(),
+    }
+    transaction.on_commit(lambda: _send(event), robust=True)
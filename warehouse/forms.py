@@ -3,6 +3,7 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 
 from .models import Room, Rack, Shelf, Category, Item
+from .provisioning import MAX_PROVISIONED_SHELVES, RACK_NAMES, rack_range
 
 
 class RoomForm(forms.ModelForm):
@@ -256,6 +257,11 @@ class ExportForm(forms.Form):
         initial=False,
         widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
     )
+    as_of = forms.DateField(
+        label='Stan na dzień',
+        required=False,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -292,6 +298,130 @@ class ExportForm(forms.Form):
                 ).order_by('number')
 
 
+class ImportForm(forms.Form):
+    """Form for importing inventory from a CSV or XLSX file"""
+
+    file = forms.FileField(
+        label='Plik CSV lub XLSX',
+        widget=forms.ClearableFileInput(
+            attrs={'class': 'form-control', 'accept': '.csv,.xlsx'}
+        ),
+    )
+    dry_run = forms.BooleanField(
+        label='Tylko sprawdź plik (bez zapisu)',
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
+    create_categories = forms.BooleanField(
+        label='Utwórz brakujące kategorie',
+        required=False,
+        initial=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        if not file.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Obsługiwane są tylko pliki CSV i XLSX.')
+        return file
+
+
+class ProvisionLocationsForm(forms.Form):
+    """Form for creating a grid of racks and shelves in one go"""
+
+    room = forms.ModelChoiceField(
+        label='Pokój',
+        queryset=Room.objects.order_by('name'),
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    new_room = forms.CharField(
+        label='Lub nowy pokój',
+        max_length=100,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+    rack_from = forms.CharField(
+        label='Regały od',
+        max_length=1,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+    rack_to = forms.CharField(
+        label='Regały do',
+        max_length=1,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+    )
+    shelf_from = forms.IntegerField(
+        label='Półki od',
+        min_value=1,
+        initial=1,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    shelf_to = forms.IntegerField(
+        label='Półki do',
+        min_value=1,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    generate_labels = forms.BooleanField(
+        label='Przygotuj etykiety QR nowych półek',
+        required=False,
+        initial=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
+
+    def _clean_rack_name(self, field):
+        name = self.cleaned_data[field].upper()
+        if name not in RACK_NAMES:
+            raise forms.ValidationError('Nazwa regału musi być literą od A do Z.')
+        return name
+
+    def clean_rack_from(self):
+        return self._clean_rack_name('rack_from')
+
+    def clean_rack_to(self):
+        return self._clean_rack_name('rack_to')
+
+    def clean_new_room(self):
+        return self.cleaned_data.get('new_room', '').strip().capitalize()
+
+    def clean(self):
+        cleaned_data = super().clean()
+        room, new_room = cleaned_data.get('room'), cleaned_data.get('new_room')
+        if bool(room) == bool(new_room):
+            raise forms.ValidationError('Wybierz istniejący pokój albo podaj nowy.')
+
+        rack_from, rack_to = cleaned_data.get('rack_from'), cleaned_data.get('rack_to')
+        if rack_from and rack_to and rack_from > rack_to:
+            self.add_error('rack_to', 'Zakres regałów jest odwrócony.')
+        shelf_from = cleaned_data.get('shelf_from')
+        shelf_to = cleaned_data.get('shelf_to')
+        if shelf_from and shelf_to and shelf_from > shelf_to:
+            self.add_error('shelf_to', 'Zakres półek jest odwrócony.')
+
+        if not self.errors:
+            racks = ord(rack_to) - ord(rack_from) + 1
+            if racks * (shelf_to - shelf_from + 1) > MAX_PROVISIONED_SHELVES:
+                raise forms.ValidationError(
+                    f'Jednorazowo można utworzyć najwyżej '
+                    f'{MAX_PROVISIONED_SHELVES} półek.'
+                )
+        return cleaned_data
+
+    def get_room(self):
+        """Selected room, or the new room created on first use"""
+        if self.cleaned_data['room']:
+            return self.cleaned_data['room']
+        room, _ = Room.objects.get_or_create(name=self.cleaned_data['new_room'])
+        return room
+
+    def rack_names(self):
+        return rack_range(self.cleaned_data['rack_from'], self.cleaned_data['rack_to'])
+
+    def shelf_numbers(self):
+        return range(self.cleaned_data['shelf_from'], self.cleaned_data['shelf_to'] + 1)
+
+
 class CustomUserCreationForm(UserCreationForm):
     """Custom form for user registration with optional email"""
 
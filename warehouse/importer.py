@@ -0,0 +1,541 @@
+"""
+Bulk inventory import from CSV or XLSX files shaped like the Excel export.
+
+Rows are streamed and validated first; locations (`Room.Rack.Shelf`) and
+categories are resolved through in-memory lookup dicts, so validation costs
+two queries regardless of file size. Valid files are then written with
+chunked bulk inserts, each chunk committing together with the progress
+cursor of its BulkOperation. An import interrupted partway (an error or a
+worker restart) resumes from that cursor when the same file is uploaded
+again, instead of writing its first chunks twice.
+"""
+
+import csv
+import hashlib
+import io
+import logging
+import threading
+import uuid
+import zipfile
+from collections import Counter
+from datetime import date, datetime, timedelta
+from xml.etree import ElementTree
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from warehouse.bulk import bulk_insert
+from warehouse.events import EVENT_ADD, publish_stock_event
+from warehouse.models import (
+    BulkOperation,
+    Category,
+    Item,
+    ItemShelfAssignment,
+    OperationBatch,
+    Shelf,
+)
+from warehouse.stock import operation_batch
+
+logger = logging.getLogger(__name__)
+
+# Column headers of `export_inventory`, mapped to row keys
+COLUMNS = {
+    'Nazwa przedmiotu': 'name',
+    'Kategoria': 'category',
+    'Producent': 'manufacturer',
+    'Notatka': 'note',
+    'Data Waznosci': 'expiration_date',
+    'Lokalizacja': 'location',
+    'Liczba': 'quantity',
+    'Data Usuniecia': 'remove_date',
+}
+REQUIRED_COLUMNS = ('name', 'category', 'location')
+
+# Units written per bulk insert / transaction
+IMPORT_CHUNK_SIZE = 5000
+# Upper bound for a single row, to catch typos like 10000000 instead of 10
+MAX_ROW_QUANTITY = 100000
+# Errors kept in the job result
+MAX_REPORTED_ERRORS = 200
+# A running import without progress for this long was interrupted
+IMPORT_STALE_SECONDS = 300
+
+XLSX_NS = {
+    'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'rel': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'pkg': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+TEXT_TAG = f'{{{XLSX_NS["main"]}}}t'
+# Day zero of Excel serial dates (accounts for the 1900 leap year bug)
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+
+class InventoryImportError(ValueError):
+    """The file cannot be read as an inventory sheet"""
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _read_csv(text):
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(io.StringIO(text), dialect)
+
+
+def _xlsx_column_index(ref):
+    """Zero-based column index of a cell reference like 'AB12'"""
+    index = 0
+    for char in ref:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def _read_xlsx(data):
+    """
+    Stream the rows of the first worksheet.
+
+    Uses the standard library only: the export is written with xlsxwriter,
+    which cannot read, and a plain worksheet needs nothing more than the
+    shared strings table and cell values.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        raise InventoryImportError('Plik nie jest poprawnym plikiem XLSX')
+
+    with archive:
+        names = set(archive.namelist())
+        shared_strings = []
+        if 'xl/sharedStrings.xml' in names:
+            root = ElementTree.fromstring(archive.read('xl/sharedStrings.xml'))
+            for item in root.iterfind('main:si', XLSX_NS):
+                shared_strings.append(
+                    ''.join(node.text or '' for node in item.iter(TEXT_TAG))
+                )
+
+        # Resolve the first sheet through the workbook relationships
+        sheet_path = 'xl/worksheets/sheet1.xml'
+        try:
+            workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+            rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+            first = workbook.find('main:sheets/main:sheet', XLSX_NS)
+            rel_id = first.get(f'{{{XLSX_NS["rel"]}}}id')
+            for rel in rels.iterfind('pkg:Relationship', XLSX_NS):
+                if rel.get('Id') == rel_id:
+                    target = rel.get('Target').lstrip('/')
+                    if not target.startswith('xl/'):
+                        target = f'xl/{target}'
+                    sheet_path = target
+        except (KeyError, AttributeError, ElementTree.ParseError):
+            pass
+        if sheet_path not in names:
+            raise InventoryImportError('Nie znaleziono arkusza w pliku XLSX')
+
+        row_tag = f'{{{XLSX_NS["main"]}}}row'
+        cell_tag = f'{{{XLSX_NS["main"]}}}c'
+        with archive.open(sheet_path) as sheet:
+            for _, element in ElementTree.iterparse(sheet):
+                if element.tag != row_tag:
+                    continue
+                row = []
+                for cell in element.iter(cell_tag):
+                    column = _xlsx_column_index(cell.get('r', ''))
+                    if column >= 0:
+                        row.extend([None] * (column - len(row)))
+                    cell_type = cell.get('t')
+                    if cell_type == 'inlineStr':
+                        value = ''.join(node.text or '' for node in cell.iter(TEXT_TAG))
+                    else:
+                        node = cell.find('main:v', XLSX_NS)
+                        value = node.text if node is not None else None
+                        if value is not None and cell_type == 's':
+                            value = shared_strings[int(value)]
+                        elif value is not None and cell_type in (None, 'n'):
+                            value = float(value)
+                    row.append(value)
+                element.clear()
+                yield row
+
+
+def read_rows(data, filename):
+    """
+    Yield (line_number, row_dict) for every data row of a CSV or XLSX file.
+
+    The header row is matched against the export column names; unknown
+    columns are ignored.
+    """
+    if filename.lower().endswith('.xlsx'):
+        rows = _read_xlsx(data)
+    elif filename.lower().endswith('.csv'):
+        try:
+            rows = _read_csv(data.decode('utf-8-sig'))
+        except UnicodeDecodeError:
+            raise InventoryImportError('Plik CSV musi być zapisany w UTF-8')
+    else:
+        raise InventoryImportError('Obsługiwane są tylko pliki CSV i XLSX')
+
+    header = None
+    for line_number, row in enumerate(rows, start=1):
+        if header is None:
+            header = [COLUMNS.get(_cell_text(value)) for value in row]
+            missing = [
+                name
+                for name, key in COLUMNS.items()
+                if key in REQUIRED_COLUMNS and key not in header
+            ]
+            if missing:
+                raise InventoryImportError(f'Brak kolumn: {", ".join(missing)}')
+            continue
+
+        values = {key: value for key, value in zip(header, row) if key}
+        if any(_cell_text(value) for value in values.values()):
+            yield line_number, values
+
+    if header is None:
+        raise InventoryImportError('Plik jest pusty')
+
+
+def _parse_date(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, float):
+        return (EXCEL_EPOCH + timedelta(days=value)).date()
+    text = str(value).strip()
+    for fmt in ('%Y-%m-%d', '%d.%m.%Y', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f'Niepoprawna data: {text}')
+
+
+def validate_rows(rows, create_categories=False):
+    """
+    Validate rows and resolve their shelves and categories.
+
+    Returns (lines, errors, skipped, new_categories): lines are dicts ready for
+    `write_lines`, errors are (line_number, message) pairs, skipped counts rows
+    of removed items (an export lists them with a removal date) and
+    new_categories are unknown category names to create.
+    """
+    shelves = dict(Shelf.objects.values_list('location_path', 'id'))
+    categories = dict(Category.objects.values_list('name', 'id'))
+    new_categories = set()
+
+    lines = []
+    errors = []
+    skipped = 0
+    for line_number, row in rows:
+        if _cell_text(row.get('remove_date')):
+            skipped += 1
+            continue
+
+        name = _cell_text(row.get('name'))
+        category = _cell_text(row.get('category'))
+        location = _cell_text(row.get('location'))
+        if not name or not category or not location:
+            errors.append(
+                (line_number, 'Wymagane są nazwa przedmiotu, kategoria i lokalizacja')
+            )
+            continue
+
+        manufacturer = _cell_text(row.get('manufacturer')) or None
+        if len(name) > 255 or len(category) > 100 or len(manufacturer or '') > 255:
+            errors.append((line_number, 'Zbyt długa nazwa, kategoria lub producent'))
+            continue
+
+        shelf_id = shelves.get(location)
+        if shelf_id is None:
+            errors.append((line_number, f'Nieznana lokalizacja: {location}'))
+            continue
+
+        if category not in categories:
+            if not create_categories:
+                errors.append((line_number, f'Nieznana kategoria: {category}'))
+                continue
+            new_categories.add(category)
+
+        quantity = _cell_text(row.get('quantity')) or '1'
+        try:
+            quantity = int(quantity)
+        except ValueError:
+            errors.append((line_number, f'Niepoprawna liczba: {quantity}'))
+            continue
+        if not 1 <= quantity <= MAX_ROW_QUANTITY:
+            errors.append(
+                (line_number, f'Liczba musi być z zakresu 1-{MAX_ROW_QUANTITY}')
+            )
+            continue
+
+        try:
+            expiration_date = _parse_date(row.get('expiration_date'))
+        except ValueError as e:
+            errors.append((line_number, str(e)))
+            continue
+
+        lines.append(
+            {
+                'name': name,
+                'category': category,
+                'shelf_id': shelf_id,
+                'quantity': quantity,
+                'manufacturer': manufacturer,
+                'note': _cell_text(row.get('note')) or None,
+                'expiration_date': expiration_date,
+            }
+        )
+
+    return lines, errors, skipped, sorted(new_categories)
+
+
+def write_lines(lines, user, operation=None, chunk_size=IMPORT_CHUNK_SIZE, skip=0):
+    """
+    Insert validated lines in chunks of roughly `chunk_size` units.
+
+    Each chunk is its own transaction and advances `operation`, so progress
+    is visible to other connections while the import runs. The first `skip`
+    units are left out: an interrupted run of the same lines wrote them.
+    """
+    categories = dict(Category.objects.values_list('name', 'id'))
+    missing = {line['category'] for line in lines} - categories.keys()
+    if missing:
+        Category.objects.bulk_create([Category(name=name) for name in missing])
+        categories = dict(Category.objects.values_list('name', 'id'))
+
+    user_id = user.pk if user else None
+
+    def flush(pending):
+        with transaction.atomic():
+            item_ids = bulk_insert(
+                Item,
+                ['name', 'category', 'manufacturer', 'expiration_date', 'note'],
+                (
+                    (
+                        line['name'],
+                        categories[line['category']],
+                        line['manufacturer'],
+                        line['expiration_date'],
+                        line['note'],
+                    )
+                    for line, count in pending
+                    for _ in range(count)
+                ),
+            )
+            now = timezone.now()
+            # One history line per shelf and product, however many rows
+            batches = {}
+            line_batches = []
+            for line, count in pending:
+                product = {
+                    'name': line['name'],
+                    'category_id': categories[line['category']],
+                    'manufacturer': line['manufacturer'],
+                    'expiration_date': line['expiration_date'],
+                    'note': line['note'],
+                }
+                key = (line['shelf_id'], *product.values())
+                if key not in batches:
+                    batches[key] = operation_batch(
+                        OperationBatch.KIND_ADD,
+                        user,
+                        line['shelf_id'],
+                        product,
+                        now=now,
+                    )
+                line_batches.append(batches[key])
+            units = (
+                (line['shelf_id'], batch.pk)
+                for (line, count), batch in zip(pending, line_batches)
+                for _ in range(count)
+            )
+            bulk_insert(
+                ItemShelfAssignment,
+                ['item', 'shelf', 'added_by', 'add_date', 'added_batch'],
+                (
+                    (item_id, shelf_id, user_id, now, batch_id)
+                    for item_id, (shelf_id, batch_id) in zip(item_ids, units)
+                ),
+            )
+            batch_units = Counter()
+            for (line, count), batch in zip(pending, line_batches):
+                batch_units[batch] += count
+            for batch, count in batch_units.items():
+                batch.add_units(count)
+            added = Counter()
+            for line, count in pending:
+                added[line['shelf_id']] += count
+            for shelf_id, count in added.items():
+                publish_stock_event(EVENT_ADD, shelf_id, count)
+            if operation is not None:
+                operation.advance(len(item_ids))
+        return len(item_ids)
+
+    written = 0
+    pending = []
+    pending_units = 0
+    for line in lines:
+        remaining = line['quantity']
+        skipped = min(skip, remaining)
+        skip -= skipped
+        remaining -= skipped
+        while remaining:
+            count = min(remaining, chunk_size - pending_units)
+            pending.append((line, count))
+            pending_units += count
+            remaining -= count
+            if pending_units >= chunk_size:
+                written += flush(pending)
+                pending, pending_units = [], 0
+    if pending:
+        written += flush(pending)
+    return written
+
+
+def import_inventory(
+    data, filename, user, dry_run=False, create_categories=False, operation=None
+):
+    """
+    Validate and (unless `dry_run`) import an inventory file.
+
+    Nothing is written if any row is invalid. Returns a summary dict, which
+    is also stored as the operation result. An `operation` that already
+    processed units continues after them.
+    """
+    lines, errors, skipped, new_categories = validate_rows(
+        read_rows(data, filename), create_categories=create_categories
+    )
+    units = sum(line['quantity'] for line in lines)
+    result = {
+        'dry_run': dry_run,
+        'rows': len(lines),
+        'units': units,
+        'skipped': skipped,
+        'new_categories': new_categories,
+        'error_count': len(errors),
+        'errors': [
+            {'line': line_number, 'error': message}
+            for line_number, message in errors[:MAX_REPORTED_ERRORS]
+        ],
+        'imported': 0,
+        'resumed_from': 0,
+    }
+
+    if operation is not None:
+        operation.total = units
+        operation.save(update_fields=['total', 'updated_at'])
+
+    if not dry_run and not errors:
+        done = operation.processed if operation is not None else 0
+        result['resumed_from'] = done
+        result['imported'] = done + write_lines(
+            lines, user, operation=operation, skip=done
+        )
+    return result
+
+
+def _run_import_job(operation_id, data, filename, dry_run, create_categories):
+    operation = BulkOperation.objects.select_related('user').get(pk=operation_id)
+    try:
+        result = import_inventory(
+            data,
+            filename,
+            operation.user,
+            dry_run=dry_run,
+            create_categories=create_categories,
+            operation=operation,
+        )
+    except Exception as e:
+        logger.exception('Inventory import %s failed', operation.key)
+        operation.status = BulkOperation.STATUS_FAILED
+        operation.result = {'error': str(e)}
+    else:
+        failed = result['error_count'] and not dry_run
+        operation.status = (
+            BulkOperation.STATUS_FAILED if failed else BulkOperation.STATUS_COMPLETE
+        )
+        operation.result = result
+    operation.save(update_fields=['status', 'result', 'updated_at'])
+
+
+def interrupted_import(digest):
+    """
+    The partially written import of the file with this SHA-256, if any.
+
+    Failed imports qualify, and running ones that made no progress for
+    IMPORT_STALE_SECONDS (their thread died with the worker).
+    """
+    stale = timezone.now() - timedelta(seconds=IMPORT_STALE_SECONDS)
+    return (
+        BulkOperation.objects.filter(
+            kind=BulkOperation.KIND_IMPORT,
+            params__sha256=digest,
+            params__dry_run=False,
+            processed__gt=0,
+            processed__lt=F('total'),
+        )
+        .filter(
+            Q(status=BulkOperation.STATUS_FAILED)
+            | Q(status=BulkOperation.STATUS_RUNNING, updated_at__lt=stale)
+        )
+        .order_by('-updated_at')
+        .first()
+    )
+
+
+def start_import_job(data, filename, user, dry_run=False, create_categories=False):
+    """
+    Run `import_inventory` in a background thread and return its BulkOperation.
+
+    Uploading a file whose import was interrupted resumes that operation.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    operation = None if dry_run else interrupted_import(digest)
+    if operation is not None:
+        logger.info(
+            'Resuming inventory import %s after %s of %s unit(s)',
+            operation.key,
+            operation.processed,
+            operation.total,
+        )
+        operation.status = BulkOperation.STATUS_RUNNING
+        operation.result = {}
+        operation.params['create_categories'] = create_categories
+        operation.save(update_fields=['status', 'result', 'params', 'updated_at'])
+    else:
+        operation = BulkOperation.objects.create(
+            key=uuid.uuid4().hex,
+            kind=BulkOperation.KIND_IMPORT,
+            user=user,
+            params={
+                'filename': filename,
+                'sha256': digest,
+                'dry_run': dry_run,
+                'create_categories': create_categories,
+            },
+        )
+
+    def run():
+        try:
+            _run_import_job(operation.pk, data, filename, dry_run, create_categories)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=run, name=f'import-{operation.key}')
+    thread.daemon = True
+    thread.start()
+    return operation
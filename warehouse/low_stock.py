@@ -0,0 +1,160 @@
+"""
+Low stock evaluation.
+
+Categories have a minimum stock level (Category.min_stock) and single
+products can get their own one (ProductThreshold, matched by item name).
+Each kind is evaluated in one grouped query that also aggregates the shelves
+holding the stock, and the report is cached for a short while so that the
+dashboard and notifications don't rescan the assignment table on every call.
+"""
+
+from django.core.cache import cache
+from django.db.models import Aggregate, CharField, Count, F, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+
+from ksp.env import get_env_variable
+from warehouse.models import Category, ItemShelfAssignment, ProductThreshold, Shelf
+
+CACHE_KEY = 'warehouse:low_stock'
+
+
+class ShelfIds(Aggregate):
+    """Distinct shelf ids: ARRAY_AGG on PostgreSQL, GROUP_CONCAT elsewhere"""
+
+    function = 'GROUP_CONCAT'
+    allow_distinct = True
+    output_field = CharField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, distinct=True, **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, function='ARRAY_AGG', **extra_context
+        )
+
+
+def _shelf_ids(value):
+    """Normalize an aggregated ShelfIds value to a list of ints"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [int(pk) for pk in value.split(',')]
+    return list(value)
+
+
+def cache_seconds():
+    try:
+        return int(get_env_variable('LOW_STOCK_CACHE_SECONDS', '60'))
+    except ValueError:
+        return 60
+
+
+def invalidate_low_stock():
+    cache.delete(CACHE_KEY)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=ProductThreshold)
+@receiver(post_delete, sender=ProductThreshold)
+def _thresholds_changed(sender, **kwargs):
+    invalidate_low_stock()
+
+
+def _low_categories():
+    active = Q(items__assignments__remove_date__isnull=True)
+    return list(
+        Category.objects.annotate(
+            active_items=Count('items__assignments', filter=active),
+            shelf_ids=ShelfIds('items__assignments__shelf', filter=active),
+        )
+        .filter(active_items__lt=F('min_stock'))
+        .order_by('name')
+        .values('name', 'min_stock', 'active_items', 'shelf_ids')
+    )
+
+
+def _low_products():
+    thresholds = dict(ProductThreshold.objects.values_list('name', 'min_stock'))
+    if not thresholds:
+        return []
+
+    stock = {
+        row['item__name']: row
+        for row in ItemShelfAssignment.objects.filter(
+            item__name__in=thresholds, remove_date__isnull=True
+        )
+        .order_by()
+        .values('item__name')
+        .annotate(active_items=Count('pk'), shelf_ids=ShelfIds('shelf'))
+    }
+
+    products = []
+    for name, min_stock in sorted(thresholds.items()):
+        row = stock.get(name, {})
+        active_items = row.get('active_items', 0)
+        if active_items < min_stock:
+            products.append(
+                {
+                    'name': name,
+                    'min_stock': min_stock,
+                    'active_items': active_items,
+                    'shelf_ids': row.get('shelf_ids'),
+                }
+            )
+    return products
+
+
+def _attach_locations(entries):
+    """Replace aggregated shelf ids with location dicts, in location order"""
+    for entry in entries:
+        entry['shelf_ids'] = _shelf_ids(entry['shelf_ids'])
+
+    shelf_ids = {pk for entry in entries for pk in entry['shelf_ids']}
+    shelves = {
+        pk: (sort_key, path)
+        for pk, sort_key, path in Shelf.objects.filter(id__in=shelf_ids).values_list(
+            'id', 'sort_key', 'location_path'
+        )
+    }
+
+    for entry in entries:
+        ids = sorted(
+            (pk for pk in entry.pop('shelf_ids') if pk in shelves),
+            key=lambda pk: shelves[pk][0],
+        )
+        entry['locations'] = [
+            {
+                'id': pk,
+                'full_location': shelves[pk][1],
+                'path': reverse('warehouse:shelf_detail', kwargs={'pk': pk}),
+            }
+            for pk in ids
+        ]
+    return entries
+
+
+def evaluate_low_stock():
+    """Evaluate thresholds against active stock, bypassing the cache"""
+    categories = _low_categories()
+    products = _low_products()
+    _attach_locations(categories + products)
+    return {'categories': categories, 'products': products}
+
+
+def low_stock_report():
+    """
+    Return the cached low stock report.
+
+    Returns:
+        dict: 'categories' and 'products' lists of dicts with name,
+        min_stock, active_items and locations (id, full_location, path)
+    """
+    report = cache.get(CACHE_KEY)
+    if report is None:
+        report = evaluate_low_stock()
+        cache.set(CACHE_KEY, report, cache_seconds())
+    return report
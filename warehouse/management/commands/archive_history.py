@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from warehouse.archive import (
+    ARCHIVE_CHUNK_SIZE,
+    archivable_assignments,
+    archive_after_days,
+    archive_history,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves removed item assignments older than HISTORY_ARCHIVE_DAYS to the '
+        'history archive table, in chunks'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Archive assignments removed more than this many days ago',
+        )
+        parser.add_argument('--chunk-size', type=int, default=ARCHIVE_CHUNK_SIZE)
+        parser.add_argument(
+            '--max-chunks',
+            type=int,
+            default=None,
+            help='Stop after this many chunks (default: until done)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the assignments that would be archived',
+        )
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else archive_after_days()
+        if days <= 0:
+            self.stdout.write('History archiving is disabled (HISTORY_ARCHIVE_DAYS=0).')
+            return
+
+        if options['dry_run']:
+            count = archivable_assignments(days).count()
+            self.stdout.write(f'{count} assignment(s) removed over {days} days ago')
+            return
+
+        moved = archive_history(
+            days, chunk_size=options['chunk_size'], max_chunks=options['max_chunks']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Archived {moved} assignment(s) removed over {days} days ago'
+            )
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from warehouse.qr import clear_labels, label_dir
+
+
+class Command(BaseCommand):
+    help = (
+        'Removes cached QR labels from MEDIA_ROOT so they are re-rendered on next use '
+        '(run after changing NETWORK_HOST)'
+    )
+
+    def handle(self, *args, **options):
+        removed = clear_labels()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Removed {removed} cached QR label file(s) from {label_dir()}'
+            )
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from warehouse.analytics import refresh_daily_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Computes daily inflow, outflow and on-hand stock per product for the '
+        'stock analytics dashboard'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=1,
+            help='Recompute this many complete days back from yesterday',
+        )
+
+    def handle(self, *args, **options):
+        days = max(options['days'], 1)
+        count = refresh_daily_stats(days)
+        self.stdout.write(
+            self.style.SUCCESS(f'Stored {count} daily stock stat(s) for {days} day(s)')
+        )
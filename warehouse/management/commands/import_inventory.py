@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from warehouse.importer import InventoryImportError, import_inventory
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports inventory from a CSV or XLSX file with the same columns as the '
+        'Excel export'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only validate the file, do not write anything',
+        )
+        parser.add_argument(
+            '--create-categories',
+            action='store_true',
+            help='Create categories missing from the database',
+        )
+        parser.add_argument(
+            '--user', help='Username recorded as the one who added the items'
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f'File not found: {path}')
+
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f'Unknown user: {options["user"]}')
+
+        try:
+            result = import_inventory(
+                path.read_bytes(),
+                path.name,
+                user,
+                dry_run=options['dry_run'],
+                create_categories=options['create_categories'],
+            )
+        except InventoryImportError as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stderr.write(f'Line {error["line"]}: {error["error"]}')
+        summary = (
+            f'{result["rows"]} row(s), {result["units"]} unit(s), '
+            f'{result["skipped"]} removed row(s) skipped'
+        )
+        if result['error_count']:
+            raise CommandError(
+                f'{result["error_count"]} invalid row(s), nothing imported ({summary})'
+            )
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'File is valid: {summary}'))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f'Imported {result["imported"]} item(s): {summary}')
+            )
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from warehouse.snapshots import take_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Stores per-shelf, per-product stock at the end of a day as a checkpoint '
+        'for as-of reports (default: yesterday)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Day to snapshot, YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            day = parse_date(options['date'])
+            if day is None:
+                raise CommandError('Invalid --date, expected YYYY-MM-DD')
+        else:
+            day = timezone.localdate() - timedelta(days=1)
+
+        count = take_snapshot(day)
+        self.stdout.write(
+            self.style.SUCCESS(f'Stored {count} snapshot row(s) for {day}')
+        )
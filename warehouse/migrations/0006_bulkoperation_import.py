@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('warehouse', '0005_bulkoperation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bulkoperation',
+            name='kind',
+            field=models.CharField(
+                choices=[
+                    ('add', 'Add items'),
+                    ('remove', 'Remove items'),
+                    ('import', 'Import inventory'),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('warehouse', '0007_itemshelfassignmentarchive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='item',
+            name='warehouse_i_name_c0bc65_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='warehouse_i_categor_07433e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='warehouse_i_manufac_461d84_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='item',
+            name='warehouse_i_expirat_1bd2d0_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='itemshelfassignment',
+            name='warehouse_i_item_id_5ed927_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='itemshelfassignment',
+            name='warehouse_i_shelf_i_cae1f0_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='itemshelfassignment',
+            name='warehouse_i_add_dat_88c768_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='itemshelfassignment',
+            name='warehouse_i_remove__b37474_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='itemshelfassignment',
+            name='warehouse_i_shelf_i_550f56_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='itemshelfassignment',
+            name='warehouse_i_item_id_564bac_idx',
+        ),
+        migrations.AlterField(
+            model_name='itemshelfassignment',
+            name='remove_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='itemshelfassignment',
+            index=models.Index(
+                condition=models.Q(('remove_date__isnull', True)),
+                fields=['shelf'],
+                name='assignment_active_shelf_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='itemshelfassignment',
+            index=models.Index(
+                condition=models.Q(('remove_date__isnull', True)),
+                fields=['item'],
+                name='assignment_active_item_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='itemshelfassignment',
+            index=models.Index(
+                condition=models.Q(('remove_date__isnull', True)),
+                fields=['add_date'],
+                name='assignment_active_added_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='itemshelfassignment',
+            index=models.Index(
+                condition=models.Q(('remove_date__isnull', False)),
+                fields=['remove_date'],
+                name='assignment_removed_date_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:10
+
+from django.db import migrations, models
+
+
+def fill_locations(apps, schema_editor):
+    # Same format as Shelf.build_location(); historical models have no methods
+    Shelf = apps.get_model('warehouse', 'Shelf')
+    shelves = list(Shelf.objects.select_related('rack__room'))
+    for shelf in shelves:
+        room_name, rack_name = shelf.rack.room.name, shelf.rack.name
+        shelf.location_path = f'{room_name}.{rack_name}.{shelf.number}'
+        shelf.sort_key = f'{room_name}\x1f{rack_name}\x1f{shelf.number:010d}'
+    Shelf.objects.bulk_update(shelves, ['location_path', 'sort_key'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('warehouse', '0008_active_stock_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shelf',
+            name='location_path',
+            field=models.CharField(
+                db_index=True, default='', editable=False, max_length=120
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shelf',
+            name='sort_key',
+            field=models.CharField(
+                db_index=True, default='', editable=False, max_length=120
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_locations, migrations.RunPython.noop),
+    ]
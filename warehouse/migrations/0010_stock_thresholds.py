@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('warehouse', '0009_shelf_location_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductThreshold',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('min_stock', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='min_stock',
+            field=models.PositiveIntegerField(default=10),
+        ),
+    ]
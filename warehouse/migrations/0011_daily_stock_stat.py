@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('warehouse', '0010_stock_thresholds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStockStat',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('date', models.DateField()),
+                ('product_name', models.CharField(max_length=255)),
+                ('added', models.PositiveIntegerField(default=0)),
+                ('removed', models.PositiveIntegerField(default=0)),
+                ('on_hand', models.PositiveIntegerField(default=0)),
+                (
+                    'category',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='daily_stats',
+                        to='warehouse.category',
+                    ),
+                ),
+            ],
+            options={
+                'unique_together': {('date', 'category', 'product_name')},
+            },
+        ),
+    ]
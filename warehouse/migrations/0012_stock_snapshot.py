@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('warehouse', '0011_daily_stock_stat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('date', models.DateField(db_index=True)),
+                ('product_name', models.CharField(max_length=255)),
+                ('quantity', models.PositiveIntegerField()),
+                (
+                    'category',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='snapshots',
+                        to='warehouse.category',
+                    ),
+                ),
+                (
+                    'shelf',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='snapshots',
+                        to='warehouse.shelf',
+                    ),
+                ),
+            ],
+            options={
+                'unique_together': {('date', 'shelf', 'category', 'product_name')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('warehouse', '0012_stock_snapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bulkoperation',
+            name='kind',
+            field=models.CharField(
+                choices=[
+                    ('add', 'Add items'),
+                    ('remove', 'Remove items'),
+                    ('import', 'Import inventory'),
+                    ('labels', 'Render QR labels'),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('warehouse', '0013_bulkoperation_labels'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperationBatch',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'kind',
+                    models.CharField(
+                        choices=[
+                            ('add', 'Add'),
+                            ('remove', 'Remove'),
+                            ('move', 'Move'),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ('name', models.CharField(blank=True, max_length=255, null=True)),
+                (
+                    'manufacturer',
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                ('expiration_date', models.DateField(blank=True, null=True)),
+                ('note', models.TextField(blank=True, null=True)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('minute', models.DateTimeField(db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                (
+                    'category',
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name='operation_batches',
+                        to='warehouse.category',
+                    ),
+                ),
+                (
+                    'shelf',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='operation_batches',
+                        to='warehouse.shelf',
+                    ),
+                ),
+                (
+                    'target_shelf',
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='incoming_operation_batches',
+                        to='warehouse.shelf',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name='operation_batches',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='itemshelfassignment',
+            name='added_batch',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='+',
+                to='warehouse.operationbatch',
+            ),
+        ),
+        migrations.AddField(
+            model_name='itemshelfassignment',
+            name='removed_batch',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='+',
+                to='warehouse.operationbatch',
+            ),
+        ),
+        migrations.AddField(
+            model_name='itemshelfassignmentarchive',
+            name='added_batch',
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='+',
+                to='warehouse.operationbatch',
+            ),
+        ),
+        migrations.AddField(
+            model_name='itemshelfassignmentarchive',
+            name='removed_batch',
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='+',
+                to='warehouse.operationbatch',
+            ),
+        ),
+    ]
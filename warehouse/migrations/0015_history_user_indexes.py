@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('warehouse', '0014_operation_batch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='itemshelfassignment',
+            name='added_by',
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='added_items',
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name='itemshelfassignment',
+            name='removed_by',
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='removed_items',
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name='itemshelfassignmentarchive',
+            name='added_by',
+            field=models.ForeignKey(
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='+',
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name='itemshelfassignmentarchive',
+            name='removed_by',
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='+',
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='itemshelfassignment',
+            index=models.Index(
+                fields=['added_by', 'add_date'], name='assignment_added_by_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='itemshelfassignment',
+            index=models.Index(
+                fields=['removed_by', 'remove_date'], name='assignment_removed_by_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='itemshelfassignmentarchive',
+            index=models.Index(
+                fields=['added_by', 'add_date'], name='warehouse_i_added_b_6b1b91_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='itemshelfassignmentarchive',
+            index=models.Index(
+                fields=['removed_by', 'remove_date'],
+                name='warehouse_i_removed_6e0b1f_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='operationbatch',
+            index=models.Index(
+                fields=['user', 'minute'], name='warehouse_o_user_id_2ed519_idx'
+            ),
+        ),
+    ]
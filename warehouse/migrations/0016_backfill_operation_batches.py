@@ -0,0 +1,190 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import F
+
+ASSIGNMENT_MODELS = ('ItemShelfAssignment', 'ItemShelfAssignmentArchive')
+PRODUCT_FIELDS = (
+    'item__name',
+    'item__category_id',
+    'item__manufacturer',
+    'item__expiration_date',
+    'item__note',
+)
+# Batch fields in the order of the grouping key
+BATCH_FIELDS = (
+    'kind',
+    'user_id',
+    'shelf_id',
+    'target_shelf_id',
+    'minute',
+    'name',
+    'category_id',
+    'manufacturer',
+    'expiration_date',
+    'note',
+)
+# Assignments read per query, which also bounds the IN lists
+CHUNK_SIZE = 500
+
+
+def _chunks(queryset):
+    """Rows of a queryset in pk order, CHUNK_SIZE at a time"""
+    fields = (
+        'pk',
+        'item_id',
+        'shelf_id',
+        'added_by_id',
+        'removed_by_id',
+        'add_date',
+        'remove_date',
+        *PRODUCT_FIELDS,
+    )
+    last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk').values(*fields)[:CHUNK_SIZE]
+        )
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1]['pk']
+
+
+def _key(kind, user_id, row, when, target_shelf_id=None):
+    return (
+        kind,
+        user_id,
+        row['shelf_id'],
+        target_shelf_id,
+        when.replace(second=0, microsecond=0),
+        row['item__name'],
+        row['item__category_id'],
+        row['item__manufacturer'] or None,
+        row['item__expiration_date'],
+        row['item__note'] or None,
+    )
+
+
+def _write_batches(OperationBatch, links, units):
+    """
+    Create or extend the batches of one chunk and link its assignments.
+
+    A batch can span chunks, so batches with the same key created by an
+    earlier chunk are looked up (by kind and minute) and extended.
+    """
+    minutes = defaultdict(set)
+    for batch_key in links:
+        minutes[batch_key[0]].add(batch_key[4])
+    existing = {}
+    for kind, kind_minutes in minutes.items():
+        for batch in OperationBatch.objects.filter(
+            kind=kind, minute__in=kind_minutes
+        ).values('pk', *BATCH_FIELDS):
+            existing[tuple(batch[field] for field in BATCH_FIELDS)] = batch['pk']
+
+    for batch_key, pk in existing.items():
+        if batch_key in units:
+            OperationBatch.objects.filter(pk=pk).update(
+                quantity=F('quantity') + units[batch_key]
+            )
+    new_keys = [batch_key for batch_key in links if batch_key not in existing]
+    created = OperationBatch.objects.bulk_create(
+        [
+            OperationBatch(
+                **dict(zip(BATCH_FIELDS, batch_key)), quantity=units[batch_key]
+            )
+            for batch_key in new_keys
+        ]
+    )
+    existing.update(zip(new_keys, (batch.pk for batch in created)))
+
+    updates = defaultdict(list)
+    for batch_key, batch_links in links.items():
+        for model, pk, field in batch_links:
+            updates[(model, field)].append(
+                model(pk=pk, **{f'{field}_id': existing[batch_key]})
+            )
+    for (model, field), objects in updates.items():
+        model.objects.bulk_update(objects, [field])
+
+
+def backfill_batches(apps, schema_editor):
+    """
+    Group assignments written before operation batches into batches.
+
+    Same rules as warehouse.stock.operation_batch: one batch per kind, user,
+    shelf (and target shelf), product and minute. A removal followed by an
+    assignment of the same item, by the same user at the same time, on
+    another shelf was a move.
+
+    Rows are read in chunks, so memory does not grow with the history.
+    Removals go first: the assignments they moved into are linked to the
+    move there, and the remaining unlinked assignments are additions.
+    """
+    OperationBatch = apps.get_model('warehouse', 'OperationBatch')
+    models = [apps.get_model('warehouse', name) for name in ASSIGNMENT_MODELS]
+
+    for model in models:
+        pending = model.objects.filter(
+            remove_date__isnull=False, removed_batch__isnull=True
+        )
+        for rows in _chunks(pending):
+            items = {row['item_id'] for row in rows}
+            # Unlinked assignments of the same items, in either table
+            opened = {}
+            for other in models:
+                for row in other.objects.filter(
+                    item_id__in=items, added_batch__isnull=True
+                ).values('pk', 'item_id', 'shelf_id', 'added_by_id', 'add_date'):
+                    opened[(row['item_id'], row['add_date'], row['added_by_id'])] = (
+                        other,
+                        row,
+                    )
+
+            links = defaultdict(list)
+            units = defaultdict(int)
+            for row in rows:
+                successor = opened.get(
+                    (row['item_id'], row['remove_date'], row['removed_by_id'])
+                )
+                if (
+                    successor is not None
+                    and successor[1]['shelf_id'] != row['shelf_id']
+                ):
+                    next_model, next_row = successor
+                    batch_key = _key(
+                        'move',
+                        row['removed_by_id'],
+                        row,
+                        row['remove_date'],
+                        next_row['shelf_id'],
+                    )
+                    links[batch_key].append((next_model, next_row['pk'], 'added_batch'))
+                else:
+                    batch_key = _key(
+                        'remove', row['removed_by_id'], row, row['remove_date']
+                    )
+                links[batch_key].append((model, row['pk'], 'removed_batch'))
+                units[batch_key] += 1
+            _write_batches(OperationBatch, links, units)
+
+    for model in models:
+        for rows in _chunks(model.objects.filter(added_batch__isnull=True)):
+            links = defaultdict(list)
+            units = defaultdict(int)
+            for row in rows:
+                batch_key = _key('add', row['added_by_id'], row, row['add_date'])
+                links[batch_key].append((model, row['pk'], 'added_batch'))
+                units[batch_key] += 1
+            _write_batches(OperationBatch, links, units)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('warehouse', '0015_history_user_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_batches, migrations.RunPython.noop),
+    ]
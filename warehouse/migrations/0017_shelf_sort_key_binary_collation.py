@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Compare shelf sort keys byte by byte.
+
+    The collation comes from settings: "C" on PostgreSQL, where a linguistic
+    collation ignores the separators between room, rack and number; none on
+    SQLite, which compares with BINARY already. Under "C" uppercase sorts
+    before lowercase and Polish letters after all ASCII ones.
+    """
+
+    dependencies = [
+        ('warehouse', '0016_backfill_operation_batches'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='shelf',
+            name='sort_key',
+            field=models.CharField(
+                db_collation=settings.SORT_KEY_COLLATION,
+                db_index=True,
+                editable=False,
+                max_length=120,
+            ),
+        ),
+    ]
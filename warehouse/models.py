@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 import uuid
@@ -10,7 +11,28 @@ class Room(models.Model):
     def save(self, *args, **kwargs):
         if not self.qr_code_uuid:
             self.qr_code_uuid = uuid.uuid4()
+        renamed = (
+            self.pk is not None
+            and Room.objects.filter(pk=self.pk).exclude(name=self.name).exists()
+        )
         super().save(*args, **kwargs)
+        if renamed:
+            Shelf.refresh_locations(Shelf.objects.filter(rack__room=self))
+            self.invalidate_qr_labels()
+
+    def invalidate_qr_labels(self):
+        """Drop cached QR labels of this room and everything inside it"""
+        from warehouse.qr import invalidate_labels
+
+        invalidate_labels(
+            [
+                self.qr_code_uuid,
+                *self.racks.values_list('qr_code_uuid', flat=True),
+                *Shelf.objects.filter(rack__room=self).values_list(
+                    'qr_code_uuid', flat=True
+                ),
+            ]
+        )
 
     def __str__(self):
         return self.name
@@ -32,7 +54,24 @@ class Rack(models.Model):
     def save(self, *args, **kwargs):
         if not self.qr_code_uuid:
             self.qr_code_uuid = uuid.uuid4()
+        moved = (
+            self.pk is not None
+            and not Rack.objects.filter(
+                pk=self.pk, name=self.name, room_id=self.room_id
+            ).exists()
+        )
         super().save(*args, **kwargs)
+        if moved:
+            Shelf.refresh_locations(self.shelves.all())
+            self.invalidate_qr_labels()
+
+    def invalidate_qr_labels(self):
+        """Drop cached QR labels of this rack and its shelves"""
+        from warehouse.qr import invalidate_labels
+
+        invalidate_labels(
+            [self.qr_code_uuid, *self.shelves.values_list('qr_code_uuid', flat=True)]
+        )
 
     def __str__(self):
         return f'{self.room.name}.{self.name}'
@@ -44,6 +83,16 @@ class Shelf(models.Model):
         Rack, on_delete=models.CASCADE, related_name='shelves', db_index=True
     )
     qr_code_uuid = models.UUIDField(null=True, blank=True, unique=True)
+    # Denormalized from rack and room so that display and ordering don't need
+    # joins; kept in sync by Room.save() and Rack.save(). sort_key is compared
+    # byte by byte (settings.SORT_KEY_COLLATION)
+    location_path = models.CharField(max_length=120, editable=False, db_index=True)
+    sort_key = models.CharField(
+        max_length=120,
+        editable=False,
+        db_index=True,
+        db_collation=settings.SORT_KEY_COLLATION,
+    )
 
     class Meta:
         unique_together = ['number', 'rack']
@@ -54,18 +103,59 @@ class Shelf(models.Model):
     def save(self, *args, **kwargs):
         if not self.qr_code_uuid:
             self.qr_code_uuid = uuid.uuid4()
+        moved = (
+            self.pk is not None
+            and not Shelf.objects.filter(
+                pk=self.pk, number=self.number, rack_id=self.rack_id
+            ).exists()
+        )
+        self.location_path, self.sort_key = self.build_location(
+            self.rack.room.name, self.rack.name, self.number
+        )
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'location_path', 'sort_key'}
         super().save(*args, **kwargs)
+        if moved:
+            from warehouse.qr import invalidate_labels
+
+            invalidate_labels([self.qr_code_uuid])
+
+    @staticmethod
+    def build_location(room_name, rack_name, number):
+        """
+        Return (location_path, sort_key) for the given room, rack and number.
+
+        The sort key orders like (room name, rack name, number): parts are
+        joined with a separator below any printable character and the number
+        is zero-padded.
+        """
+        path = f'{room_name}.{rack_name}.{number}'
+        sort_key = f'{room_name}\x1f{rack_name}\x1f{number:010d}'
+        return path, sort_key
+
+    @classmethod
+    def refresh_locations(cls, shelves):
+        """Recompute stored locations of the given shelves after a rename"""
+        shelves = list(shelves.select_related('rack__room'))
+        for shelf in shelves:
+            shelf.location_path, shelf.sort_key = cls.build_location(
+                shelf.rack.room.name, shelf.rack.name, shelf.number
+            )
+        cls.objects.bulk_update(shelves, ['location_path', 'sort_key'], batch_size=500)
 
     def __str__(self):
-        return f'{self.rack}.{self.number}'
+        return self.full_location
 
     @property
     def full_location(self):
-        return f'{self.rack.room.name}.{self.rack.name}.{self.number}'
+        return self.location_path
 
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    # Active items below this count put the category on the low stock list
+    min_stock = models.PositiveIntegerField(default=10)
 
     class Meta:
         verbose_name_plural = 'Categories'
@@ -86,18 +176,20 @@ class Item(models.Model):
     note = models.TextField(blank=True, null=True)
     is_gifted = models.BooleanField(default=False)
 
-    class Meta:
-        indexes = [
-            models.Index(fields=['name']),
-            models.Index(fields=['category']),
-            models.Index(fields=['manufacturer']),
-            models.Index(fields=['expiration_date']),
-        ]
-
     def __str__(self):
         return self.name
 
 
+class ProductThreshold(models.Model):
+    """Minimum stock of a single product, matched by item name"""
+
+    name = models.CharField(max_length=255, unique=True)
+    min_stock = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f'{self.name} (min. {self.min_stock})'
+
+
 class ItemShelfAssignment(models.Model):
     item = models.ForeignKey(
         Item, on_delete=models.CASCADE, related_name='assignments', db_index=True
@@ -105,8 +197,13 @@ class ItemShelfAssignment(models.Model):
     shelf = models.ForeignKey(
         Shelf, on_delete=models.CASCADE, related_name='assignments', db_index=True
     )
+    # Indexed together with their dates, see Meta
     added_by = models.ForeignKey(
-        User, on_delete=models.SET_NULL, null=True, related_name='added_items'
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='added_items',
+        db_index=False,
     )
     removed_by = models.ForeignKey(
         User,
@@ -114,19 +211,60 @@ class ItemShelfAssignment(models.Model):
         null=True,
         blank=True,
         related_name='removed_items',
+        db_index=False,
     )
     add_date = models.DateTimeField(auto_now_add=True, db_index=True)
-    remove_date = models.DateTimeField(null=True, blank=True, db_index=True)
+    remove_date = models.DateTimeField(null=True, blank=True)
+    # History operations that opened and closed the assignment
+    added_batch = models.ForeignKey(
+        'OperationBatch',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    removed_batch = models.ForeignKey(
+        'OperationBatch',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
 
     class Meta:
+        # Single-column indexes come from db_index on the fields. Active stock
+        # (remove_date IS NULL) is what almost every page reads, so it gets
+        # partial indexes that skip the removed history entirely.
         indexes = [
-            models.Index(fields=['item']),
-            models.Index(fields=['shelf']),
-            models.Index(fields=['add_date']),
-            models.Index(fields=['remove_date']),
-            # Compound index for common filtering operations
-            models.Index(fields=['shelf', 'remove_date']),
-            models.Index(fields=['item', 'remove_date']),
+            models.Index(
+                fields=['shelf'],
+                condition=models.Q(remove_date__isnull=True),
+                name='assignment_active_shelf_idx',
+            ),
+            models.Index(
+                fields=['item'],
+                condition=models.Q(remove_date__isnull=True),
+                name='assignment_active_item_idx',
+            ),
+            models.Index(
+                fields=['add_date'],
+                condition=models.Q(remove_date__isnull=True),
+                name='assignment_active_added_idx',
+            ),
+            models.Index(
+                fields=['remove_date'],
+                condition=models.Q(remove_date__isnull=False),
+                name='assignment_removed_date_idx',
+            ),
+            # Per-user history and activity reports; they replace the plain
+            # foreign key indexes on added_by and removed_by
+            models.Index(
+                fields=['added_by', 'add_date'], name='assignment_added_by_idx'
+            ),
+            models.Index(
+                fields=['removed_by', 'remove_date'],
+                name='assignment_removed_by_idx',
+            ),
         ]
 
     def __str__(self):
@@ -136,3 +274,222 @@ class ItemShelfAssignment(models.Model):
     @property
     def is_active(self):
         return self.remove_date is None
+
+
+class ItemShelfAssignmentArchive(models.Model):
+    """
+    Closed assignments moved out of ItemShelfAssignment by `archive_history`.
+
+    Rows keep their original id and columns, so history and exports can read
+    both tables the same way while active-stock queries only scan live rows.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    item = models.ForeignKey(
+        Item, on_delete=models.CASCADE, related_name='archived_assignments'
+    )
+    shelf = models.ForeignKey(
+        Shelf, on_delete=models.CASCADE, related_name='archived_assignments'
+    )
+    added_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='+', db_index=False
+    )
+    removed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        db_index=False,
+    )
+    add_date = models.DateTimeField()
+    remove_date = models.DateTimeField(db_index=True)
+    added_batch = models.ForeignKey(
+        'OperationBatch', on_delete=models.SET_NULL, null=True, related_name='+'
+    )
+    removed_batch = models.ForeignKey(
+        'OperationBatch', on_delete=models.SET_NULL, null=True, related_name='+'
+    )
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['shelf', 'remove_date']),
+            models.Index(fields=['added_by', 'add_date']),
+            models.Index(fields=['removed_by', 'remove_date']),
+        ]
+
+    def __str__(self):
+        return f'{self.item.name} on {self.shelf} - Archived'
+
+    @property
+    def is_active(self):
+        return False
+
+
+class OperationBatch(models.Model):
+    """
+    One line of the collapsed history: units of one product added to,
+    removed from or moved off a shelf by one user within one minute.
+
+    The stock helpers link the assignments they open and close to their
+    batch. The history can then list operations instead of units and load
+    the units of a single operation on demand.
+    """
+
+    KIND_ADD = 'add'
+    KIND_REMOVE = 'remove'
+    KIND_MOVE = 'move'
+    KIND_CHOICES = [
+        (KIND_ADD, 'Add'),
+        (KIND_REMOVE, 'Remove'),
+        (KIND_MOVE, 'Move'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='operation_batches'
+    )
+    shelf = models.ForeignKey(
+        Shelf, on_delete=models.CASCADE, related_name='operation_batches'
+    )
+    target_shelf = models.ForeignKey(
+        Shelf,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='incoming_operation_batches',
+    )
+    # Product of the units; empty when a whole location is moved
+    name = models.CharField(max_length=255, blank=True, null=True)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='operation_batches',
+    )
+    manufacturer = models.CharField(max_length=255, blank=True, null=True)
+    expiration_date = models.DateField(blank=True, null=True)
+    note = models.TextField(blank=True, null=True)
+    quantity = models.PositiveIntegerField(default=0)
+    # Start of the minute the operation happened in
+    minute = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'minute']),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.quantity} x {self.name or "-"}'
+
+    def add_units(self, count):
+        """Count `count` more units in the batch"""
+        if count:
+            OperationBatch.objects.filter(pk=self.pk).update(
+                quantity=models.F('quantity') + count
+            )
+            self.quantity += count
+
+
+class DailyStockStat(models.Model):
+    """Units added, removed and on hand per product and day, built nightly"""
+
+    date = models.DateField()
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name='daily_stats'
+    )
+    product_name = models.CharField(max_length=255)
+    added = models.PositiveIntegerField(default=0)
+    removed = models.PositiveIntegerField(default=0)
+    # Active units at the end of the day
+    on_hand = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['date', 'category', 'product_name']
+
+    def __str__(self):
+        return f'{self.date} {self.product_name}'
+
+
+class StockSnapshot(models.Model):
+    """Units of a product on a shelf at the end of a day (as-of checkpoint)"""
+
+    date = models.DateField(db_index=True)
+    shelf = models.ForeignKey(Shelf, on_delete=models.CASCADE, related_name='snapshots')
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, related_name='snapshots'
+    )
+    product_name = models.CharField(max_length=255)
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ['date', 'shelf', 'category', 'product_name']
+
+    def __str__(self):
+        return f'{self.date} {self.shelf} {self.product_name}: {self.quantity}'
+
+
+class BulkOperation(models.Model):
+    """
+    Server-side cursor of a chunked bulk operation.
+
+    Clients identify an operation with their own idempotency key and send it
+    with every batch, so a replayed batch is detected and skipped and an
+    interrupted operation can resume from `processed`.
+    """
+
+    KIND_ADD = 'add'
+    KIND_REMOVE = 'remove'
+    KIND_IMPORT = 'import'
+    KIND_LABELS = 'labels'
+    KIND_CHOICES = [
+        (KIND_ADD, 'Add items'),
+        (KIND_REMOVE, 'Remove items'),
+        (KIND_IMPORT, 'Import inventory'),
+        (KIND_LABELS, 'Render QR labels'),
+    ]
+
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETE = 'complete'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETE, 'Complete'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    key = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='bulk_operations'
+    )
+    params = models.JSONField(default=dict, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING
+    )
+    result = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.processed}/{self.total} ({self.key})'
+
+    @property
+    def remaining(self):
+        return max(self.total - self.processed, 0)
+
+    @property
+    def progress(self):
+        return (self.processed / self.total) * 100 if self.total else 100
+
+    def advance(self, count):
+        """Move the cursor forward by `count` units"""
+        self.processed += count
+        if self.processed >= self.total:
+            self.status = self.STATUS_COMPLETE
+        self.save(update_fields=['processed', 'status', 'updated_at'])
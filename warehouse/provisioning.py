@@ -0,0 +1,178 @@
+"""
+Bulk provisioning of racks and shelves.
+
+A new warehouse is set up as a grid: "room X, racks A-H, shelves 1-12 in
+each". The grid is created with two bulk_create calls in one transaction.
+QR UUIDs and stored locations are filled in Python, because bulk_create does
+not call save(). Locations that already exist are left alone, so
+provisioning the same grid twice is harmless. QR labels of the new shelves
+can be rendered in a background thread, tracked as a BulkOperation.
+"""
+
+import logging
+import string
+import threading
+import uuid
+
+from django.db import connection, transaction
+
+from warehouse.models import BulkOperation, Rack, Shelf
+
+logger = logging.getLogger(__name__)
+
+RACK_NAMES = string.ascii_uppercase
+
+# Upper bound of shelves created by one request
+MAX_PROVISIONED_SHELVES = 5000
+
+
+def rack_range(first, last):
+    """Rack names from first to last inclusive, e.g. ('A', 'D') -> 'ABCD'"""
+    return RACK_NAMES[RACK_NAMES.index(first) : RACK_NAMES.index(last) + 1]
+
+
+def provision_locations(room, rack_names, shelf_numbers):
+    """
+    Create the missing racks and shelves of a grid in one transaction.
+
+    Args:
+        room (Room): Room the racks belong to
+        rack_names (Iterable[str]): Rack names, e.g. 'ABC'
+        shelf_numbers (Iterable[int]): Shelf numbers created in every rack
+
+    Returns:
+        dict: racks_created, shelves_created, shelves_skipped and
+        shelf_ids (ids of the new shelves, in location order)
+    """
+    rack_names = list(rack_names)
+    shelf_numbers = list(shelf_numbers)
+
+    with transaction.atomic():
+        existing_racks = set(
+            Rack.objects.filter(room=room, name__in=rack_names).values_list(
+                'name', flat=True
+            )
+        )
+        new_racks = [
+            Rack(room=room, name=name, qr_code_uuid=uuid.uuid4())
+            for name in rack_names
+            if name not in existing_racks
+        ]
+        Rack.objects.bulk_create(new_racks, batch_size=500)
+
+        racks = dict(
+            Rack.objects.filter(room=room, name__in=rack_names).values_list(
+                'name', 'id'
+            )
+        )
+        existing_shelves = set(
+            Shelf.objects.filter(rack_id__in=racks.values()).values_list(
+                'rack_id', 'number'
+            )
+        )
+
+        new_shelves = []
+        for name in rack_names:
+            for number in shelf_numbers:
+                if (racks[name], number) in existing_shelves:
+                    continue
+                location_path, sort_key = Shelf.build_location(room.name, name, number)
+                new_shelves.append(
+                    Shelf(
+                        rack_id=racks[name],
+                        number=number,
+                        qr_code_uuid=uuid.uuid4(),
+                        location_path=location_path,
+                        sort_key=sort_key,
+                    )
+                )
+        Shelf.objects.bulk_create(new_shelves, batch_size=500)
+
+        # Not every backend returns primary keys from bulk_create
+        shelf_ids = list(
+            Shelf.objects.filter(
+                qr_code_uuid__in=[shelf.qr_code_uuid for shelf in new_shelves]
+            )
+            .order_by('sort_key')
+            .values_list('id', flat=True)
+        )
+
+    return {
+        'racks_created': len(new_racks),
+        'shelves_created': len(new_shelves),
+        'shelves_skipped': len(rack_names) * len(shelf_numbers) - len(new_shelves),
+        'shelf_ids': shelf_ids,
+    }
+
+
+def render_shelf_labels(operation, base_url):
+    """Render the cached QR labels of the operation's shelves"""
+    from warehouse.qr import get_label, label_caption, label_target_path
+
+    shelves = Shelf.objects.filter(id__in=operation.params['shelf_ids']).order_by(
+        'sort_key'
+    )
+    rendered = 0
+    for shelf in shelves.iterator(chunk_size=500):
+        get_label(
+            shelf.qr_code_uuid,
+            base_url + label_target_path(shelf),
+            label_caption(shelf),
+        )
+        rendered += 1
+        if rendered % 100 == 0:
+            operation.advance(100)
+
+    # Shelves deleted in the meantime are simply not rendered
+    operation.processed = rendered
+    operation.status = BulkOperation.STATUS_COMPLETE
+    operation.save(update_fields=['processed', 'status', 'updated_at'])
+
+
+def _run_label_job(operation_pk, base_url):
+    operation = BulkOperation.objects.get(pk=operation_pk)
+    try:
+        render_shelf_labels(operation, base_url)
+    except Exception as e:
+        logger.exception('QR label job %s failed', operation.key)
+        operation.status = BulkOperation.STATUS_FAILED
+        operation.result = {'error': str(e)}
+        operation.save(update_fields=['status', 'result', 'updated_at'])
+
+
+def start_label_job(shelf_ids, base_url, user):
+    """
+    Render QR labels of the given shelves in a background thread.
+
+    Args:
+        shelf_ids (list): Shelves to render labels for
+        base_url (str): Scheme and host the labels point to, without a
+            trailing slash
+        user (User): User who requested the labels
+
+    Returns:
+        BulkOperation: Progress of the job
+    """
+    operation = BulkOperation.objects.create(
+        key=uuid.uuid4().hex,
+        kind=BulkOperation.KIND_LABELS,
+        user=user,
+        params={'shelf_ids': shelf_ids},
+        total=len(shelf_ids),
+        status=(
+            BulkOperation.STATUS_RUNNING if shelf_ids else BulkOperation.STATUS_COMPLETE
+        ),
+    )
+    if not shelf_ids:
+        return operation
+
+    def run():
+        try:
+            _run_label_job(operation.pk, base_url)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=run, name=f'labels-{operation.key}')
+    thread.daemon = True
+    thread.start()
+    return operation
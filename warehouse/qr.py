@@ -0,0 +1,248 @@
+"""
+Persistent QR label cache for shelves, racks and rooms.
+
+Every location carries a stable ``qr_code_uuid``, so its label only has to be
+rendered once. Labels are stored under ``MEDIA_ROOT/qrcodes/`` as
+``<uuid>.svg`` (printable label with a location caption) and ``<uuid>.png``
+(bare QR tile used when composing PDFs). A small ``<uuid>.key`` file records
+what the label was rendered from; when the encoded URL (e.g. a new
+``NETWORK_HOST``) or the location caption changes the label is re-rendered.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import qrcode
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+
+LABEL_DIR = 'qrcodes'
+LABEL_FORMATS = ('svg', 'png')
+
+# A label URL is keyed by the location's UUID, but the label is re-rendered
+# in place after a rename or host change, so clients revalidate it (against
+# the ETag) on every use. Labels are only served to logged-in users.
+LABEL_CACHE_CONTROL = 'private, no-cache'
+
+# Inline QR images are requested with ?v=<payload hash>, so a given URL
+# always serves the same bytes
+QR_IMAGE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+QR_IMAGE_CONTENT_TYPES = {'svg': 'image/svg+xml', 'png': 'image/png'}
+
+
+def label_dir():
+    """Directory holding cached labels"""
+    return Path(settings.MEDIA_ROOT) / LABEL_DIR
+
+
+def label_path(qr_uuid, fmt):
+    """Path of the cached label of the given format"""
+    return label_dir() / f'{qr_uuid}.{fmt}'
+
+
+def label_caption(obj):
+    """Human readable location printed under the QR code"""
+    from warehouse.models import Rack, Shelf
+
+    if isinstance(obj, Shelf):
+        return obj.full_location
+    if isinstance(obj, Rack):
+        return f'{obj.room.name}.{obj.name}'
+    return obj.name
+
+
+def label_target_path(obj):
+    """
+    Path the QR code of a shelf, rack or room points to.
+
+    Labels encode the short UUID resolver rather than a primary key, which
+    keeps the payload (and therefore the QR version) small and lets printed
+    labels survive database re-imports.
+    """
+    return reverse('resolve_qr_code', kwargs={'qr_uuid': obj.qr_code_uuid})
+
+
+def label_target_url(request, obj):
+    """Network-aware absolute URL encoded in the QR code"""
+    from warehouse.views.utils import build_network_absolute_uri
+
+    return build_network_absolute_uri(request, label_target_path(obj))
+
+
+def find_location_by_uuid(qr_uuid):
+    """Return the shelf, rack or room carrying the given QR code UUID"""
+    from warehouse.models import Rack, Room, Shelf
+
+    querysets = (
+        Shelf.objects.select_related('rack', 'rack__room'),
+        Rack.objects.select_related('room'),
+        Room.objects.all(),
+    )
+    for queryset in querysets:
+        obj = queryset.filter(qr_code_uuid=qr_uuid).first()
+        if obj is not None:
+            return obj
+    return None
+
+
+def make_qr(data):
+    """Build a QRCode instance for the given payload"""
+    qr = qrcode.QRCode(
+        version=1,  # grown by fit=True only as far as the payload needs
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=8,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def render_svg(data, caption=''):
+    """Render a QR code as a compact SVG, optionally with a caption below it"""
+    matrix = make_qr(data).get_matrix()
+    size = len(matrix)
+    modules = ''.join(
+        f'M{x},{y}h1v1h-1z'
+        for y, row in enumerate(matrix)
+        for x, dark in enumerate(row)
+        if dark
+    )
+    height = size + 3 if caption else size
+    text = ''
+    if caption:
+        text = (
+            f'<text x="{size / 2}" y="{size + 1.5}" font-size="2" '
+            'font-family="Helvetica, Arial, sans-serif" text-anchor="middle">'
+            f'{escape(caption)}</text>'
+        )
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        f'viewBox="0 0 {size} {height}" shape-rendering="crispEdges">'
+        '<rect width="100%" height="100%" fill="#fff"/>'
+        f'<path d="{modules}" fill="#000"/>{text}</svg>'
+    ).encode('utf-8')
+
+
+def render_png(data):
+    """Render a QR code as PNG bytes"""
+    buffer = io.BytesIO()
+    make_qr(data).make_image(fill_color='black', back_color='white').save(buffer)
+    return buffer.getvalue()
+
+
+def qr_version(data):
+    """Short hash of a QR payload, used as cache key and URL version"""
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+
+def qr_image(data, fmt='svg'):
+    """Bare QR code for data as SVG or PNG bytes, memoized in the Django cache"""
+    if fmt not in LABEL_FORMATS:
+        raise ValueError(f'Unsupported QR format: {fmt}')
+
+    key = f'qr-image:{fmt}:{qr_version(data)}'
+    content = cache.get(key)
+    if content is None:
+        content = render_svg(data) if fmt == 'svg' else render_png(data)
+        cache.set(key, content, None)
+    return content
+
+
+def _write_atomic(path, content):
+    """Write a file so that readers (e.g. nginx) never see a partial label"""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(content)
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def get_label(qr_uuid, data, caption='', fmt='svg'):
+    """
+    Return the path of a cached label, rendering it on a cache miss.
+
+    Args:
+        qr_uuid: UUID of the shelf, rack or room
+        data (str): Payload encoded in the QR code
+        caption (str): Location printed under the QR code (SVG only)
+        fmt (str): 'svg' or 'png'
+
+    Returns:
+        Path: Location of the label file under MEDIA_ROOT
+    """
+    if fmt not in LABEL_FORMATS:
+        raise ValueError(f'Unsupported label format: {fmt}')
+
+    directory = label_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    key = hashlib.sha1(f'{data}\n{caption}'.encode('utf-8')).hexdigest()
+    key_path = directory / f'{qr_uuid}.key'
+    try:
+        stale = key_path.read_text() != key
+    except FileNotFoundError:
+        stale = True
+
+    if stale:
+        invalidate_labels([qr_uuid])
+        _write_atomic(key_path, key.encode('ascii'))
+
+    path = label_path(qr_uuid, fmt)
+    if not path.exists():
+        content = render_svg(data, caption) if fmt == 'svg' else render_png(data)
+        _write_atomic(path, content)
+    return path
+
+
+def label_etag(qr_uuid):
+    """ETag of the cached label, changing whenever it is re-rendered"""
+    try:
+        return f'"{(label_dir() / f"{qr_uuid}.key").read_text()}"'
+    except FileNotFoundError:
+        return None
+
+
+def get_location_label(request, obj, fmt='svg'):
+    """Cached label for a shelf, rack or room"""
+    return get_label(
+        obj.qr_code_uuid, label_target_url(request, obj), label_caption(obj), fmt
+    )
+
+
+def invalidate_labels(qr_uuids):
+    """Drop cached labels so they are re-rendered on next use"""
+    directory = label_dir()
+    for qr_uuid in qr_uuids:
+        if not qr_uuid:
+            continue
+        for suffix in (*LABEL_FORMATS, 'key'):
+            try:
+                os.unlink(directory / f'{qr_uuid}.{suffix}')
+            except FileNotFoundError:
+                pass
+
+
+def clear_labels():
+    """Remove every cached label, returning the number of files removed"""
+    directory = label_dir()
+    if not directory.exists():
+        return 0
+    removed = 0
+    for path in directory.iterdir():
+        if path.suffix.lstrip('.') in (*LABEL_FORMATS, 'key'):
+            path.unlink()
+            removed += 1
+    return removed
@@ -2,8 +2,11 @@
 Scheduler module for the warehouse application.
 This module sets up automated tasks for the warehouse app.
 """
+
 import datetime
 import logging
+import os
+import tempfile
 import threading
 import time
 from django.conf import settings
@@ -13,36 +16,78 @@ from ksp.env import get_env_variable
 
 logger = logging.getLogger(__name__)
 
+
 def send_expiry_notifications():
     """Run the expiry notification command"""
-    logger.info("Running scheduled expiry notification check")
+    logger.info('Running scheduled expiry notification check')
     call_command('send_expiry_notifications')
 
+
+def archive_history():
+    """Run the history archiving command"""
+    logger.info('Running scheduled history archiving')
+    call_command('archive_history')
+
+
+def compute_stock_stats():
+    """Run the stock analytics command for the previous day"""
+    logger.info('Running scheduled stock statistics')
+    call_command('compute_stock_stats')
+
+
+def snapshot_stock():
+    """Store yesterday's stock checkpoint for as-of reports"""
+    logger.info('Running scheduled stock snapshot')
+    call_command('snapshot_stock')
+
+
+def run_maintenance():
+    """Run the daily maintenance jobs, each on its own"""
+    try:
+        archive_history()
+    except Exception as e:
+        logger.error(f'Error in scheduled history archiving: {e}')
+
+    try:
+        compute_stock_stats()
+    except Exception as e:
+        logger.error(f'Error in scheduled stock statistics: {e}')
+
+    try:
+        snapshot_stock()
+    except Exception as e:
+        logger.error(f'Error in scheduled stock snapshot: {e}')
+
+
 def scheduler_thread():
     """Thread function that runs scheduled tasks at specific times"""
-    logger.info("Starting scheduler thread for automated tasks")
-    
+    logger.info('Starting scheduler thread for automated tasks')
+
     while True:
         # Get current time
         now = timezone.localtime()
-        
+
         # Get scheduled time from environment variables
         # Default to 8:00 AM if not specified
         target_hour = int(get_env_variable('NOTIFICATION_HOUR', '8'))
         target_minute = int(get_env_variable('NOTIFICATION_MINUTE', '0'))
-        
-        logger.info(f"Notification schedule set for {target_hour}:{target_minute:02d}")
-        
-        if now.hour > target_hour or (now.hour == target_hour and now.minute >= target_minute):
+
+        logger.info(f'Notification schedule set for {target_hour}:{target_minute:02d}')
+
+        if now.hour > target_hour or (
+            now.hour == target_hour and now.minute >= target_minute
+        ):
             # If we've already passed the scheduled time today, schedule for tomorrow
             next_run = now + datetime.timedelta(days=1)
-            next_run = next_run.replace(hour=target_hour, minute=target_minute, 
-                                      second=0, microsecond=0)
+            next_run = next_run.replace(
+                hour=target_hour, minute=target_minute, second=0, microsecond=0
+            )
         else:
             # Schedule for today at the configured time
-            next_run = now.replace(hour=target_hour, minute=target_minute, 
-                                  second=0, microsecond=0)
-        
+            next_run = now.replace(
+                hour=target_hour, minute=target_minute, second=0, microsecond=0
+            )
+
         # Handle month/year transitions
         try:
             # This is just to catch the ValueError if next_run has an invalid date
@@ -52,36 +97,93 @@ def scheduler_thread():
             # Handle case where next day doesn't exist (e.g., June 31)
             next_month = now.month + 1 if now.month < 12 else 1
             next_year = now.year + 1 if now.month == 12 else now.year
-            next_run = now.replace(year=next_year, month=next_month, day=1, 
-                                  hour=target_hour, minute=target_minute,
-                                  second=0, microsecond=0)
-        
+            next_run = now.replace(
+                year=next_year,
+                month=next_month,
+                day=1,
+                hour=target_hour,
+                minute=target_minute,
+                second=0,
+                microsecond=0,
+            )
+
         # Calculate seconds to sleep
         seconds_until_next_run = (next_run - now).total_seconds()
-        
-        logger.info(f"Scheduled next expiry notification check at {next_run.strftime('%Y-%m-%d %H:%M:%S')}")
-        logger.info(f"Sleeping for {seconds_until_next_run} seconds")
-        
+
+        logger.info(
+            f'Scheduled next expiry notification check at {next_run.strftime("%Y-%m-%d %H:%M:%S")}'
+        )
+        logger.info(f'Sleeping for {seconds_until_next_run} seconds')
+
         # Sleep until the next scheduled run
         time.sleep(seconds_until_next_run)
-        
-        # Execute the scheduled task
-        try:
-            send_expiry_notifications()
-        except Exception as e:
-            logger.error(f"Error in scheduled task: {e}")
+
+        # Execute the scheduled tasks
+        if getattr(settings, 'ENABLE_EXPIRY_NOTIFICATIONS', True):
+            try:
+                send_expiry_notifications()
+            except Exception as e:
+                logger.error(f'Error in scheduled task: {e}')
+
+        # Archive old history and refresh the reports once a day, after the
+        # notifications
+        if getattr(settings, 'ENABLE_MAINTENANCE_JOBS', True):
+            run_maintenance()
+
+
+# Lock file held open by the process running the scheduler
+_lock_file = None
+
+
+def claim_scheduler_lock():
+    """
+    Take the scheduler lock for the lifetime of this process.
+
+    Every gunicorn worker loads the app, so without the lock each would run
+    the daily jobs. Returns False when another process holds the lock.
+    """
+    global _lock_file
+    try:
+        import fcntl
+    except ImportError:
+        # No flock (Windows): development servers run a single process
+        return True
+
+    path = getattr(settings, 'SCHEDULER_LOCK_FILE', None) or os.path.join(
+        tempfile.gettempdir(), 'ksp-scheduler.lock'
+    )
+    lock_file = open(path, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _lock_file = lock_file
+    return True
+
 
 def start_scheduler():
     """Start the scheduler in a separate thread"""
-    # Only start scheduler if enabled in settings
-    if getattr(settings, 'ENABLE_EXPIRY_NOTIFICATIONS', True):
+    if not getattr(settings, 'RUN_SCHEDULER', True):
+        logger.info('Scheduler disabled for this service')
+        return
+    if not claim_scheduler_lock():
+        logger.info('Scheduler already running in another process')
+        return
+
+    # Only start scheduler if any of its tasks is enabled in settings
+    if getattr(settings, 'ENABLE_EXPIRY_NOTIFICATIONS', True) or getattr(
+        settings, 'ENABLE_MAINTENANCE_JOBS', True
+    ):
         scheduler = threading.Thread(target=scheduler_thread)
         scheduler.daemon = True  # Allow the thread to exit when the main thread exits
         scheduler.start()
-        
+
         # Get scheduled time from environment variables for logging
         target_hour = int(get_env_variable('NOTIFICATION_HOUR', '8'))
         target_minute = int(get_env_variable('NOTIFICATION_MINUTE', '0'))
-        logger.info(f"Expiry notification scheduler started, will run daily at {target_hour}:{target_minute:02d}")
+        logger.info(
+            f'Scheduler started, will run daily at {target_hour}:{target_minute:02d}'
+        )
     else:
-        logger.info("Expiry notification scheduler disabled in settings")
+        logger.info('Expiry notifications and maintenance jobs disabled in settings')
@@ -0,0 +1,161 @@
+"""
+Shelf contents grouped by product.
+
+Units of the same product (name, category, manufacturer, expiry and note,
+the same key the remove form matches on) are shown as one row with a count
+and a representative assignment. Rows are read in pages with keyset
+pagination: the cursor is the sort key of the last row, so a page costs the
+same no matter how deep the client has scrolled.
+"""
+
+import base64
+import json
+from datetime import date, timedelta
+
+from django.db.models import (
+    CharField,
+    Count,
+    DateField,
+    F,
+    Min,
+    Q,
+    TextField,
+    Value,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from warehouse.models import ItemShelfAssignment
+
+# Days before expiry when a unit counts as nearly expired
+EXPIRING_SOON_DAYS = 30
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Units without an expiry date sort after all dated ones
+NO_EXPIRY = date.max
+
+GROUP_KEY = ('name', 'expiry', 'category_id', 'manufacturer', 'note')
+
+
+def expiry_bounds(today=None):
+    today = today or timezone.localdate()
+    return today, today + timedelta(days=EXPIRING_SOON_DAYS)
+
+
+def shelf_counters(shelf, today=None):
+    """Total, expired and nearly expired active units in one query"""
+    today, soon = expiry_bounds(today)
+    return ItemShelfAssignment.objects.filter(
+        shelf=shelf, remove_date__isnull=True
+    ).aggregate(
+        total_count=Count('pk'),
+        expired_count=Count('pk', filter=Q(item__expiration_date__lt=today)),
+        nearly_expired_count=Count(
+            'pk',
+            filter=Q(item__expiration_date__gte=today, item__expiration_date__lte=soon),
+        ),
+    )
+
+
+def encode_cursor(row):
+    key = [row[field] for field in GROUP_KEY]
+    key[1] = key[1].isoformat()
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Sort key from a cursor; ValueError when it is malformed"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        name, expiry, category_id, manufacturer, note = key
+        return (
+            str(name),
+            date.fromisoformat(expiry),
+            int(category_id),
+            str(manufacturer),
+            str(note),
+        )
+    except (TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def _after(key):
+    """Rows sorting after the key, as (a > x) OR (a = x AND b > y) ..."""
+    condition = Q()
+    for depth in range(len(GROUP_KEY) - 1, -1, -1):
+        step = Q(**{f'{GROUP_KEY[depth]}__gt': key[depth]})
+        for field, value in zip(GROUP_KEY[:depth], key[:depth]):
+            step &= Q(**{field: value})
+        condition |= step
+    return condition
+
+
+def content_groups(shelf, after=None, limit=DEFAULT_PAGE_SIZE, today=None):
+    """
+    One page of the shelf's active units grouped by product.
+
+    Args:
+        shelf (Shelf): Shelf to read
+        after (str): Cursor returned with the previous page
+        limit (int): Number of groups per page
+        today (date): Reference date for the expiry status
+
+    Returns:
+        tuple: (list of group dicts, cursor of the next page or None)
+    """
+    today, soon = expiry_bounds(today)
+    groups = (
+        ItemShelfAssignment.objects.filter(shelf=shelf, remove_date__isnull=True)
+        .annotate(
+            name=F('item__name'),
+            expiry=Coalesce(
+                'item__expiration_date', Value(NO_EXPIRY), output_field=DateField()
+            ),
+            category_id=F('item__category_id'),
+            manufacturer=Coalesce(
+                'item__manufacturer', Value(''), output_field=CharField()
+            ),
+            note=Coalesce('item__note', Value(''), output_field=TextField()),
+        )
+        .order_by(*GROUP_KEY)
+        .values(*GROUP_KEY)
+        .annotate(
+            category_name=Min('item__category__name'),
+            count=Count('pk'),
+            assignment_id=Min('pk'),
+        )
+    )
+    if after:
+        groups = groups.filter(_after(decode_cursor(after)))
+
+    rows = list(groups[: limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+
+    results = []
+    for row in rows[:limit]:
+        expiration_date = None if row['expiry'] == NO_EXPIRY else row['expiry']
+        if expiration_date is None:
+            status = None
+        elif expiration_date < today:
+            status = 'expired'
+        elif expiration_date <= soon:
+            status = 'expiring_soon'
+        else:
+            status = 'ok'
+        results.append(
+            {
+                'name': row['name'],
+                'category': row['category_name'],
+                'manufacturer': row['manufacturer'] or None,
+                'note': row['note'] or None,
+                'expiration_date': (
+                    expiration_date.isoformat() if expiration_date else None
+                ),
+                'status': status,
+                'count': row['count'],
+                'assignment_id': row['assignment_id'],
+            }
+        )
+    return results, next_cursor
@@ -0,0 +1,165 @@
+"""
+Inventory as of a past date.
+
+Stock at the end of a day is stored per shelf and product in StockSnapshot
+by the nightly `snapshot_stock` command. The stock as of any date is the
+closest earlier checkpoint plus the units added and removed since then, so
+a historical report reads one day of snapshot rows and a short range of
+assignments instead of the whole history. Without an earlier checkpoint
+the stock is rebuilt from the assignments directly.
+"""
+
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from warehouse.models import (
+    ItemShelfAssignment,
+    ItemShelfAssignmentArchive,
+    StockSnapshot,
+)
+
+# Both tables hold units; archived ones are all removed
+UNIT_MODELS = (ItemShelfAssignment, ItemShelfAssignmentArchive)
+
+UNIT_KEY = ('shelf', 'item__category', 'item__name')
+
+
+def end_of_day(day):
+    """First moment after the given day, in the current timezone"""
+    return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def _count_units(filter_q):
+    counts = Counter()
+    for model in UNIT_MODELS:
+        rows = (
+            model.objects.filter(filter_q)
+            .order_by()
+            .values(*UNIT_KEY)
+            .annotate(units=Count('pk'))
+        )
+        for row in rows:
+            key = (row['shelf'], row['item__category'], row['item__name'])
+            counts[key] += row['units']
+    return counts
+
+
+def _full_scan(moment, unit_q=Q()):
+    """Units on shelves at the given moment, from the whole history"""
+    return _count_units(
+        unit_q
+        & Q(add_date__lt=moment)
+        & (Q(remove_date__isnull=True) | Q(remove_date__gte=moment))
+    )
+
+
+def _checkpoint(day):
+    """Latest snapshot date on or before day, or None"""
+    return (
+        StockSnapshot.objects.filter(date__lte=day)
+        .order_by('-date')
+        .values_list('date', flat=True)
+        .first()
+    )
+
+
+def _stock_counts(day, unit_q=Q(), snapshot_q=Q()):
+    """Counter of (shelf_id, category_id, product_name) at the end of day"""
+    checkpoint = _checkpoint(day)
+    if checkpoint is None:
+        return _full_scan(end_of_day(day), unit_q)
+
+    counts = Counter(
+        {
+            (shelf_id, category_id, name): quantity
+            for shelf_id, category_id, name, quantity in StockSnapshot.objects.filter(
+                snapshot_q, date=checkpoint
+            ).values_list('shelf_id', 'category_id', 'product_name', 'quantity')
+        }
+    )
+    if checkpoint == day:
+        return counts
+
+    since, until = end_of_day(checkpoint), end_of_day(day)
+    # Units added since the checkpoint and still there at the end of day
+    counts.update(
+        _count_units(
+            unit_q
+            & Q(add_date__gte=since, add_date__lt=until)
+            & (Q(remove_date__isnull=True) | Q(remove_date__gte=until))
+        )
+    )
+    # Units that were in the checkpoint and have been removed since
+    counts.subtract(
+        _count_units(
+            unit_q
+            & Q(add_date__lt=since, remove_date__gte=since, remove_date__lt=until)
+        )
+    )
+    return counts
+
+
+def stock_as_of(day, shelves=None, category_id=None, search=None):
+    """
+    Stock at the end of the given day.
+
+    Args:
+        day (date): Report date
+        shelves (QuerySet): Only these shelves
+        category_id (int): Only this category
+        search (str): Case-insensitive substring of the product name
+
+    Returns:
+        list: Dicts with shelf_id, category_id, product_name and quantity
+    """
+    unit_q, snapshot_q = Q(), Q()
+    if shelves is not None:
+        unit_q &= Q(shelf__in=shelves)
+        snapshot_q &= Q(shelf__in=shelves)
+    if category_id:
+        unit_q &= Q(item__category_id=category_id)
+        snapshot_q &= Q(category_id=category_id)
+    if search:
+        unit_q &= Q(item__name__icontains=search)
+        snapshot_q &= Q(product_name__icontains=search)
+
+    return [
+        {
+            'shelf_id': shelf_id,
+            'category_id': category_id_,
+            'product_name': name,
+            'quantity': quantity,
+        }
+        for (shelf_id, category_id_, name), quantity in _stock_counts(
+            day, unit_q, snapshot_q
+        ).items()
+        if quantity > 0
+    ]
+
+
+def take_snapshot(day):
+    """Store the stock at the end of day as a checkpoint; returns the row count"""
+    with transaction.atomic():
+        # Build from an earlier checkpoint, not from the one being replaced
+        StockSnapshot.objects.filter(date=day).delete()
+        snapshots = _snapshot_rows(day)
+        StockSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+    return len(snapshots)
+
+
+def _snapshot_rows(day):
+    return [
+        StockSnapshot(
+            date=day,
+            shelf_id=shelf_id,
+            category_id=category_id,
+            product_name=name,
+            quantity=quantity,
+        )
+        for (shelf_id, category_id, name), quantity in _stock_counts(day).items()
+        if quantity > 0
+    ]
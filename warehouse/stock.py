@@ -0,0 +1,310 @@
+"""
+Stock mutation helpers shared by views, APIs and management commands.
+
+Concurrent edits of the same group are safe without application locks:
+
+- Units are picked in the database. On PostgreSQL the pick takes row locks
+  with FOR UPDATE SKIP LOCKED, so two volunteers removing from one group get
+  different units instead of waiting on (or double-counting) the same ones.
+- On SQLite the settings open IMMEDIATE transactions, which take the write
+  lock up front and serialize writers.
+- Closing an assignment is a compare-and-set: the UPDATE re-checks
+  `remove_date IS NULL`, an assignment's only state change. The returned row
+  count is what really happened, and callers report that rather than the
+  quantity they asked for.
+"""
+
+from itertools import repeat
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from warehouse.bulk import bulk_insert
+from warehouse.events import EVENT_ADD, EVENT_MOVE, publish_stock_event
+from warehouse.models import Item, ItemShelfAssignment, OperationBatch
+
+
+def item_product(item):
+    """Product fields of an item, as taken by operation_batch"""
+    return {
+        'name': item.name,
+        'category_id': item.category_id,
+        'manufacturer': item.manufacturer,
+        'expiration_date': item.expiration_date,
+        'note': item.note,
+    }
+
+
+def operation_batch(kind, user, shelf_id, product=None, target_shelf_id=None, now=None):
+    """
+    History batch of an operation, shared with earlier ones of the same minute.
+
+    Operations of the same kind, user, shelves and product within one minute
+    are one line of the collapsed history, so scanning a product ten times
+    in a row is listed once. Count the units with OperationBatch.add_units.
+
+    Args:
+        kind (str): OperationBatch.KIND_ADD, KIND_REMOVE or KIND_MOVE
+        user (User): The user performing the operation
+        shelf_id (int): Shelf the units are added to, removed or moved from
+        product (dict): name, category_id, manufacturer, expiration_date and
+            note of the units; None when products are mixed
+        target_shelf_id (int): Shelf the units are moved to
+        now (datetime): Time of the operation, defaults to the current time
+
+    Returns:
+        OperationBatch: Existing or new batch
+    """
+    product = product or {}
+    key = {
+        'kind': kind,
+        'user': user,
+        'shelf_id': shelf_id,
+        'target_shelf_id': target_shelf_id,
+        'minute': (now or timezone.now()).replace(second=0, microsecond=0),
+        'name': product.get('name'),
+        'category_id': product.get('category_id'),
+        'manufacturer': product.get('manufacturer') or None,
+        'expiration_date': product.get('expiration_date') or None,
+        'note': product.get('note') or None,
+    }
+    # Two racing requests may both create a batch; that is just two lines
+    batch = OperationBatch.objects.filter(**key).order_by('pk').first()
+    return batch or OperationBatch.objects.create(**key)
+
+
+def add_items_to_shelf(
+    shelf,
+    user,
+    quantity,
+    name,
+    category,
+    manufacturer=None,
+    expiration_date=None,
+    note=None,
+):
+    """
+    Create `quantity` identical items and put them on a shelf.
+
+    Args:
+        shelf (Shelf): Target shelf
+        user (User): The user adding the items
+        quantity (int): Number of units to add
+        name (str): Item name
+        category (Category): Item category
+        manufacturer (str): Optional manufacturer
+        expiration_date (date): Optional expiration date
+        note (str): Optional note
+
+    Returns:
+        int: Number of units added
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        item_ids = bulk_insert(
+            Item,
+            ['name', 'category', 'manufacturer', 'expiration_date', 'note'],
+            repeat((name, category.pk, manufacturer, expiration_date, note), quantity),
+        )
+        batch = operation_batch(
+            OperationBatch.KIND_ADD,
+            user,
+            shelf.pk,
+            {
+                'name': name,
+                'category_id': category.pk,
+                'manufacturer': manufacturer,
+                'expiration_date': expiration_date,
+                'note': note,
+            },
+            now=now,
+        )
+        user_id = user.pk if user else None
+        bulk_insert(
+            ItemShelfAssignment,
+            ['item', 'shelf', 'added_by', 'add_date', 'added_batch'],
+            ((item_id, shelf.pk, user_id, now, batch.pk) for item_id in item_ids),
+        )
+        batch.add_units(quantity)
+        publish_stock_event(EVENT_ADD, shelf.pk, quantity, name)
+
+    return quantity
+
+
+def group_assignments(shelf, name, category, manufacturer=None, expiration_date=None):
+    """Active assignments of one product group on a shelf, oldest first"""
+    return ItemShelfAssignment.objects.filter(
+        shelf=shelf,
+        remove_date__isnull=True,
+        item__name=name,
+        item__category=category,
+        item__manufacturer=manufacturer or None,
+        item__expiration_date=expiration_date or None,
+    ).order_by('pk')
+
+
+def _pick_units(assignments, quantity):
+    """
+    Up to `quantity` active assignments, oldest first, locked for the
+    transaction where the database supports it. Rows locked by a concurrent
+    move or removal are skipped rather than waited for.
+    """
+    picked = assignments.filter(remove_date__isnull=True).order_by('pk')
+    if connection.features.has_select_for_update_skip_locked:
+        picked = picked.select_for_update(skip_locked=True, of=('self',))
+    if quantity is not None:
+        picked = picked[:quantity]
+    return picked
+
+
+def close_units(assignments, user, quantity=None, now=None, batch=None):
+    """
+    Close up to `quantity` active assignments of a queryset, oldest first.
+
+    Args:
+        assignments (QuerySet): ItemShelfAssignment rows to pick from
+        user (User): The user removing the units
+        quantity (int): Units to close, all matching units if None
+        now (datetime): Removal time, defaults to the current time
+        batch (OperationBatch): History batch the removal belongs to
+
+    Returns:
+        int: Number of units actually closed, which is lower than `quantity`
+        when fewer units are left
+    """
+    if quantity is not None and quantity < 1:
+        return 0
+
+    with transaction.atomic():
+        return ItemShelfAssignment.objects.filter(
+            pk__in=_pick_units(assignments, quantity).values('pk'),
+            remove_date__isnull=True,
+        ).update(
+            remove_date=now or timezone.now(), removed_by=user, removed_batch=batch
+        )
+
+
+def move_group(
+    source_shelf,
+    target_shelf,
+    user,
+    name,
+    category,
+    manufacturer=None,
+    expiration_date=None,
+    quantity=None,
+):
+    """
+    Move units of a product group from one shelf to another.
+
+    The units are picked in the database (oldest assignments first, LIMIT
+    `quantity`, locked for the transaction), so no ids are loaded into
+    Python or sent back as an IN list. One UPDATE closes the old assignments
+    and stamps them with the move's history batch, and one INSERT ... SELECT
+    opens the new ones from the stamped rows, whatever the number of units.
+
+    Args:
+        source_shelf (Shelf): Shelf the units are on
+        target_shelf (Shelf): Shelf to move the units to
+        user (User): The user performing the move
+        name (str): Item name
+        category (Category): Item category or its id
+        manufacturer (str): Optional manufacturer
+        expiration_date (date): Optional expiration date
+        quantity (int): Units to move, all units of the group if None
+
+    Returns:
+        int: Number of units moved
+    """
+    if source_shelf.pk == target_shelf.pk:
+        raise ValueError('Source and target shelf must differ')
+    if quantity is not None and quantity < 1:
+        return 0
+
+    meta = ItemShelfAssignment._meta
+    qn = connection.ops.quote_name
+    table = qn(meta.db_table)
+    item, shelf, added_by, add_date, added_batch = (
+        qn(meta.get_field(field).column)
+        for field in ('item', 'shelf', 'added_by', 'add_date', 'added_batch')
+    )
+
+    now = timezone.now()
+    with transaction.atomic():
+        batch = operation_batch(
+            OperationBatch.KIND_MOVE,
+            user,
+            source_shelf.pk,
+            {
+                'name': name,
+                # The API passes category ids
+                'category_id': getattr(category, 'pk', category),
+                'manufacturer': manufacturer,
+                'expiration_date': expiration_date,
+            },
+            target_shelf.pk,
+            now,
+        )
+        moved = close_units(
+            group_assignments(
+                source_shelf, name, category, manufacturer, expiration_date
+            ),
+            user,
+            quantity,
+            now=now,
+            batch=batch,
+        )
+        if not moved:
+            return 0
+
+        # The batch collects every move of the group within a minute; rows
+        # of earlier moves already have their copy, which was inserted after
+        # them. Rows just closed here have no later row for their item yet.
+        copied = ItemShelfAssignment.objects.filter(
+            added_batch=batch, item=OuterRef('item'), pk__gt=OuterRef('pk')
+        )
+        closed = (
+            ItemShelfAssignment.objects.filter(removed_batch=batch)
+            .exclude(Exists(copied))
+            .values('pk')
+        )
+        select_sql, select_params = closed.query.get_compiler(
+            connection=connection
+        ).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} '
+                f'({item}, {shelf}, {added_by}, {add_date}, {added_batch}) '
+                f'SELECT {item}, %s, %s, %s, %s FROM {table} '
+                f'WHERE {qn(meta.pk.column)} IN ({select_sql})',
+                [
+                    target_shelf.pk,
+                    user.pk if user else None,
+                    connection.ops.adapt_datetimefield_value(now),
+                    batch.pk,
+                    *select_params,
+                ],
+            )
+        batch.add_units(moved)
+        publish_stock_event(EVENT_MOVE, source_shelf.pk, moved, name, target_shelf.pk)
+
+    return moved
+
+
+def move_groups(groups, target_shelf, user):
+    """
+    Move several product groups to one shelf in a single transaction.
+
+    Args:
+        groups (list): Dicts with source_shelf, name and category, and
+            optionally manufacturer, expiration_date and quantity, i.e. the
+            keyword arguments of move_group
+        target_shelf (Shelf): Shelf to move the units to
+        user (User): The user performing the move
+
+    Returns:
+        list: Units moved for each group, in order
+    """
+    with transaction.atomic():
+        return [move_group(target_shelf=target_shelf, user=user, **g) for g in groups]
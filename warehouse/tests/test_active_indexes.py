@@ -0,0 +1,74 @@
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from warehouse.models import Category, Rack, Room, Shelf
+from warehouse.stock import add_items_to_shelf
+
+ACTIVE_INDEXES = (
+    'assignment_active_shelf_idx',
+    'assignment_active_item_idx',
+    'assignment_active_added_idx',
+)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+class ActiveStockIndexTest(TestCase):
+    """The hot pages read active stock through the partial indexes"""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(self.user)
+        category = Category.objects.create(name='Higiena')
+        rack = Rack.objects.create(name='A', room=Room.objects.create(name='Magazyn'))
+        self.shelf = Shelf.objects.create(rack=rack, number=1)
+        add_items_to_shelf(self.shelf, self.user, 5, 'Mydło', category)
+
+    def active_stock_plans(self, url):
+        """EXPLAIN QUERY PLAN of every assignment query reading active stock"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        plans = []
+        for query in context.captured_queries:
+            sql = query['sql']
+            if 'warehouse_itemshelfassignment' not in sql or 'IS NULL' not in sql:
+                continue
+            with connection.cursor() as cursor:
+                # Captured SQL has its parameters already inlined
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plans.append(' '.join(row[3] for row in cursor.fetchall()))
+        self.assertTrue(plans, f'no active stock query on {url}')
+        return plans
+
+    def assertUsesActiveIndex(self, plans):
+        for plan in plans:
+            self.assertTrue(
+                any(name in plan for name in ACTIVE_INDEXES),
+                f'active stock query does not use a partial index: {plan}',
+            )
+
+    def test_item_list_uses_partial_index(self):
+        self.assertUsesActiveIndex(
+            self.active_stock_plans(reverse('warehouse:item_list'))
+        )
+
+    def test_shelf_detail_uses_partial_index(self):
+        url = reverse('warehouse:shelf_detail', kwargs={'pk': self.shelf.pk})
+        self.assertUsesActiveIndex(self.active_stock_plans(url))
+
+    def test_dashboard_uses_partial_index(self):
+        self.assertUsesActiveIndex(self.active_stock_plans(reverse('warehouse:index')))
+
+    def test_dashboard_counts_only_active_items(self):
+        assignment = self.shelf.assignments.first()
+        assignment.remove_date = assignment.add_date
+        assignment.save()
+
+        response = self.client.get(reverse('warehouse:index'))
+        self.assertEqual(response.context['rooms'][0].active_items, 4)
@@ -0,0 +1,118 @@
+from datetime import date
+from itertools import repeat
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from warehouse.bulk import bulk_insert
+from warehouse.models import Category, Item, ItemShelfAssignment, Rack, Room, Shelf
+from warehouse.views.location import batch_move_items_between_shelves
+
+
+class BulkInsertTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='volunteer', password='password')
+        self.category = Category.objects.create(name='Higiena')
+        rack = Rack.objects.create(name='A', room=Room.objects.create(name='Magazyn'))
+        self.shelf = Shelf.objects.create(number=1, rack=rack)
+        self.other_shelf = Shelf.objects.create(number=2, rack=rack)
+
+    def test_returns_ids_in_row_order(self):
+        # Existing rows must not confuse the id range
+        Item.objects.create(name='Stary', category=self.category)
+
+        ids = bulk_insert(
+            Item,
+            ['name', 'category'],
+            ((f'Item {n}', self.category.pk) for n in range(25)),
+            batch_size=10,
+        )
+
+        self.assertEqual(len(ids), 25)
+        names = dict(Item.objects.filter(pk__in=ids).values_list('pk', 'name'))
+        self.assertEqual([names[pk] for pk in ids], [f'Item {n}' for n in range(25)])
+        # Omitted fields get their defaults
+        self.assertFalse(Item.objects.filter(pk__in=ids, is_gifted=True).exists())
+
+    def test_other_backends_use_bulk_create(self):
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            ids = bulk_insert(
+                Item,
+                ['name', 'category'],
+                ((f'Item {n}', self.category.pk) for n in range(5)),
+            )
+
+        names = dict(Item.objects.filter(pk__in=ids).values_list('pk', 'name'))
+        self.assertEqual([names[pk] for pk in ids], [f'Item {n}' for n in range(5)])
+
+    def test_auto_now_add_is_filled(self):
+        before = timezone.now()
+        item_ids = bulk_insert(
+            Item, ['name', 'category'], repeat(('X', self.category.pk), 3)
+        )
+        bulk_insert(
+            ItemShelfAssignment,
+            ['item', 'shelf', 'added_by'],
+            ((pk, self.shelf.pk, self.user.pk) for pk in item_ids),
+        )
+        self.assertEqual(
+            ItemShelfAssignment.objects.filter(add_date__gte=before).count(), 3
+        )
+
+    def test_batch_move(self):
+        item_ids = bulk_insert(
+            Item, ['name', 'category'], repeat(('X', self.category.pk), 4)
+        )
+        bulk_insert(
+            ItemShelfAssignment,
+            ['item', 'shelf', 'added_by'],
+            ((pk, self.shelf.pk, self.user.pk) for pk in item_ids),
+        )
+
+        moved, new_ids, errors = batch_move_items_between_shelves(
+            item_ids[:3], self.shelf.pk, self.other_shelf.pk, self.user
+        )
+
+        self.assertEqual((moved, errors), (3, []))
+        active = ItemShelfAssignment.objects.filter(remove_date__isnull=True)
+        self.assertEqual(
+            sorted(active.filter(shelf=self.other_shelf).values_list('pk', flat=True)),
+            sorted(new_ids),
+        )
+        self.assertEqual(active.filter(shelf=self.shelf).count(), 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'COPY is PostgreSQL only')
+class PostgresCopyTest(TestCase):
+    """The COPY path, run when the tests use DB_ENGINE=...postgresql"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Higiena')
+
+    def test_copy_returns_ids_and_encodes_values(self):
+        names = ['Tab\there', 'Line\nbreak', 'Back\\slash', 'Zażółć']
+        ids = bulk_insert(
+            Item,
+            ['name', 'category', 'note', 'expiration_date', 'is_gifted'],
+            (
+                (name, self.category.pk, None, date(2026, 1, n + 1), n % 2 == 0)
+                for n, name in enumerate(names)
+            ),
+            batch_size=3,
+        )
+
+        items = Item.objects.in_bulk(ids)
+        self.assertEqual([items[pk].name for pk in ids], names)
+        self.assertIsNone(items[ids[0]].note)
+        self.assertEqual(items[ids[1]].expiration_date, date(2026, 1, 2))
+        self.assertEqual([items[pk].is_gifted for pk in ids], [True, False] * 2)
+
+    def test_sequence_moves_past_copied_ids(self):
+        ids = bulk_insert(
+            Item, ['name', 'category'], repeat(('X', self.category.pk), 3)
+        )
+        later = Item.objects.create(name='Y', category=self.category)
+        self.assertGreater(later.pk, max(ids))
@@ -0,0 +1,84 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from warehouse.models import (
+    BulkOperation,
+    Category,
+    ItemShelfAssignment,
+    Rack,
+    Room,
+    Shelf,
+)
+
+
+class BulkOperationIdempotencyTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='volunteer', password='password')
+        self.client.force_login(self.user)
+
+        self.category = Category.objects.create(name='Higiena')
+        room = Room.objects.create(name='Magazyn')
+        rack = Rack.objects.create(name='A', room=room)
+        self.shelf = Shelf.objects.create(number=1, rack=rack)
+
+    def add_batch(self, offset, key='op-1', quantity=10, **extra):
+        data = {
+            'shelf_id': self.shelf.pk,
+            'item_name': 'Pieluchy',
+            'category_id': self.category.pk,
+            'quantity': quantity,
+            'batch_size': 4,
+            'offset': offset,
+            'operation_key': key,
+        }
+        data.update(extra)
+        return self.client.post(reverse('warehouse:ajax_bulk_add_items'), data)
+
+    def active(self):
+        return ItemShelfAssignment.objects.filter(
+            shelf=self.shelf, remove_date__isnull=True
+        )
+
+    def test_retried_batch_is_not_applied_twice(self):
+        self.assertEqual(self.add_batch(0).json()['offset'], 4)
+
+        # The client lost the response and resends offset 0
+        replay = self.add_batch(0).json()
+        self.assertTrue(replay['replayed'])
+        self.assertEqual(replay['offset'], 4)
+        self.assertEqual(self.active().count(), 4)
+
+        self.add_batch(4)
+        done = self.add_batch(8).json()
+        self.assertTrue(done['complete'])
+        self.assertEqual(self.active().count(), 10)
+        self.assertEqual(
+            BulkOperation.objects.get(key='op-1').status, BulkOperation.STATUS_COMPLETE
+        )
+
+    def test_reused_key_with_other_parameters_conflicts(self):
+        self.add_batch(0)
+        self.assertEqual(self.add_batch(0, quantity=20).status_code, 409)
+        self.assertEqual(self.active().count(), 4)
+
+    def test_remove_stops_at_requested_quantity(self):
+        self.add_batch(0, key='')
+        assignment = self.active().first()
+        url = reverse('warehouse:ajax_bulk_remove_items')
+        data = {
+            'assignment_id': assignment.pk,
+            'quantity': 3,
+            'batch_size': 3,
+            'offset': 0,
+            'operation_key': 'rm-1',
+        }
+        self.client.post(url, data)
+        self.client.post(url, data)
+        self.assertEqual(self.active().count(), 1)
+
+        status = self.client.get(
+            reverse('warehouse:ajax_bulk_operation_status', kwargs={'key': 'rm-1'})
+        ).json()
+        self.assertTrue(status['complete'])
+        self.assertEqual(status['total_processed'], 3)
@@ -0,0 +1,134 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.test import TestCase
+from django.urls import reverse
+
+from warehouse import events
+from warehouse.models import Category, ItemShelfAssignment, Rack, Room, Shelf
+from warehouse.stock import add_items_to_shelf, move_group
+
+
+class EventBusTest(TestCase):
+    def test_wait_returns_newer_events(self):
+        bus = events.EventBus(size=2)
+        for quantity in (1, 2, 3):
+            bus.publish({'quantity': quantity})
+
+        self.assertEqual([e['quantity'] for e in bus.since(1)], [2, 3])
+        self.assertEqual(bus.wait(3, timeout=0.01), [])
+
+
+class StockEventsTest(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(events, 'bus', events.EventBus())
+        self.bus = patcher.start()
+        self.addCleanup(patcher.stop)
+        # Streams read by the tests are never closed, so their slots leak
+        patcher = mock.patch.object(events, '_open_streams', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(username='volunteer', password='x')
+        self.client.force_login(self.user)
+        self.category = Category.objects.create(name='Żywność')
+        self.room = Room.objects.create(name='Magazyn')
+        rack = Rack.objects.create(name='A', room=self.room)
+        self.shelf = Shelf.objects.create(number=1, rack=rack)
+        cellar = Room.objects.create(name='Piwnica')
+        other_rack = Rack.objects.create(name='A', room=cellar)
+        self.target = Shelf.objects.create(number=1, rack=other_rack)
+
+    def test_events_are_published_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            add_items_to_shelf(self.shelf, self.user, 3, 'Ryż', self.category)
+        self.assertEqual(self.bus.last_id, 0)
+
+        for callback in callbacks:
+            callback()
+        (event,) = self.bus.since(0)
+        self.assertEqual(
+            (event['type'], event['shelf'], event['quantity'], event['name']),
+            (events.EVENT_ADD, self.shelf.pk, 3, 'Ryż'),
+        )
+
+    def test_move_and_remove_publish_real_quantities(self):
+        add_items_to_shelf(self.shelf, self.user, 4, 'Ryż', self.category)
+        # The move takes the oldest unit, so the newest stays on the shelf
+        newest = ItemShelfAssignment.objects.filter(shelf=self.shelf).last()
+        url = reverse('warehouse:remove_item_from_shelf', kwargs={'pk': newest.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            move_group(
+                self.shelf, self.target, self.user, 'Ryż', self.category, quantity=1
+            )
+            self.client.post(url, {'quantity': 10})
+
+        move, remove = self.bus.since(0)
+        self.assertEqual(
+            (move['type'], move['shelf'], move['target'], move['quantity']),
+            (events.EVENT_MOVE, self.shelf.pk, self.target.pk, 1),
+        )
+        self.assertEqual((remove['type'], remove['quantity']), (events.EVENT_REMOVE, 3))
+
+    def read_stream(self, last_event_id, chunks):
+        response = self.client.get(
+            reverse('warehouse:event_stream'), HTTP_LAST_EVENT_ID=last_event_id
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        # The response is not closed: that would close the test database
+        # connection, as at the end of a real request
+        stream = iter(response.streaming_content)
+        return [next(stream).decode() for _ in range(chunks)]
+
+    def test_stream_sends_events_with_rooms(self):
+        self.bus.publish({'type': 'add', 'shelf': 0, 'target': None, 'quantity': 9})
+        self.bus.publish(
+            {
+                'type': 'move',
+                'shelf': self.shelf.pk,
+                'target': self.target.pk,
+                'quantity': 2,
+            }
+        )
+
+        retry, move = self.read_stream('1', 2)
+
+        self.assertTrue(retry.startswith('retry:'))
+        self.assertTrue(move.startswith('id: 2\nevent: stock\n'))
+        data = json.loads(move.split('data: ', 1)[1])
+        self.assertEqual(
+            (data['room'], data['target_room']),
+            (self.room.pk, self.target.rack.room_id),
+        )
+
+    def test_stream_asks_for_reload_after_missed_events(self):
+        self.bus = events.EventBus(size=1)
+        with mock.patch.object(events, 'bus', self.bus):
+            for _ in range(3):
+                self.bus.publish(
+                    {'type': 'add', 'shelf': self.shelf.pk, 'target': None}
+                )
+            _, reset = self.read_stream('1', 2)
+
+        self.assertTrue(reset.startswith('id: 3\nevent: reset\n'))
+
+    def test_busy_process_asks_pages_to_retry_later(self):
+        url = reverse('warehouse:event_stream')
+        with mock.patch.object(events, 'max_streams', return_value=1):
+            streaming = self.client.get(url)
+            busy = self.client.get(url)
+            self.assertEqual(busy.status_code, 503)
+            self.assertEqual(busy.content, b'retry: 30000\n\n')
+            self.assertEqual(busy['Retry-After'], '30')
+
+            # Closing the response, as the server does, frees the slot. Keep
+            # the test database connection open while doing so.
+            request_finished.disconnect(close_old_connections)
+            try:
+                streaming.close()
+            finally:
+                request_finished.connect(close_old_connections)
+            self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,195 @@
+import json
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from warehouse.models import Category, ItemShelfAssignment, Rack, Room, Shelf
+from warehouse.stock import add_items_to_shelf, move_group, move_groups
+
+
+class GroupMoveTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='volunteer', password='x')
+        self.client.force_login(self.user)
+        self.category = Category.objects.create(name='Żywność')
+        rack = Rack.objects.create(name='A', room=Room.objects.create(name='Magazyn'))
+        self.shelf = Shelf.objects.create(number=1, rack=rack)
+        self.other_shelf = Shelf.objects.create(number=2, rack=rack)
+        self.target = Shelf.objects.create(number=3, rack=rack)
+        add_items_to_shelf(self.shelf, self.user, 5, 'Ryż', self.category)
+        add_items_to_shelf(
+            self.shelf, self.user, 2, 'Ryż', self.category, 'Sonko', date(2026, 1, 1)
+        )
+
+    def active(self, shelf):
+        return ItemShelfAssignment.objects.filter(shelf=shelf, remove_date__isnull=True)
+
+    def test_partial_quantity_moves_oldest_units(self):
+        oldest = list(self.active(self.shelf).order_by('pk')[:3])
+
+        moved = move_group(
+            self.shelf, self.target, self.user, 'Ryż', self.category, quantity=3
+        )
+
+        self.assertEqual(moved, 3)
+        self.assertEqual(self.active(self.shelf).count(), 4)
+        self.assertEqual(
+            set(self.active(self.target).values_list('item_id', flat=True)),
+            {assignment.item_id for assignment in oldest},
+        )
+        closed = ItemShelfAssignment.objects.filter(pk__in=[a.pk for a in oldest])
+        self.assertFalse(closed.filter(remove_date__isnull=True).exists())
+        self.assertEqual(
+            set(closed.values_list('removed_by', flat=True)), {self.user.pk}
+        )
+
+    def test_query_count_does_not_grow_with_quantity(self):
+        add_items_to_shelf(self.shelf, self.user, 500, 'Ryż', self.category)
+        # UPDATE and INSERT ... SELECT, the history batch (lookup, create and
+        # count), plus two savepoints and their releases
+        with self.assertNumQueries(9):
+            moved = move_group(self.shelf, self.target, self.user, 'Ryż', self.category)
+        self.assertEqual(moved, 505)
+        # The group with a manufacturer and expiry stays behind
+        self.assertEqual(self.active(self.shelf).count(), 2)
+
+    def test_moves_without_a_parameter_limit(self):
+        # PostgreSQL has no limit on query parameters
+        with mock.patch.object(connection.features, 'max_query_params', None):
+            for quantity in range(1, 6):
+                with self.subTest(quantity=quantity):
+                    target = Shelf.objects.create(
+                        number=10 + quantity, rack=self.target.rack
+                    )
+                    before = self.active(self.shelf).count()
+
+                    moved = move_group(
+                        self.shelf,
+                        target,
+                        self.user,
+                        'Ryż',
+                        self.category,
+                        quantity=quantity,
+                    )
+
+                    self.assertEqual(moved, quantity)
+                    self.assertEqual(self.active(target).count(), quantity)
+                    self.assertEqual(self.active(self.shelf).count(), before - quantity)
+                    add_items_to_shelf(
+                        self.shelf, self.user, quantity, 'Ryż', self.category
+                    )
+
+    def test_repeated_moves_within_a_minute_copy_each_unit_once(self):
+        args = (self.user, 'Ryż', self.category)
+        move_group(self.shelf, self.target, *args, quantity=2)
+        # Back and forth again: the moves share their history batches
+        move_group(self.target, self.shelf, *args)
+        move_group(self.shelf, self.target, *args, quantity=3)
+
+        self.assertEqual(self.active(self.target).count(), 3)
+        self.assertEqual(self.active(self.shelf).count(), 4)
+        self.assertEqual(
+            ItemShelfAssignment.objects.filter(shelf=self.target).count(), 5
+        )
+
+    def test_several_groups_at_once(self):
+        add_items_to_shelf(self.other_shelf, self.user, 4, 'Mąka', self.category)
+
+        moved = move_groups(
+            [
+                {
+                    'source_shelf': self.shelf,
+                    'name': 'Ryż',
+                    'category': self.category,
+                    'manufacturer': 'Sonko',
+                    'expiration_date': date(2026, 1, 1),
+                },
+                {
+                    'source_shelf': self.other_shelf,
+                    'name': 'Mąka',
+                    'category': self.category,
+                    'quantity': 10,
+                },
+            ],
+            self.target,
+            self.user,
+        )
+
+        self.assertEqual(moved, [2, 4])
+        self.assertEqual(self.active(self.target).count(), 6)
+        self.assertEqual(self.active(self.shelf).count(), 5)
+
+    def test_view_moves_requested_quantity(self):
+        url = reverse('warehouse:move_group_items')
+        params = f'?shelf_id={self.shelf.pk}&item_name=Ryż&category={self.category.pk}'
+
+        response = self.client.post(
+            url + params, {'shelf': self.target.pk, 'quantity': 2}
+        )
+
+        self.assertRedirects(
+            response,
+            reverse('warehouse:shelf_detail', kwargs={'pk': self.target.pk}),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(self.active(self.target).count(), 2)
+
+    def test_view_rejects_quantity_above_group_size(self):
+        url = reverse('warehouse:move_group_items')
+        params = f'?shelf_id={self.shelf.pk}&item_name=Ryż&category={self.category.pk}'
+
+        response = self.client.post(
+            url + params, {'shelf': self.target.pk, 'quantity': 6}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(self.active(self.target).exists())
+
+    def test_api_moves_groups(self):
+        response = self.client.post(
+            reverse('warehouse:api_move_groups'),
+            json.dumps(
+                {
+                    'target_shelf': self.target.pk,
+                    'groups': [
+                        {
+                            'shelf': self.shelf.pk,
+                            'name': 'Ryż',
+                            'category': self.category.pk,
+                            'quantity': 1,
+                        },
+                        {
+                            'shelf': self.shelf.pk,
+                            'name': 'Ryż',
+                            'category': self.category.pk,
+                            'manufacturer': 'Sonko',
+                            'expiration_date': '2026-01-01',
+                        },
+                    ],
+                }
+            ),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['moved'], [1, 2])
+        self.assertEqual(self.active(self.target).count(), 3)
+
+    def test_api_rejects_same_shelf(self):
+        response = self.client.post(
+            reverse('warehouse:api_move_groups'),
+            json.dumps(
+                {
+                    'target_shelf': self.shelf.pk,
+                    'groups': [{'shelf': self.shelf.pk, 'name': 'Ryż', 'category': 1}],
+                }
+            ),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['group'], 0)
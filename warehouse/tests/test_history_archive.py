@@ -0,0 +1,95 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from warehouse.importer import read_rows
+from warehouse.models import (
+    Category,
+    Item,
+    ItemShelfAssignment,
+    ItemShelfAssignmentArchive,
+    Rack,
+    Room,
+    Shelf,
+)
+
+
+class HistoryArchiveTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='password'
+        )
+        self.client.force_login(self.user)
+
+        category = Category.objects.create(name='Higiena')
+        rack = Rack.objects.create(name='A', room=Room.objects.create(name='Magazyn'))
+        self.shelf = Shelf.objects.create(number=1, rack=rack)
+
+        now = timezone.now()
+        for n in range(5):
+            item = Item.objects.create(name='Pieluchy', category=category)
+            assignment = ItemShelfAssignment.objects.create(
+                item=item, shelf=self.shelf, added_by=self.user
+            )
+            if n < 3:
+                # Removed two years ago
+                assignment.remove_date = now - timedelta(days=730 - n)
+                assignment.removed_by = self.user
+                assignment.save()
+
+    def test_archive_moves_old_closed_assignments(self):
+        call_command('archive_history', days=365, chunk_size=2, verbosity=0)
+
+        self.assertEqual(ItemShelfAssignmentArchive.objects.count(), 3)
+        self.assertFalse(
+            ItemShelfAssignment.objects.filter(remove_date__isnull=False).exists()
+        )
+        self.assertEqual(ItemShelfAssignment.objects.count(), 2)
+
+    def test_history_and_export_include_archive(self):
+        call_command('archive_history', days=365, verbosity=0)
+
+        response = self.client.get(reverse('warehouse:history_list'), {'view': 'units'})
+        self.assertEqual(response.context['total_count'], 5)
+        page = list(response.context['assignments'])
+        self.assertEqual(len(page), 5)
+        # Newest operation first: additions today, then the archived removals
+        self.assertIsInstance(page[-1], ItemShelfAssignmentArchive)
+
+        response = self.client.get(
+            reverse('warehouse:history_list'),
+            {'view': 'units', 'action_type': 'remove'},
+        )
+        self.assertEqual(response.context['total_count'], 3)
+
+        response = self.client.post(
+            reverse('warehouse:export_inventory'),
+            {'include_removed': 'on', 'include_expired': 'on'},
+        )
+        rows = [row for _, row in read_rows(response.content, 'export.xlsx')]
+        counts = sorted((bool(row.get('remove_date')), row['quantity']) for row in rows)
+        self.assertEqual(counts, [(False, 2.0), (True, 3.0)])
+
+    def test_export_merges_partly_archived_groups(self):
+        # Two of the three removals are archived, the newest stays live
+        call_command('archive_history', days=729, verbosity=0)
+        self.assertEqual(ItemShelfAssignmentArchive.objects.count(), 2)
+
+        response = self.client.post(
+            reverse('warehouse:export_inventory'),
+            {'include_removed': 'on', 'include_expired': 'on'},
+        )
+        rows = [row for _, row in read_rows(response.content, 'export.xlsx')]
+        counts = sorted((bool(row.get('remove_date')), row['quantity']) for row in rows)
+        self.assertEqual(counts, [(False, 2.0), (True, 3.0)])
+        (removed,) = [row for row in rows if row.get('remove_date')]
+        newest = ItemShelfAssignment.objects.get(remove_date__isnull=False)
+        # The export keeps the latest removal date, as an Excel serial day
+        self.assertEqual(
+            date(1899, 12, 30) + timedelta(days=int(removed['remove_date'])),
+            timezone.localtime(newest.remove_date).date(),
+        )
@@ -0,0 +1,78 @@
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from warehouse.models import Category, Rack, Room, Shelf
+from warehouse.stock import add_items_to_shelf, close_units, group_assignments
+
+
+class HistoryUserFilterTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.volunteer = User.objects.create_user('ania', 'ania@example.com', 'x')
+        # Contains the volunteer's username, but is another user
+        self.other = User.objects.create_user('anianowak', 'an@example.com', 'x')
+        self.client.force_login(self.admin)
+        self.category = Category.objects.create(name='Higiena')
+        rack = Rack.objects.create(name='A', room=Room.objects.create(name='Magazyn'))
+        self.shelf = Shelf.objects.create(rack=rack, number=1)
+        add_items_to_shelf(self.shelf, self.volunteer, 3, 'Mydło', self.category)
+        add_items_to_shelf(self.shelf, self.other, 4, 'Mydło', self.category)
+        close_units(
+            group_assignments(self.shelf, 'Mydło', self.category), self.volunteer, 2
+        )
+
+    def history(self, **params):
+        response = self.client.get(reverse('warehouse:history_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_autocomplete_returns_user_ids(self):
+        response = self.client.get(
+            reverse('warehouse:autocomplete_users'), {'term': 'ania'}
+        )
+        self.assertEqual(
+            {result['id'] for result in response.json()['results']},
+            {self.volunteer.pk, self.other.pk},
+        )
+
+    def test_filters_on_exact_user(self):
+        response = self.history(view='units', user=self.volunteer.pk)
+        # Three additions, two of which were later removed (one row each)
+        self.assertEqual(response.context['total_count'], 3)
+        self.assertEqual(response.context['selected_user'], self.volunteer)
+
+        response = self.history(
+            view='units', user=self.volunteer.pk, action_type='remove'
+        )
+        self.assertEqual(response.context['total_count'], 2)
+
+        response = self.history(user=self.other.pk)
+        self.assertEqual(
+            [operation.quantity for operation in response.context['assignments']],
+            [4],
+        )
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+    def test_user_filters_use_user_indexes(self):
+        for action_type, index in (
+            ('add', 'assignment_added_by_idx'),
+            ('remove', 'assignment_removed_by_idx'),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                self.history(
+                    view='units', user=self.volunteer.pk, action_type=action_type
+                )
+            sql = next(
+                query['sql']
+                for query in context.captured_queries
+                if query['sql'].startswith('SELECT COUNT')
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = ' '.join(row[3] for row in cursor.fetchall())
+            self.assertIn(index, plan, plan)
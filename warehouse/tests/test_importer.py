@@ -0,0 +1,172 @@
+import hashlib
+import io
+from datetime import date, timedelta
+from unittest import mock
+
+import xlsxwriter
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from warehouse.importer import (
+    InventoryImportError,
+    import_inventory,
+    read_rows,
+    start_import_job,
+    validate_rows,
+    write_lines,
+)
+from warehouse.models import (
+    BulkOperation,
+    Category,
+    Item,
+    ItemShelfAssignment,
+    Rack,
+    Room,
+    Shelf,
+)
+
+HEADER = (
+    'Nazwa przedmiotu;Kategoria;Producent;Notatka;Data Waznosci;Lokalizacja;'
+    'Liczba;Data Usuniecia\n'
+)
+
+
+class InventoryImportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='admin', password='password')
+        Category.objects.create(name='Higiena')
+        room = Room.objects.create(name='Magazyn')
+        rack = Rack.objects.create(name='A', room=room)
+        self.shelf = Shelf.objects.create(number=1, rack=rack)
+
+    def test_csv_import(self):
+        data = (
+            HEADER
+            + 'Pieluchy;Higiena;Pampers;;2030-01-31;Magazyn.A.1;3;\n'
+            + 'Mydło;Higiena;;;;Magazyn.A.1;;\n'
+            + 'Szampon;Higiena;;;;Magazyn.A.1;5;2025-01-01\n'
+        ).encode()
+
+        result = import_inventory(data, 'stan.csv', self.user)
+
+        self.assertEqual(result['imported'], 4)
+        self.assertEqual(result['skipped'], 1)
+        active = ItemShelfAssignment.objects.filter(shelf=self.shelf)
+        self.assertEqual(active.filter(added_by=self.user).count(), 4)
+        self.assertEqual(
+            Item.objects.filter(expiration_date=date(2030, 1, 31)).count(), 3
+        )
+
+    def test_dry_run_and_errors_write_nothing(self):
+        data = (
+            HEADER
+            + 'Pieluchy;Higiena;;;;Magazyn.A.1;3;\n'
+            + 'Mydło;Nieznana;;;;Magazyn.A.1;1;\n'
+            + 'Krem;Higiena;;;;Magazyn.B.1;1;\n'
+        ).encode()
+
+        result = import_inventory(data, 'stan.csv', self.user)
+        self.assertEqual([e['line'] for e in result['errors']], [3, 4])
+        self.assertEqual(result['imported'], 0)
+
+        result = import_inventory(
+            data, 'stan.csv', self.user, dry_run=True, create_categories=True
+        )
+        self.assertEqual(result['new_categories'], ['Nieznana'])
+        self.assertEqual(result['error_count'], 1)
+        self.assertFalse(Item.objects.exists())
+
+    def test_xlsx_import_with_chunks(self):
+        output = io.BytesIO()
+        workbook = xlsxwriter.Workbook(output)
+        worksheet = workbook.add_worksheet('Inwentarz')
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+        worksheet.write_row(0, 0, HEADER.strip().split(';'))
+        worksheet.write_row(1, 0, ['Pieluchy', 'Higiena', 'Pampers', 'Duże'])
+        worksheet.write_datetime(1, 4, date(2030, 1, 31), date_format)
+        worksheet.write_row(1, 5, ['Magazyn.A.1', 7])
+        worksheet.write_row(2, 0, ['Mydło', 'Higiena', '', '', '', 'Magazyn.A.1', 4])
+        workbook.close()
+
+        lines, errors, skipped, _ = validate_rows(
+            read_rows(output.getvalue(), 'stan.xlsx')
+        )
+        self.assertEqual(errors, [])
+        self.assertEqual(lines[0]['expiration_date'], date(2030, 1, 31))
+        self.assertEqual(lines[0]['note'], 'Duże')
+
+        self.assertEqual(write_lines(lines, self.user, chunk_size=3), 11)
+        self.assertEqual(Item.objects.filter(name='Pieluchy').count(), 7)
+        self.assertEqual(ItemShelfAssignment.objects.count(), 11)
+
+    def test_interrupted_import_resumes_without_duplicates(self):
+        data = (HEADER + 'Pieluchy;Higiena;;;;Magazyn.A.1;7;\n').encode()
+        operation = BulkOperation.objects.create(
+            key='import-1',
+            kind=BulkOperation.KIND_IMPORT,
+            user=self.user,
+            params={'sha256': hashlib.sha256(data).hexdigest(), 'dry_run': False},
+            total=7,
+        )
+        lines, _, _, _ = validate_rows(read_rows(data, 'stan.csv'))
+        # The second chunk fails: the first one stays written
+        with (
+            mock.patch(
+                'warehouse.importer.publish_stock_event',
+                side_effect=[None, RuntimeError('worker restart')],
+            ),
+            self.assertRaises(RuntimeError),
+        ):
+            write_lines(lines, self.user, operation=operation, chunk_size=3)
+        operation.refresh_from_db()
+        self.assertEqual((operation.processed, operation.total), (3, 7))
+        operation.status = BulkOperation.STATUS_FAILED
+        operation.save()
+
+        with mock.patch('warehouse.importer.threading.Thread') as thread:
+            resumed = start_import_job(data, 'stan.csv', self.user)
+        self.assertEqual(resumed.pk, operation.pk)
+        thread.return_value.start.assert_called_once()
+
+        result = import_inventory(data, 'stan.csv', self.user, operation=resumed)
+        self.assertEqual((result['resumed_from'], result['imported']), (3, 7))
+        self.assertEqual(ItemShelfAssignment.objects.count(), 7)
+
+    def test_running_or_other_imports_are_not_resumed(self):
+        data = (HEADER + 'Pieluchy;Higiena;;;;Magazyn.A.1;7;\n').encode()
+        running = BulkOperation.objects.create(
+            key='import-1',
+            kind=BulkOperation.KIND_IMPORT,
+            user=self.user,
+            params={'sha256': hashlib.sha256(data).hexdigest(), 'dry_run': False},
+            total=7,
+            processed=3,
+        )
+
+        with mock.patch('warehouse.importer.threading.Thread'):
+            self.assertNotEqual(
+                start_import_job(data, 'stan.csv', self.user).pk, running.pk
+            )
+            # Without progress for a while, its thread is gone
+            BulkOperation.objects.filter(pk=running.pk).update(
+                updated_at=timezone.now() - timedelta(hours=1)
+            )
+            self.assertEqual(
+                start_import_job(data, 'stan.csv', self.user).pk, running.pk
+            )
+            other = data.replace(b'7', b'8')
+            self.assertNotEqual(
+                start_import_job(other, 'stan.csv', self.user).pk, running.pk
+            )
+
+    def test_missing_columns(self):
+        with self.assertRaises(InventoryImportError):
+            import_inventory(b'Nazwa;Liczba\nPieluchy;1\n', 'stan.csv', self.user)
+
+    def test_import_page(self):
+        admin = User.objects.create_superuser(username='root', password='password')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('warehouse:import_inventory'))
+        self.assertContains(response, 'enctype="multipart/form-data"')
@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from warehouse.models import Category, Rack, Room, Shelf
+from warehouse.stock import add_items_to_shelf
+
+
+class LocationTreeTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(self.user)
+        self.room = Room.objects.create(name='Magazyn')
+        self.rack_b = Rack.objects.create(name='B', room=self.room)
+        self.rack_a = Rack.objects.create(name='A', room=self.room)
+        self.shelf_2 = Shelf.objects.create(rack=self.rack_a, number=2)
+        self.shelf_1 = Shelf.objects.create(rack=self.rack_a, number=1)
+        Shelf.objects.create(rack=self.rack_b, number=1)
+        category = Category.objects.create(name='Żywność')
+        add_items_to_shelf(self.shelf_1, self.user, 3, 'Ryż', category)
+        add_items_to_shelf(self.shelf_2, self.user, 1, 'Mąka', category)
+
+    def test_room_list_renders_only_rooms(self):
+        with self.assertNumQueries(3):  # session, user, rooms with counts
+            response = self.client.get(reverse('warehouse:room_list'))
+        room = response.context['rooms'][0]
+        self.assertEqual((room.rack_count, room.shelf_count), (2, 3))
+        self.assertContains(
+            response,
+            reverse('warehouse:location_tree_racks', kwargs={'pk': self.room.pk}),
+        )
+        self.assertNotContains(response, self.shelf_1.full_location)
+
+    def test_racks_are_ordered_with_counts(self):
+        url = reverse('warehouse:location_tree_racks', kwargs={'pk': self.room.pk})
+        with self.assertNumQueries(4):  # session, user, room, racks
+            racks = self.client.get(url).json()['results']
+
+        self.assertEqual(
+            [(r['name'], r['shelf_count'], r['item_count']) for r in racks],
+            [('A', 2, 4), ('B', 1, 0)],
+        )
+        self.assertEqual(
+            racks[0]['urls']['shelves'],
+            reverse('warehouse:location_tree_shelves', kwargs={'pk': self.rack_a.pk}),
+        )
+
+    def test_shelves_come_from_one_grouped_query(self):
+        url = reverse('warehouse:location_tree_shelves', kwargs={'pk': self.rack_a.pk})
+        with self.assertNumQueries(4):  # session, user, rack, shelves
+            shelves = self.client.get(url).json()['results']
+
+        self.assertEqual(
+            [(s['number'], s['full_location'], s['item_count']) for s in shelves],
+            [(1, 'Magazyn.A.1', 3), (2, 'Magazyn.A.2', 1)],
+        )
+
+    def test_tree_is_admin_only(self):
+        user = User.objects.create_user('staff', password='x')
+        self.client.force_login(user)
+        url = reverse('warehouse:location_tree_racks', kwargs={'pk': self.room.pk})
+        self.assertEqual(self.client.get(url).status_code, 302)
@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from warehouse.low_stock import evaluate_low_stock, low_stock_report
+from warehouse.models import Category, ProductThreshold, Rack, Room, Shelf
+from warehouse.stock import add_items_to_shelf
+
+
+class LowStockTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        rack = Rack.objects.create(name='A', room=Room.objects.create(name='Magazyn'))
+        self.shelf_1 = Shelf.objects.create(rack=rack, number=1)
+        self.shelf_2 = Shelf.objects.create(rack=rack, number=2)
+        self.hygiene = Category.objects.create(name='Higiena', min_stock=5)
+        self.food = Category.objects.create(name='Żywność', min_stock=2)
+        add_items_to_shelf(self.shelf_2, self.user, 2, 'Mydło', self.hygiene)
+        add_items_to_shelf(self.shelf_1, self.user, 1, 'Szampon', self.hygiene)
+        add_items_to_shelf(self.shelf_1, self.user, 3, 'Ryż', self.food)
+
+    def test_categories_use_their_own_threshold(self):
+        categories = evaluate_low_stock()['categories']
+
+        self.assertEqual([c['name'] for c in categories], ['Higiena'])
+        self.assertEqual(categories[0]['active_items'], 3)
+        self.assertEqual(
+            [location['full_location'] for location in categories[0]['locations']],
+            ['Magazyn.A.1', 'Magazyn.A.2'],
+        )
+
+    def test_product_thresholds(self):
+        ProductThreshold.objects.create(name='Ryż', min_stock=10)
+        ProductThreshold.objects.create(name='Mąka', min_stock=1)
+        ProductThreshold.objects.create(name='Mydło', min_stock=2)
+
+        products = evaluate_low_stock()['products']
+
+        self.assertEqual(
+            [(p['name'], p['active_items']) for p in products],
+            [('Mąka', 0), ('Ryż', 3)],
+        )
+        self.assertEqual(products[0]['locations'], [])
+
+    def test_evaluation_query_count_does_not_grow_with_shelves(self):
+        ProductThreshold.objects.create(name='Ryż', min_stock=10)
+        # Categories, thresholds, product stock and shelf locations
+        with self.assertNumQueries(4):
+            evaluate_low_stock()
+
+    def test_report_is_cached_until_thresholds_change(self):
+        low_stock_report()
+        with self.assertNumQueries(0):
+            low_stock_report()
+
+        self.food.min_stock = 4
+        self.food.save()
+        names = [c['name'] for c in low_stock_report()['categories']]
+        self.assertEqual(names, ['Higiena', 'Żywność'])
+
+    def test_report_is_refreshed_after_a_threshold_is_deleted(self):
+        threshold = ProductThreshold.objects.create(name='Ryż', min_stock=10)
+        self.assertEqual(len(low_stock_report()['products']), 1)
+
+        threshold.delete()
+        self.assertEqual(low_stock_report()['products'], [])
+
+        empty = Category.objects.create(name='Chemia', min_stock=1)
+        self.assertIn('Chemia', [c['name'] for c in low_stock_report()['categories']])
+        empty.delete()
+        self.assertNotIn(
+            'Chemia', [c['name'] for c in low_stock_report()['categories']]
+        )
+
+    def test_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('warehouse:low_stock'))
+        self.assertContains(response, 'Higiena')
+        self.assertNotContains(response, 'Żywność')
@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import TestCase
+from django.urls import reverse
+
+
+class DatabaseMetricsTest(TestCase):
+    def setUp(self):
+        self.url = reverse('warehouse:metrics')
+
+    def test_only_admins_see_metrics(self):
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+        volunteer = User.objects.create_user(username='volunteer', password='x')
+        self.client.force_login(volunteer)
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_metrics_without_pool(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(admin)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        default = response.json()['databases'][0]
+        self.assertEqual(default['alias'], 'default')
+        self.assertEqual(default['vendor'], connections['default'].vendor)
+        self.assertIn('conn_max_age', default)
+        self.assertIsNone(default['pool'])
+
+    def test_metrics_with_pool(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(admin)
+        # DB_POOL=True on PostgreSQL: the psycopg 3 backend exposes its pool
+        pool = mock.Mock(min_size=2, max_size=10)
+        pool.get_stats.return_value = {'pool_size': 4, 'requests_waiting': 0}
+
+        with mock.patch.object(connections['default'], 'pool', pool, create=True):
+            response = self.client.get(self.url)
+
+        self.assertEqual(
+            response.json()['databases'][0]['pool'],
+            {'min_size': 2, 'max_size': 10, 'pool_size': 4, 'requests_waiting': 0},
+        )
@@ -0,0 +1,191 @@
+import importlib
+from datetime import timedelta
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from warehouse.models import (
+    Category,
+    Item,
+    ItemShelfAssignment,
+    ItemShelfAssignmentArchive,
+    OperationBatch,
+    Rack,
+    Room,
+    Shelf,
+)
+from warehouse.stock import add_items_to_shelf, move_group
+from warehouse.views.location import batch_move_items_between_shelves
+
+
+class OperationBatchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='admin', password='x')
+        self.client.force_login(self.user)
+        self.category = Category.objects.create(name='Żywność')
+        rack = Rack.objects.create(name='A', room=Room.objects.create(name='Magazyn'))
+        self.shelf = Shelf.objects.create(number=1, rack=rack)
+        self.target = Shelf.objects.create(number=2, rack=rack)
+
+    def test_repeated_adds_within_a_minute_are_one_operation(self):
+        now = timezone.now().replace(second=5)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            for _ in range(10):
+                add_items_to_shelf(self.shelf, self.user, 5, 'Ryż', self.category)
+            add_items_to_shelf(self.shelf, self.user, 2, 'Mąka', self.category)
+        with mock.patch(
+            'django.utils.timezone.now', return_value=now + timedelta(minutes=1)
+        ):
+            add_items_to_shelf(self.shelf, self.user, 1, 'Ryż', self.category)
+
+        first, later = OperationBatch.objects.filter(name='Ryż').order_by('minute')
+        self.assertEqual((first.kind, first.quantity), (OperationBatch.KIND_ADD, 50))
+        self.assertEqual(later.quantity, 1)
+        self.assertEqual(
+            ItemShelfAssignment.objects.filter(added_batch=first).count(), 50
+        )
+        self.assertEqual(OperationBatch.objects.count(), 3)
+
+    def test_moves_link_closed_and_opened_units(self):
+        add_items_to_shelf(self.shelf, self.user, 4, 'Ryż', self.category)
+        move_group(self.shelf, self.target, self.user, 'Ryż', self.category, quantity=3)
+        item_ids = list(
+            ItemShelfAssignment.objects.filter(
+                shelf=self.shelf, remove_date__isnull=True
+            ).values_list('item_id', flat=True)
+        )
+        batch_move_items_between_shelves(
+            item_ids, self.shelf.pk, self.target.pk, self.user
+        )
+
+        group, mixed = OperationBatch.objects.filter(
+            kind=OperationBatch.KIND_MOVE
+        ).order_by('pk')
+        self.assertEqual((group.name, group.quantity), ('Ryż', 3))
+        self.assertEqual((mixed.name, mixed.quantity), (None, 1))
+        for batch, count in ((group, 3), (mixed, 1)):
+            self.assertEqual(
+                ItemShelfAssignment.objects.filter(removed_batch=batch).count(), count
+            )
+            self.assertEqual(
+                ItemShelfAssignment.objects.filter(
+                    added_batch=batch, shelf=self.target
+                ).count(),
+                count,
+            )
+
+    def test_removal_view_records_real_quantity(self):
+        add_items_to_shelf(self.shelf, self.user, 3, 'Ryż', self.category)
+        assignment = ItemShelfAssignment.objects.filter(shelf=self.shelf).first()
+
+        self.client.post(
+            reverse('warehouse:remove_item_from_shelf', kwargs={'pk': assignment.pk}),
+            {'quantity': 10},
+        )
+
+        batch = OperationBatch.objects.get(kind=OperationBatch.KIND_REMOVE)
+        self.assertEqual((batch.name, batch.quantity), ('Ryż', 3))
+
+    def test_history_lists_operations_and_expands_units(self):
+        add_items_to_shelf(self.shelf, self.user, 30, 'Ryż', self.category)
+        move_group(self.shelf, self.target, self.user, 'Ryż', self.category, quantity=5)
+        url = reverse('warehouse:history_list')
+
+        response = self.client.get(url)
+        self.assertEqual(response.context['view'], 'operations')
+        self.assertEqual(
+            [(o.kind, o.quantity) for o in response.context['assignments']],
+            [(OperationBatch.KIND_MOVE, 5), (OperationBatch.KIND_ADD, 30)],
+        )
+
+        response = self.client.get(url, {'action_type': 'remove'})
+        self.assertEqual(response.context['total_count'], 1)
+
+        move = OperationBatch.objects.get(kind=OperationBatch.KIND_MOVE)
+        response = self.client.get(url, {'view': 'units', 'batch': move.pk})
+        # Each moved unit was closed on the source and opened on the target
+        self.assertEqual(response.context['total_count'], 10)
+        self.assertEqual(response.context['batch'], move)
+
+
+class BackfillOperationBatchesTest(TestCase):
+    """Assignments from before operation batches are grouped by the migration"""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='admin', password='x')
+        self.client.force_login(self.user)
+        category = Category.objects.create(name='Żywność')
+        rack = Rack.objects.create(name='A', room=Room.objects.create(name='Magazyn'))
+        self.shelf = Shelf.objects.create(number=1, rack=rack)
+        self.target = Shelf.objects.create(number=2, rack=rack)
+
+        now = timezone.now().replace(second=10)
+        old = now - timedelta(days=400)
+        for n in range(4):
+            item = Item.objects.create(name='Ryż', category=category)
+            assignment = ItemShelfAssignment.objects.create(
+                item=item, shelf=self.shelf, added_by=self.user
+            )
+            ItemShelfAssignment.objects.filter(pk=assignment.pk).update(add_date=old)
+            if n == 0:
+                # Moved the old way: closed and re-opened with one timestamp
+                ItemShelfAssignment.objects.filter(pk=assignment.pk).update(
+                    remove_date=now, removed_by=self.user
+                )
+                ItemShelfAssignment.objects.filter(
+                    pk=ItemShelfAssignment.objects.create(
+                        item=item, shelf=self.target, added_by=self.user
+                    ).pk
+                ).update(add_date=now)
+            elif n == 1:
+                ItemShelfAssignment.objects.filter(pk=assignment.pk).update(
+                    remove_date=old + timedelta(days=1), removed_by=self.user
+                )
+        call_command('archive_history', days=365, verbosity=0)
+
+    def backfill(self, chunk_size):
+        migration = importlib.import_module(
+            'warehouse.migrations.0016_backfill_operation_batches'
+        )
+        with mock.patch.object(migration, 'CHUNK_SIZE', chunk_size):
+            migration.backfill_batches(apps, None)
+
+    def test_batches_span_chunks(self):
+        self.backfill(chunk_size=1)
+        self.assertEqual(
+            sorted(OperationBatch.objects.values_list('kind', 'quantity')),
+            [
+                (OperationBatch.KIND_ADD, 4),
+                (OperationBatch.KIND_MOVE, 1),
+                (OperationBatch.KIND_REMOVE, 1),
+            ],
+        )
+
+    def test_existing_history_is_grouped_and_listed(self):
+        self.backfill(chunk_size=500)
+
+        self.assertEqual(
+            sorted(
+                OperationBatch.objects.values_list('kind', 'quantity', 'target_shelf')
+            ),
+            [
+                (OperationBatch.KIND_ADD, 4, None),
+                (OperationBatch.KIND_MOVE, 1, self.target.pk),
+                (OperationBatch.KIND_REMOVE, 1, None),
+            ],
+        )
+        removal = OperationBatch.objects.get(kind=OperationBatch.KIND_REMOVE)
+        self.assertTrue(
+            ItemShelfAssignmentArchive.objects.filter(removed_batch=removal).exists()
+        )
+        self.assertFalse(
+            ItemShelfAssignment.objects.filter(added_batch__isnull=True).exists()
+        )
+
+        response = self.client.get(reverse('warehouse:history_list'))
+        self.assertEqual(response.context['total_count'], 3)
@@ -0,0 +1,126 @@
+import json
+import tempfile
+import uuid
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from warehouse.models import BulkOperation, Rack, Room, Shelf
+from warehouse.provisioning import provision_locations, render_shelf_labels
+from warehouse.qr import label_path
+
+
+class ProvisioningTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(self.user)
+        self.room = Room.objects.create(name='Magazyn')
+
+    def test_grid_is_created_with_bulk_inserts(self):
+        # Existing racks, insert racks, rack ids, existing shelves,
+        # insert shelves, new shelf ids, plus the savepoint
+        with self.assertNumQueries(8):
+            result = provision_locations(self.room, 'ABC', range(1, 5))
+
+        self.assertEqual((result['racks_created'], result['shelves_created']), (3, 12))
+        shelves = Shelf.objects.order_by('sort_key')
+        self.assertEqual(
+            list(shelves.values_list('id', flat=True)), result['shelf_ids']
+        )
+        self.assertEqual(shelves[0].location_path, 'Magazyn.A.1')
+        self.assertEqual(shelves.last().location_path, 'Magazyn.C.4')
+        uuids = set(shelves.values_list('qr_code_uuid', flat=True))
+        self.assertEqual(len(uuids - {None}), 12)
+
+    def test_existing_locations_are_skipped(self):
+        rack = Rack.objects.create(name='A', room=self.room)
+        Shelf.objects.create(rack=rack, number=2)
+
+        result = provision_locations(self.room, 'AB', range(1, 3))
+
+        self.assertEqual(result['racks_created'], 1)
+        self.assertEqual((result['shelves_created'], result['shelves_skipped']), (3, 1))
+        self.assertEqual(Shelf.objects.filter(rack__room=self.room).count(), 4)
+
+    def test_form_creates_new_room(self):
+        response = self.client.post(
+            reverse('warehouse:provision_locations'),
+            {
+                'new_room': 'piwnica',
+                'rack_from': 'a',
+                'rack_to': 'b',
+                'shelf_from': 1,
+                'shelf_to': 3,
+            },
+        )
+        room = Room.objects.get(name='Piwnica')
+        self.assertRedirects(
+            response,
+            f'{reverse("warehouse:room_list")}?new_room={room.pk}',
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(Shelf.objects.filter(rack__room=room).count(), 6)
+
+    def test_api_validates_ranges(self):
+        response = self.client.post(
+            reverse('warehouse:api_provision_locations'),
+            json.dumps(
+                {
+                    'room': self.room.pk,
+                    'rack_from': 'D',
+                    'rack_to': 'A',
+                    'shelf_from': 1,
+                    'shelf_to': 2,
+                }
+            ),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('rack_to', response.json()['errors'])
+        self.assertFalse(Rack.objects.exists())
+
+    def test_api_queues_label_job(self):
+        with mock.patch('warehouse.provisioning.threading.Thread') as thread:
+            response = self.client.post(
+                reverse('warehouse:api_provision_locations'),
+                json.dumps(
+                    {
+                        'room': self.room.pk,
+                        'rack_from': 'A',
+                        'rack_to': 'A',
+                        'shelf_from': 1,
+                        'shelf_to': 2,
+                        'generate_labels': True,
+                    }
+                ),
+                content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 201)
+        thread.return_value.start.assert_called_once()
+        job = response.json()['label_job']
+        operation = BulkOperation.objects.get(key=job['key'])
+        self.assertEqual(operation.kind, BulkOperation.KIND_LABELS)
+        self.assertEqual(operation.total, 2)
+
+        status = self.client.get(job['status_url']).json()
+        self.assertEqual(status['status'], BulkOperation.STATUS_RUNNING)
+
+    def test_label_job_renders_labels(self):
+        result = provision_locations(self.room, 'A', range(1, 3))
+        operation = BulkOperation.objects.create(
+            key=uuid.uuid4().hex,
+            kind=BulkOperation.KIND_LABELS,
+            params={'shelf_ids': result['shelf_ids']},
+            total=2,
+        )
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                render_shelf_labels(operation, 'http://192.168.1.10:8000')
+                for shelf in Shelf.objects.all():
+                    self.assertTrue(label_path(shelf.qr_code_uuid, 'svg').exists())
+
+        operation.refresh_from_db()
+        self.assertEqual(operation.status, BulkOperation.STATUS_COMPLETE)
+        self.assertEqual(operation.processed, 2)
@@ -0,0 +1,135 @@
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from warehouse.models import Rack, Room, Shelf
+from warehouse.qr import label_path, make_qr
+
+
+class QrCodeResolutionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='password'
+        )
+        self.client.force_login(self.user)
+
+        self.room = Room.objects.create(name='Magazyn')
+        self.rack = Rack.objects.create(name='A', room=self.room)
+        self.shelf = Shelf.objects.create(number=1, rack=self.rack)
+
+        media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(media_dir.cleanup)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_dir.name, NETWORK_HOST='192.168.1.10'
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_short_url_redirects_to_shelf_detail(self):
+        response = self.client.get(
+            reverse('resolve_qr_code', kwargs={'qr_uuid': self.shelf.qr_code_uuid})
+        )
+        self.assertRedirects(
+            response, reverse('warehouse:shelf_detail', kwargs={'pk': self.shelf.pk})
+        )
+
+    def test_short_url_redirects_rack_and_room_to_item_list(self):
+        response = self.client.get(
+            reverse('resolve_qr_code', kwargs={'qr_uuid': self.rack.qr_code_uuid})
+        )
+        self.assertEqual(
+            response['Location'],
+            f'{reverse("warehouse:item_list")}?rack={self.rack.pk}',
+        )
+
+        response = self.client.get(
+            reverse('resolve_qr_code', kwargs={'qr_uuid': self.room.qr_code_uuid})
+        )
+        self.assertEqual(
+            response['Location'],
+            f'{reverse("warehouse:item_list")}?room={self.room.pk}',
+        )
+
+    def test_json_lookup(self):
+        response = self.client.get(
+            reverse('resolve_qr_code_json', kwargs={'qr_uuid': self.shelf.qr_code_uuid})
+        )
+        data = response.json()
+        self.assertEqual(data['type'], 'shelf')
+        self.assertEqual(data['id'], self.shelf.pk)
+        self.assertEqual(data['location'], 'Magazyn.A.1')
+
+    def test_unknown_uuid(self):
+        url = reverse(
+            'resolve_qr_code_json',
+            kwargs={'qr_uuid': '00000000-0000-0000-0000-000000000000'},
+        )
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_label_is_cached_and_dropped_on_rename(self):
+        response = self.client.get(
+            reverse('warehouse:qr_label', kwargs={'qr_uuid': self.shelf.qr_code_uuid})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        svg = b''.join(response.streaming_content)
+        self.assertIn(b'Magazyn.A.1', svg)
+        self.assertTrue(label_path(self.shelf.qr_code_uuid, 'svg').exists())
+
+        self.room.name = 'Piwnica'
+        self.room.save()
+        self.assertFalse(label_path(self.shelf.qr_code_uuid, 'svg').exists())
+
+    def test_label_is_revalidated_and_changes_etag_on_rename(self):
+        url = reverse('warehouse:qr_label', kwargs={'qr_uuid': self.shelf.qr_code_uuid})
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.rack.name = 'B'
+        self.rack.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_label_is_sent_by_nginx_after_login_check(self):
+        url = reverse('warehouse:qr_label', kwargs={'qr_uuid': self.shelf.qr_code_uuid})
+        with override_settings(QR_LABEL_X_ACCEL_REDIRECT=True):
+            response = self.client.get(url)
+            self.assertEqual(
+                response['X-Accel-Redirect'],
+                f'/media/qrcodes/{self.shelf.qr_code_uuid}.svg',
+            )
+
+            self.client.logout()
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(response.has_header('X-Accel-Redirect'))
+
+    def test_shelf_detail_renders_qr_locally(self):
+        response = self.client.get(
+            reverse('warehouse:shelf_detail', kwargs={'pk': self.shelf.pk})
+        )
+        self.assertNotContains(response, 'api.qrserver.com')
+        qr_url = reverse('warehouse:shelf_qr', args=[self.shelf.pk, 'svg'])
+        self.assertContains(response, f'{qr_url}?v={response.context["qr_version"]}')
+
+    def test_shelf_qr_image_is_memoized(self):
+        cache.clear()
+        for fmt, content_type in (('svg', 'image/svg+xml'), ('png', 'image/png')):
+            url = reverse('warehouse:shelf_qr', args=[self.shelf.pk, fmt])
+            with mock.patch('warehouse.qr.make_qr', wraps=make_qr) as render:
+                first = self.client.get(url)
+                second = self.client.get(url)
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(first.content, second.content)
+            self.assertEqual(first['Content-Type'], content_type)
+            self.assertIn('immutable', first['Cache-Control'])
+
+        url = reverse('warehouse:shelf_qr', args=[self.shelf.pk, 'gif'])
+        self.assertEqual(self.client.get(url).status_code, 404)
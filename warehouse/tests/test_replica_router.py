@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from ksp.routers import (
+    PIN_COOKIE,
+    ReplicaPinningMiddleware,
+    ReplicaRouter,
+    use_replica,
+)
+from warehouse.models import Item
+
+
+@mock.patch('ksp.routers.replica_configured', return_value=True)
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def read_db(self, request):
+        """Alias an Item read would use inside a replica-enabled view"""
+
+        @use_replica
+        def view(request):
+            return HttpResponse(self.router.db_for_read(Item))
+
+        middleware = ReplicaPinningMiddleware(view)
+        return middleware(request)
+
+    def test_reads_outside_reporting_views_use_default(self, configured):
+        self.assertEqual(self.router.db_for_read(Item), 'default')
+        self.assertEqual(self.router.db_for_write(Item), 'default')
+
+    def test_reporting_view_reads_from_replica(self, configured):
+        response = self.read_db(self.factory.get('/warehouse/history/'))
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_post_pins_client_to_default(self, configured):
+        response = self.read_db(self.factory.post('/warehouse/export/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        request = self.factory.get('/warehouse/history/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.read_db(request).content, b'default')
+
+    def test_auth_tables_stay_on_default(self, configured):
+        from django.contrib.auth.models import User
+
+        @use_replica
+        def view():
+            return self.router.db_for_read(User)
+
+        self.assertEqual(view(), 'default')
+
+    def test_replica_is_never_migrated(self, configured):
+        self.assertFalse(self.router.allow_migrate('replica', 'warehouse'))
+        self.assertTrue(self.router.allow_migrate('default', 'warehouse'))
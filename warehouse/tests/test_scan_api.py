@@ -0,0 +1,67 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from warehouse.models import Category, ItemShelfAssignment, Rack, Room, Shelf
+
+
+class ScanIntakeApiTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='volunteer', password='password')
+        self.client.force_login(self.user)
+
+        self.category = Category.objects.create(name='Higiena')
+        self.room = Room.objects.create(name='Magazyn')
+        self.rack = Rack.objects.create(name='A', room=self.room)
+        self.shelf = Shelf.objects.create(number=1, rack=self.rack)
+        self.url = reverse(
+            'warehouse:scan_intake', kwargs={'qr_uuid': self.shelf.qr_code_uuid}
+        )
+
+    def post(self, payload):
+        return self.client.post(
+            self.url, json.dumps(payload), content_type='application/json'
+        )
+
+    def test_batch_is_applied(self):
+        response = self.post(
+            {
+                'lines': [
+                    {'name': 'Pieluchy', 'category': self.category.id, 'quantity': 3},
+                    {
+                        'name': 'Mydło',
+                        'category': 'Higiena',
+                        'quantity': 2,
+                        'expiration_date': '2030-01-31',
+                    },
+                ]
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['added'], [3, 2])
+        active = ItemShelfAssignment.objects.filter(
+            shelf=self.shelf, remove_date__isnull=True
+        )
+        self.assertEqual(active.count(), 5)
+        self.assertEqual(active.filter(item__expiration_date__isnull=False).count(), 2)
+
+        header = self.client.get(
+            reverse('warehouse:scan_shelf', kwargs={'qr_uuid': self.shelf.qr_code_uuid})
+        ).json()
+        self.assertEqual(header['count'], 5)
+        self.assertEqual(header['location'], 'Magazyn.A.1')
+
+    def test_invalid_line_rejects_whole_batch(self):
+        response = self.post(
+            {
+                'lines': [
+                    {'name': 'Pieluchy', 'category': self.category.id, 'quantity': 3},
+                    {'name': 'Mydło', 'category': 'Nieznana', 'quantity': 2},
+                ]
+            }
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['line'], 1)
+        self.assertFalse(ItemShelfAssignment.objects.exists())
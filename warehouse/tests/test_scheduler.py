@@ -0,0 +1,77 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from warehouse import scheduler
+
+
+class SchedulerTest(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(
+            scheduler, 'claim_scheduler_lock', return_value=True
+        )
+        self.claim = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(ENABLE_EXPIRY_NOTIFICATIONS=False, ENABLE_MAINTENANCE_JOBS=True)
+    def test_maintenance_runs_without_notifications(self):
+        with mock.patch.object(scheduler.threading, 'Thread') as thread:
+            scheduler.start_scheduler()
+        thread.return_value.start.assert_called_once()
+
+        # One pass of the loop: sleep, then the enabled jobs only
+        with (
+            mock.patch.object(
+                scheduler.time, 'sleep', side_effect=[None, StopIteration]
+            ),
+            mock.patch.object(scheduler, 'send_expiry_notifications') as notify,
+            mock.patch.object(scheduler, 'run_maintenance') as maintenance,
+        ):
+            with self.assertRaises(StopIteration):
+                scheduler.scheduler_thread()
+        notify.assert_not_called()
+        maintenance.assert_called_once()
+
+    @override_settings(ENABLE_EXPIRY_NOTIFICATIONS=False, ENABLE_MAINTENANCE_JOBS=False)
+    def test_nothing_enabled_starts_no_thread(self):
+        with mock.patch.object(scheduler.threading, 'Thread') as thread:
+            scheduler.start_scheduler()
+        thread.assert_not_called()
+
+    def test_failing_job_does_not_stop_the_others(self):
+        with (
+            mock.patch.object(scheduler, 'archive_history', side_effect=ValueError),
+            mock.patch.object(scheduler, 'compute_stock_stats') as stats,
+            mock.patch.object(scheduler, 'snapshot_stock') as snapshot,
+        ):
+            scheduler.run_maintenance()
+        stats.assert_called_once()
+        snapshot.assert_called_once()
+
+    @override_settings(RUN_SCHEDULER=False)
+    def test_disabled_service_starts_no_thread(self):
+        with mock.patch.object(scheduler.threading, 'Thread') as thread:
+            scheduler.start_scheduler()
+        thread.assert_not_called()
+        self.claim.assert_not_called()
+
+    def test_only_the_lock_holder_starts_the_scheduler(self):
+        self.claim.return_value = False
+        with mock.patch.object(scheduler.threading, 'Thread') as thread:
+            scheduler.start_scheduler()
+        thread.assert_not_called()
+
+
+class SchedulerLockTest(SimpleTestCase):
+    def test_second_claim_fails_while_the_lock_is_held(self):
+        path = os.path.join(tempfile.mkdtemp(), 'scheduler.lock')
+        self.addCleanup(setattr, scheduler, '_lock_file', None)
+        with override_settings(SCHEDULER_LOCK_FILE=path):
+            self.assertTrue(scheduler.claim_scheduler_lock())
+            held = scheduler._lock_file
+            self.addCleanup(held.close)
+            # Another open file description, like another worker process
+            self.assertFalse(scheduler.claim_scheduler_lock())
+            self.assertIs(scheduler._lock_file, held)
@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from warehouse.models import Category, ItemShelfAssignment, Rack, Room, Shelf
+from warehouse.shelf_contents import content_groups, shelf_counters
+from warehouse.stock import add_items_to_shelf
+
+TODAY = date(2025, 6, 1)
+
+
+class ShelfContentsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(self.user)
+        rack = Rack.objects.create(name='A', room=Room.objects.create(name='Magazyn'))
+        self.shelf = Shelf.objects.create(rack=rack, number=1)
+        self.other_shelf = Shelf.objects.create(rack=rack, number=2)
+        self.food = Category.objects.create(name='Żywność')
+        for shelf, quantity, name, expiration_date in (
+            (self.shelf, 3, 'Ryż', TODAY),
+            (self.shelf, 2, 'Ryż', date(2025, 5, 1)),
+            (self.shelf, 4, 'Mąka', None),
+            (self.shelf, 1, 'Cukier', date(2026, 1, 1)),
+            (self.other_shelf, 5, 'Ryż', TODAY),
+        ):
+            add_items_to_shelf(
+                shelf,
+                self.user,
+                quantity,
+                name,
+                self.food,
+                expiration_date=expiration_date,
+            )
+
+    def test_counters_come_from_one_query(self):
+        with self.assertNumQueries(1):
+            counters = shelf_counters(self.shelf, today=TODAY)
+        self.assertEqual(
+            counters,
+            {'total_count': 10, 'expired_count': 2, 'nearly_expired_count': 3},
+        )
+
+    def test_units_are_grouped_by_product_and_expiry(self):
+        groups, next_cursor = content_groups(self.shelf, today=TODAY)
+
+        self.assertIsNone(next_cursor)
+        self.assertEqual(
+            [
+                (g['name'], g['expiration_date'], g['count'], g['status'])
+                for g in groups
+            ],
+            [
+                ('Cukier', '2026-01-01', 1, 'ok'),
+                ('Mąka', None, 4, None),
+                ('Ryż', '2025-05-01', 2, 'expired'),
+                ('Ryż', '2025-06-01', 3, 'expiring_soon'),
+            ],
+        )
+        assignment = ItemShelfAssignment.objects.get(pk=groups[3]['assignment_id'])
+        self.assertEqual(assignment.shelf, self.shelf)
+        self.assertEqual(assignment.item.expiration_date, TODAY)
+
+    def test_keyset_pages_cover_every_group_once(self):
+        seen = []
+        cursor = None
+        for _ in range(4):
+            with self.assertNumQueries(1):
+                groups, cursor = content_groups(
+                    self.shelf, after=cursor, limit=1, today=TODAY
+                )
+            seen.extend((g['name'], g['expiration_date']) for g in groups)
+        self.assertIsNone(cursor)
+        self.assertEqual(len(seen), 4)
+        self.assertEqual(len(set(seen)), 4)
+
+    def test_api_returns_pages_with_next_cursor(self):
+        url = reverse('warehouse:shelf_contents', kwargs={'pk': self.shelf.pk})
+        first = self.client.get(url, {'limit': 3}).json()
+        self.assertEqual(len(first['results']), 3)
+        self.assertIn('/remove/', first['results'][0]['remove_url'])
+
+        second = self.client.get(url, {'limit': 3, 'after': first['next']}).json()
+        self.assertEqual([g['name'] for g in second['results']], ['Ryż'])
+        self.assertIsNone(second['next'])
+
+    def test_api_rejects_bad_cursor(self):
+        url = reverse('warehouse:shelf_contents', kwargs={'pk': self.shelf.pk})
+        response = self.client.get(url, {'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Invalid cursor'})
+
+    def test_shelf_detail_renders_counters_without_contents(self):
+        response = self.client.get(
+            reverse('warehouse:shelf_detail', kwargs={'pk': self.shelf.pk})
+        )
+        self.assertEqual(response.context['total_count'], 10)
+        self.assertNotIn('assignments', response.context)
+        self.assertContains(
+            response,
+            reverse('warehouse:shelf_contents', kwargs={'pk': self.shelf.pk}),
+        )
+
+    def test_expiring_window_is_thirty_days(self):
+        groups, _ = content_groups(self.shelf, today=TODAY - timedelta(days=31))
+        statuses = {g['expiration_date']: g['status'] for g in groups}
+        self.assertEqual(statuses['2025-06-01'], 'ok')
@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from warehouse.models import Rack, Room, Shelf
+
+
+class ShelfLocationTest(TestCase):
+    def setUp(self):
+        self.room = Room.objects.create(name='Magazyn')
+        self.rack = Rack.objects.create(name='A', room=self.room)
+        self.shelf = Shelf.objects.create(rack=self.rack, number=2)
+
+    def test_location_is_stored_on_save(self):
+        self.assertEqual(self.shelf.location_path, 'Magazyn.A.2')
+        self.assertEqual(str(self.shelf), 'Magazyn.A.2')
+
+    def test_renaming_room_and_rack_updates_shelves(self):
+        self.room.name = 'Piwnica'
+        self.room.save()
+        self.shelf.refresh_from_db()
+        self.assertEqual(self.shelf.full_location, 'Piwnica.A.2')
+
+        self.rack.name = 'B'
+        self.rack.save()
+        self.shelf.refresh_from_db()
+        self.assertEqual(self.shelf.full_location, 'Piwnica.B.2')
+
+    def test_sort_key_orders_like_room_rack_number(self):
+        Shelf.objects.create(rack=self.rack, number=10)
+        Shelf.objects.create(rack=self.rack, number=1)
+        other = Room.objects.create(name='Magazyn B')
+        Shelf.objects.create(rack=Rack.objects.create(name='A', room=other), number=1)
+
+        expected = list(
+            Shelf.objects.order_by('rack__room__name', 'rack__name', 'number')
+        )
+        self.assertEqual(list(Shelf.objects.order_by('sort_key')), expected)
+
+    def test_display_needs_no_joins(self):
+        with self.assertNumQueries(1):
+            locations = [str(shelf) for shelf in Shelf.objects.order_by('sort_key')]
+        self.assertEqual(locations, ['Magazyn.A.2'])
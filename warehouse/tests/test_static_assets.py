@@ -0,0 +1,72 @@
+import gzip
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+MANIFEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'ksp.storage.CompressedManifestStaticFilesStorage'},
+}
+
+
+class CompressedManifestStorageTest(SimpleTestCase):
+    def setUp(self):
+        static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(static_root.cleanup)
+        self.static_root = Path(static_root.name)
+        settings_override = override_settings(
+            STATIC_ROOT=self.static_root, STORAGES=MANIFEST_STORAGES
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def test_assets_get_hashed_names(self):
+        url = staticfiles_storage.url('vendor/bootstrap/css/bootstrap.min.css')
+        self.assertRegex(url, r'bootstrap\.min\.[0-9a-f]{12}\.css$')
+
+    def test_css_references_point_at_hashed_names(self):
+        css = staticfiles_storage.stored_name('vendor/fontawesome/css/all.min.css')
+        content = (self.static_root / css).read_text()
+        self.assertRegex(content, r'fa-solid-900\.[0-9a-f]{12}\.woff2')
+
+    def test_hashed_text_assets_are_precompressed(self):
+        name = staticfiles_storage.stored_name('css/style.css')
+        original = (self.static_root / name).read_bytes()
+        compressed = self.static_root / f'{name}.gz'
+        self.assertTrue(compressed.exists())
+        self.assertEqual(gzip.decompress(compressed.read_bytes()), original)
+
+    def test_binary_assets_are_not_compressed(self):
+        name = staticfiles_storage.stored_name('img/logo.png')
+        self.assertFalse((self.static_root / f'{name}.gz').exists())
+
+
+class BaseTemplateAssetsTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='user', password='password')
+        self.client.force_login(user)
+
+    def test_pages_load_assets_locally_without_cache_busters(self):
+        content = self.client.get(reverse('warehouse:index')).content.decode()
+        self.assertIn('vendor/bootstrap/js/bootstrap.min.js', content)
+        self.assertIn('vendor/jquery/jquery.min.js', content)
+        self.assertNotIn('code.jquery.com', content)
+        self.assertNotIn('cdnjs.cloudflare.com', content)
+        self.assertNotIn('cdn.jsdelivr.net', content)
+        self.assertNotIn('clear_cache.js', content)
+        self.assertNotIn('.css?v=', content)
+
+    def test_vendored_libraries_are_current(self):
+        static = Path(__file__).resolve().parents[2] / 'static' / 'vendor'
+        jquery_ui = (static / 'jquery-ui' / 'jquery-ui.min.js').read_text()
+        # 1.13.2 fixes the checkboxradio label XSS (CVE-2022-31160)
+        self.assertIn('version:"1.13.2"', jquery_ui)
+        # The full build defines the compat modules behind dropdownCssClass
+        select2 = (static / 'select2' / 'js' / 'select2.full.min.js').read_text()
+        self.assertIn('select2/compat/dropdownCss', select2)
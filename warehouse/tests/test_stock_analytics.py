@@ -0,0 +1,116 @@
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from warehouse.analytics import (
+    compute_daily_stats,
+    refresh_daily_stats,
+    supply_forecast,
+)
+from warehouse.models import (
+    Category,
+    DailyStockStat,
+    Item,
+    ItemShelfAssignment,
+    Rack,
+    Room,
+    Shelf,
+)
+
+TODAY = date(2025, 3, 11)
+
+
+def at(day, hour=12):
+    return timezone.make_aware(datetime(day.year, day.month, day.day, hour))
+
+
+class StockAnalyticsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        rack = Rack.objects.create(name='A', room=Room.objects.create(name='Magazyn'))
+        self.shelf = Shelf.objects.create(rack=rack, number=1)
+        self.food = Category.objects.create(name='Żywność')
+        self.hygiene = Category.objects.create(name='Higiena')
+
+    def units(self, category, name, count, added, removed=None):
+        for _ in range(count):
+            item = Item.objects.create(name=name, category=category)
+            assignment = ItemShelfAssignment.objects.create(
+                item=item, shelf=self.shelf, added_by=self.user
+            )
+            # add_date is auto_now_add, so dates are set afterwards
+            ItemShelfAssignment.objects.filter(pk=assignment.pk).update(
+                add_date=at(added), remove_date=removed and at(removed)
+            )
+
+    def test_daily_inflow_outflow_and_on_hand(self):
+        day1, day2 = date(2025, 3, 1), date(2025, 3, 2)
+        self.units(self.food, 'Ryż', 3, day1, removed=day2)
+        self.units(self.food, 'Ryż', 2, day2)
+
+        stats = {
+            (stat.date, stat.product_name): (stat.added, stat.removed, stat.on_hand)
+            for stat in compute_daily_stats(day1, date(2025, 3, 3))
+        }
+
+        self.assertEqual(stats[day1, 'Ryż'], (3, 0, 3))
+        self.assertEqual(stats[day2, 'Ryż'], (2, 3, 2))
+        self.assertEqual(stats[date(2025, 3, 3), 'Ryż'], (0, 0, 2))
+
+    def test_forecast_orders_by_days_of_supply(self):
+        stocked = TODAY - timedelta(days=40)
+        # Rice: one unit a day taken over the 28 day window, 10 left
+        for offset in range(1, 29):
+            self.units(self.food, 'Ryż', 1, stocked, removed=TODAY - timedelta(offset))
+        self.units(self.food, 'Ryż', 10, stocked)
+        # Soap: stock is not going down
+        self.units(self.hygiene, 'Mydło', 5, stocked)
+
+        refresh_daily_stats(days=30, today=TODAY)
+        forecast = supply_forecast('category', window_days=28)
+
+        self.assertEqual([row['name'] for row in forecast], ['Żywność', 'Higiena'])
+        self.assertEqual(forecast[0]['on_hand'], 10)
+        self.assertEqual(forecast[0]['net_per_day'], 1.0)
+        self.assertEqual(forecast[0]['days_of_supply'], 10.0)
+        self.assertEqual(forecast[0]['run_out_date'], TODAY + timedelta(days=9))
+        self.assertIsNone(forecast[1]['days_of_supply'])
+
+    def test_forecast_averages_over_days_with_stats(self):
+        # Stats of only one week so far: 14 taken, 7 left
+        stocked = TODAY - timedelta(days=8)
+        self.units(self.food, 'Ryż', 14, stocked, removed=TODAY - timedelta(days=1))
+        self.units(self.food, 'Ryż', 7, stocked)
+
+        refresh_daily_stats(days=7, today=TODAY)
+        (row,) = supply_forecast('category', window_days=28)
+
+        self.assertEqual(row['net_per_day'], 2.0)
+        self.assertEqual(row['days_of_supply'], 3.5)
+
+    def test_refresh_replaces_rows_of_the_range(self):
+        self.units(self.food, 'Ryż', 1, TODAY - timedelta(days=1))
+        refresh_daily_stats(today=TODAY)
+        refresh_daily_stats(today=TODAY)
+        self.assertEqual(DailyStockStat.objects.count(), 1)
+
+    def test_api(self):
+        self.client.force_login(self.user)
+        self.units(self.food, 'Ryż', 1, TODAY - timedelta(days=1))
+        refresh_daily_stats(today=TODAY)
+
+        response = self.client.get(
+            reverse('warehouse:api_stock_forecast'), {'level': 'product'}
+        )
+        self.assertEqual(response.json()['results'][0]['name'], 'Ryż')
+
+        response = self.client.get(
+            reverse('warehouse:api_stock_forecast'), {'level': 'shelf'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(reverse('warehouse:stock_analytics'))
+        self.assertContains(response, 'Żywność')
@@ -0,0 +1,117 @@
+import random
+import threading
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TransactionTestCase
+
+from warehouse.models import Category, ItemShelfAssignment, Rack, Room, Shelf
+from warehouse.stock import (
+    add_items_to_shelf,
+    close_units,
+    group_assignments,
+    move_group,
+)
+
+THREADS = 8
+OPERATIONS_PER_THREAD = 40
+
+
+class StockConcurrencyTest(TransactionTestCase):
+    """Parallel add, remove and move on one group must keep totals exact"""
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Threads cannot share an in-memory SQLite database')
+        self.user = User.objects.create_user(username='volunteer', password='x')
+        self.category = Category.objects.create(name='Żywność')
+        rack = Rack.objects.create(name='A', room=Room.objects.create(name='Magazyn'))
+        self.shelves = [
+            Shelf.objects.create(number=number, rack=rack) for number in (1, 2, 3)
+        ]
+        add_items_to_shelf(self.shelves[0], self.user, 200, 'Ryż', self.category)
+
+    def run_threads(self, work):
+        errors = []
+
+        def run(seed):
+            try:
+                work(random.Random(seed))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_parallel_removals_never_over_remove(self):
+        removed = Counter()
+
+        def work(rng):
+            for _ in range(OPERATIONS_PER_THREAD):
+                assignments = group_assignments(self.shelves[0], 'Ryż', self.category)
+                removed[threading.get_ident()] += close_units(
+                    assignments, self.user, rng.randint(1, 3)
+                )
+
+        self.run_threads(work)
+
+        # Far more was requested than available: exactly the stock is removed
+        self.assertEqual(sum(removed.values()), 200)
+        self.assertFalse(
+            ItemShelfAssignment.objects.filter(remove_date__isnull=True).exists()
+        )
+        self.assertEqual(
+            ItemShelfAssignment.objects.filter(removed_by=self.user).count(), 200
+        )
+
+    def test_parallel_add_remove_and_move_keep_totals(self):
+        added = Counter()
+        removed = Counter()
+
+        def work(rng):
+            ident = threading.get_ident()
+            for _ in range(OPERATIONS_PER_THREAD):
+                source, target = rng.sample(self.shelves, 2)
+                operation = rng.choice(('add', 'remove', 'move'))
+                if operation == 'add':
+                    added[ident] += add_items_to_shelf(
+                        source, self.user, rng.randint(1, 5), 'Ryż', self.category
+                    )
+                elif operation == 'remove':
+                    removed[ident] += close_units(
+                        group_assignments(source, 'Ryż', self.category),
+                        self.user,
+                        rng.randint(1, 5),
+                    )
+                else:
+                    move_group(
+                        source,
+                        target,
+                        self.user,
+                        'Ryż',
+                        self.category,
+                        quantity=rng.randint(1, 10),
+                    )
+
+        self.run_threads(work)
+
+        active = ItemShelfAssignment.objects.filter(remove_date__isnull=True)
+        self.assertEqual(
+            active.count(), 200 + sum(added.values()) - sum(removed.values())
+        )
+        # No unit was moved twice or is on two shelves at once
+        per_item = Counter(active.values_list('item_id', flat=True))
+        self.assertEqual(max(per_item.values(), default=1), 1)
+        # Every closed move has exactly one successor assignment
+        closed = ItemShelfAssignment.objects.filter(remove_date__isnull=False)
+        self.assertEqual(
+            closed.count() - sum(removed.values()),
+            ItemShelfAssignment.objects.count() - 200 - sum(added.values()),
+        )
@@ -0,0 +1,126 @@
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from warehouse.models import (
+    Category,
+    Item,
+    ItemShelfAssignment,
+    Rack,
+    Room,
+    Shelf,
+    StockSnapshot,
+)
+from warehouse.snapshots import _full_scan, end_of_day, stock_as_of, take_snapshot
+
+MARCH_1 = date(2025, 3, 1)
+
+
+def day(offset):
+    return MARCH_1 + timedelta(days=offset)
+
+
+def at(day, hour=12):
+    return timezone.make_aware(datetime(day.year, day.month, day.day, hour))
+
+
+class StockSnapshotTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        rack = Rack.objects.create(name='A', room=Room.objects.create(name='Magazyn'))
+        self.shelf_1 = Shelf.objects.create(rack=rack, number=1)
+        self.shelf_3 = Shelf.objects.create(rack=rack, number=3)
+        self.food = Category.objects.create(name='Żywność')
+
+        self.units(self.shelf_3, 'Ryż', 4, day(-5), removed=day(2))
+        self.units(self.shelf_3, 'Ryż', 2, day(-1))
+        self.units(self.shelf_3, 'Mąka', 1, day(1), removed=day(3))
+        self.units(self.shelf_1, 'Ryż', 3, day(0), removed=day(0))
+        self.units(self.shelf_1, 'Kasza', 5, day(4))
+
+    def units(self, shelf, name, count, added, removed=None):
+        for _ in range(count):
+            item = Item.objects.create(name=name, category=self.food)
+            assignment = ItemShelfAssignment.objects.create(
+                item=item, shelf=shelf, added_by=self.user
+            )
+            ItemShelfAssignment.objects.filter(pk=assignment.pk).update(
+                add_date=at(added), remove_date=removed and at(removed, 18)
+            )
+
+    def quantities(self, rows):
+        return {(row['shelf_id'], row['product_name']): row['quantity'] for row in rows}
+
+    def test_stock_as_of_without_checkpoint(self):
+        rows = stock_as_of(MARCH_1, shelves=Shelf.objects.filter(pk=self.shelf_3.pk))
+        self.assertEqual(self.quantities(rows), {(self.shelf_3.pk, 'Ryż'): 6})
+
+    def test_checkpoint_plus_deltas_matches_full_history(self):
+        take_snapshot(day(-2))
+        for offset in range(-1, 6):
+            expected = {
+                key: quantity
+                for key, quantity in _full_scan(end_of_day(day(offset))).items()
+                if quantity > 0
+            }
+            rows = stock_as_of(day(offset))
+            self.assertEqual(
+                {
+                    (row['shelf_id'], row['category_id'], row['product_name']): row[
+                        'quantity'
+                    ]
+                    for row in rows
+                },
+                expected,
+                day(offset),
+            )
+
+    def test_take_snapshot_replaces_existing_rows(self):
+        take_snapshot(MARCH_1)
+        take_snapshot(MARCH_1)
+        self.assertEqual(
+            dict(
+                StockSnapshot.objects.filter(date=MARCH_1).values_list(
+                    'product_name', 'quantity'
+                )
+            ),
+            {'Ryż': 6},
+        )
+
+    def test_views_in_as_of_mode(self):
+        self.client.force_login(self.user)
+        take_snapshot(MARCH_1)
+
+        response = self.client.get(
+            reverse('warehouse:shelf_detail', kwargs={'pk': self.shelf_3.pk}),
+            {'as_of': '2025-03-02'},
+        )
+        self.assertTemplateUsed(response, 'warehouse/stock_as_of.html')
+        self.assertEqual(
+            self.quantities(response.context['rows']),
+            {(self.shelf_3.pk, 'Ryż'): 6, (self.shelf_3.pk, 'Mąka'): 1},
+        )
+
+        response = self.client.get(
+            reverse('warehouse:item_list'), {'as_of': '2025-03-05', 'search': 'kasz'}
+        )
+        self.assertEqual(response.context['total'], 5)
+
+        response = self.client.post(
+            reverse('warehouse:export_inventory'), {'as_of': '2025-03-01'}
+        )
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="inventory_as_of_2025-03-01.xlsx"',
+        )
+
+    def test_future_date_shows_live_stock(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('warehouse:item_list'),
+            {'as_of': str(timezone.localdate() + timedelta(days=1))},
+        )
+        self.assertTemplateUsed(response, 'warehouse/item_list.html')
@@ -4,6 +4,11 @@ from django.urls import path
 from warehouse.views.core import index, item_list, low_stock
 from warehouse.views.location import (
     room_list,
+    provision_locations_view,
+    api_provision_locations,
+    label_job_status,
+    location_tree_racks,
+    location_tree_shelves,
     room_create,
     room_update,
     room_delete,
@@ -16,6 +21,8 @@ from warehouse.views.location import (
     shelf_update,
     shelf_delete,
     shelf_detail,
+    shelf_contents,
+    shelf_qr,
     clean_shelf,
 )
 from warehouse.views.category import (
@@ -29,11 +36,17 @@ from warehouse.views.item import (
     remove_item_from_shelf,
     ajax_bulk_add_items,
     ajax_bulk_remove_items,
+    ajax_bulk_operation_status,
     add_new_item,
     move_group_items,
     move_single_item,
+    api_move_groups,
 )
-from warehouse.views.export import generate_qr_codes, export_inventory
+from warehouse.views.export import generate_qr_codes, export_inventory, qr_label
+from warehouse.views.inventory_import import import_inventory, import_inventory_status
+from warehouse.views.events import event_stream
+from warehouse.views.metrics import metrics
+from warehouse.views.analytics import stock_analytics, api_stock_forecast
 from warehouse.views.ajax import (
     autocomplete_categories,
     get_racks,
@@ -52,6 +65,7 @@ from warehouse.views.account import (
     custom_logout,
 )
 from warehouse.views.history import history_list
+from warehouse.views.scan import scan_shelf, scan_intake
 
 app_name = 'warehouse'
 
@@ -74,6 +88,23 @@ urlpatterns = [
     path('shelves/<int:pk>/update/', shelf_update, name='shelf_update'),
     path('shelves/<int:pk>/delete/', shelf_delete, name='shelf_delete'),
     path('shelves/<int:pk>/clean/', clean_shelf, name='shelf_clean'),
+    path('rooms/provision/', provision_locations_view, name='provision_locations'),
+    path(
+        'api/locations/provision/',
+        api_provision_locations,
+        name='api_provision_locations',
+    ),
+    path('api/locations/labels/<str:key>/', label_job_status, name='label_job_status'),
+    path(
+        'api/locations/rooms/<int:pk>/racks/',
+        location_tree_racks,
+        name='location_tree_racks',
+    ),
+    path(
+        'api/locations/racks/<int:pk>/shelves/',
+        location_tree_shelves,
+        name='location_tree_shelves',
+    ),
     # Category management (admin)
     path('categories/', category_list, name='category_list'),
     path('categories/create/', category_create, name='category_create'),
@@ -81,6 +112,8 @@ urlpatterns = [
     path('categories/<int:pk>/delete/', category_delete, name='category_delete'),
     # Shelf detail view and item management
     path('shelves/<int:pk>/', shelf_detail, name='shelf_detail'),
+    path('shelves/<int:pk>/qr.<str:fmt>', shelf_qr, name='shelf_qr'),
+    path('api/shelves/<int:pk>/contents/', shelf_contents, name='shelf_contents'),
     path(
         'shelves/<int:shelf_id>/add_item/',
         add_item_to_shelf,
@@ -96,6 +129,7 @@ urlpatterns = [
         move_group_items,
         name='move_group_items',
     ),
+    path('api/items/move/', api_move_groups, name='api_move_groups'),
     path(
         'assignments/<int:assignment_id>/move/',
         move_single_item,
@@ -108,8 +142,18 @@ urlpatterns = [
     ),
     # QR code generation
     path('qrcodes/', generate_qr_codes, name='generate_qr_codes'),
+    path('qrcodes/<uuid:qr_uuid>.svg', qr_label, name='qr_label'),
     # Excel export
     path('export/', export_inventory, name='export_inventory'),
+    # Monitoring
+    path('metrics/', metrics, name='metrics'),
+    # Spreadsheet/CSV import
+    path('import/', import_inventory, name='import_inventory'),
+    path(
+        'import/<str:key>/status/',
+        import_inventory_status,
+        name='import_inventory_status',
+    ),
     # AJAX endpoints for autocomplete
     path(
         'api/autocomplete/categories/',
@@ -132,9 +176,17 @@ urlpatterns = [
     path('api/shelves/', get_shelves, name='get_shelves'),
     path('api/shelf_items/', get_shelf_items, name='get_shelf_items'),
     path('ajax/bulk-add-items/', ajax_bulk_add_items, name='ajax_bulk_add_items'),
+    # Scan-and-act API for intake stations
+    path('api/scan/<uuid:qr_uuid>/', scan_shelf, name='scan_shelf'),
+    path('api/scan/<uuid:qr_uuid>/intake/', scan_intake, name='scan_intake'),
     path(
         'ajax/bulk-remove-items/', ajax_bulk_remove_items, name='ajax_bulk_remove_items'
     ),
+    path(
+        'ajax/bulk-operations/<str:key>/',
+        ajax_bulk_operation_status,
+        name='ajax_bulk_operation_status',
+    ),
     # User profile and password management
     path('profile/', profile, name='profile'),
     path('profile/edit/', edit_profile, name='edit_profile'),
@@ -142,6 +194,11 @@ urlpatterns = [
     path('logout/', custom_logout, name='custom_logout'),
     # Low stock view
     path('low_stock/', low_stock, name='low_stock'),
+    # Live stock events for open dashboards
+    path('events/stream/', event_stream, name='event_stream'),
+    # Stock analytics
+    path('analytics/', stock_analytics, name='stock_analytics'),
+    path('api/analytics/forecast/', api_stock_forecast, name='api_stock_forecast'),
     # AJAX endpoints for getting rack and shelf info
     path('api/get_rack_info/', get_rack_info, name='get_rack_info'),
     path('api/get_shelf_info/', get_shelf_info, name='get_shelf_info'),
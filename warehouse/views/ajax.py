@@ -55,8 +55,8 @@ def get_shelves(request):
     # Accept both 'room' and 'room_id' parameter names for backwards compatibility
     room_id = request.GET.get('room_id') or request.GET.get('room')
 
-    # Start with all shelves, select_related to reduce db queries
-    shelves = Shelf.objects.select_related('rack', 'rack__room')
+    # The location is stored on the shelf, the rack is only needed for room_id
+    shelves = Shelf.objects.select_related('rack')
 
     # Apply filters if provided
     if rack_id:
@@ -66,14 +66,14 @@ def get_shelves(request):
         shelves = shelves.filter(rack__room_id=room_id)
 
     # Order by location for consistent display
-    shelves = shelves.order_by('rack__room__name', 'rack__name', 'number')
+    shelves = shelves.order_by('sort_key')
 
     shelf_data = [
         {
             'id': s.id,
             'number': s.number,
-            'rack_id': s.rack.id,
-            'room_id': s.rack.room.id,
+            'rack_id': s.rack_id,
+            'room_id': s.rack.room_id,
             'full_location': s.full_location,
         }
         for s in shelves
@@ -141,10 +141,9 @@ def autocomplete_users(request):
         # If there's a search query, filter and limit results
         users = User.objects.filter(username__icontains=query)[:10]
 
-        # Format results with username and email
+        # Format results with username and email; filters take the user id
         results = [
-            {'id': user.username, 'text': f'{user.username} ({user.email})'}
-            for user in users
+            {'id': user.pk, 'text': f'{user.username} ({user.email})'} for user in users
         ]
     else:
         # For empty queries, don't return anything to avoid loading the entire dataset
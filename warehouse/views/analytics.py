@@ -0,0 +1,54 @@
+"""
+Stock analytics views: consumption rates and days of supply.
+"""
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from ksp.routers import use_replica
+from warehouse.analytics import FORECAST_WINDOW_DAYS, supply_forecast
+
+FORECAST_LEVELS = ('category', 'product')
+
+
+def _window_days(request):
+    try:
+        window = int(request.GET.get('window', FORECAST_WINDOW_DAYS))
+    except ValueError:
+        return FORECAST_WINDOW_DAYS
+    return min(max(window, 1), 365)
+
+
+@login_required
+@use_replica
+def stock_analytics(request):
+    """Dashboard of categories and products ordered by days of supply"""
+    window = _window_days(request)
+    return render(
+        request,
+        'warehouse/stock_analytics.html',
+        {
+            'window': window,
+            'categories': supply_forecast('category', window),
+            'products': supply_forecast('product', window)[:20],
+        },
+    )
+
+
+@login_required
+@use_replica
+def api_stock_forecast(request):
+    """JSON forecast; ?level=category|product and ?window=<days>"""
+    level = request.GET.get('level', 'category')
+    if level not in FORECAST_LEVELS:
+        return JsonResponse({'error': 'Unknown level'}, status=400)
+
+    window = _window_days(request)
+    return JsonResponse(
+        {
+            'level': level,
+            'window_days': window,
+            'results': supply_forecast(level, window),
+        }
+    )
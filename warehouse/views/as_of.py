@@ -0,0 +1,51 @@
+"""
+Helpers for the as-of (historical stock) mode of item, shelf and export views.
+"""
+
+from django.shortcuts import render
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from warehouse.models import Category, Shelf
+from warehouse.snapshots import stock_as_of
+
+
+def parse_as_of(value):
+    """Past date from an ?as_of=YYYY-MM-DD value, None for live stock"""
+    try:
+        day = parse_date(value or '')
+    except ValueError:
+        return None
+    if day is None or day >= timezone.localdate():
+        return None
+    return day
+
+
+def stock_rows_as_of(day, shelves=None, category_id=None, search=None):
+    """Stock as of day with shelf and category objects, in location order"""
+    rows = stock_as_of(day, shelves=shelves, category_id=category_id, search=search)
+    shelf_map = Shelf.objects.in_bulk({row['shelf_id'] for row in rows})
+    category_map = Category.objects.in_bulk({row['category_id'] for row in rows})
+    for row in rows:
+        row['shelf'] = shelf_map[row['shelf_id']]
+        row['category'] = category_map[row['category_id']]
+    rows.sort(key=lambda row: (row['shelf'].sort_key, row['product_name']))
+    return rows
+
+
+def render_stock_as_of(request, day, title, shelves=None, back_url=None):
+    """Render the stock as of day, filtered like item_list"""
+    category_id = request.GET.get('category') or None
+    search = request.GET.get('search') or None
+    rows = stock_rows_as_of(day, shelves, category_id, search)
+    return render(
+        request,
+        'warehouse/stock_as_of.html',
+        {
+            'as_of': day,
+            'title': title,
+            'rows': rows,
+            'total': sum(row['quantity'] for row in rows),
+            'back_url': back_url or request.path,
+        },
+    )
@@ -6,25 +6,40 @@ from datetime import timedelta
 
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.core.paginator import Paginator
-from django.urls import reverse
 
+from ksp.routers import use_replica
+from warehouse.low_stock import low_stock_report
+from warehouse.views.as_of import parse_as_of, render_stock_as_of
 from warehouse.models import Room, ItemShelfAssignment, Rack, Shelf, Category
 
 
 @login_required
+@use_replica
 def index(request):
     """Dashboard view"""
+    # Counted in a subquery rather than a filtered aggregate over the join, so
+    # the active-stock partial index on shelf is used instead of scanning the
+    # whole assignment history of every shelf
+    active_items = (
+        ItemShelfAssignment.objects.filter(
+            shelf__rack__room=OuterRef('pk'), remove_date__isnull=True
+        )
+        .order_by()
+        .values('shelf__rack__room')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
     rooms = (
         Room.objects.all()
         .annotate(
             rack_count=Count('racks', distinct=True),
             shelf_count=Count('racks__shelves', distinct=True),
-            active_items=Count(
-                'racks__shelves__assignments',
-                filter=Q(racks__shelves__assignments__remove_date__isnull=True),
+            active_items=Coalesce(
+                Subquery(active_items, output_field=IntegerField()), 0
             ),
         )
         .order_by('name')
@@ -39,7 +54,18 @@ def index(request):
 
 @login_required
 def item_list(request):
-    """List of all active items in warehouse"""
+    """List of all active items in warehouse, or of the stock as of ?as_of=date"""
+    as_of = parse_as_of(request.GET.get('as_of'))
+    if as_of:
+        shelves = None
+        if request.GET.get('shelf'):
+            shelves = Shelf.objects.filter(pk=request.GET['shelf'])
+        elif request.GET.get('rack'):
+            shelves = Shelf.objects.filter(rack_id=request.GET['rack'])
+        elif request.GET.get('room'):
+            shelves = Shelf.objects.filter(rack__room_id=request.GET['room'])
+        return render_stock_as_of(request, as_of, 'Przedmioty w magazynie', shelves)
+
     assignments = ItemShelfAssignment.objects.filter(
         remove_date__isnull=True
     ).select_related('item', 'shelf', 'shelf__rack', 'shelf__rack__room')
@@ -77,6 +103,7 @@ def item_list(request):
 
     # Get the number of days for 'expiring soon' from environment variable (default 7)
     from ksp.env import get_env_variable
+
     try:
         days_near_expiry = int(get_env_variable('EXPIRY_NOTIFICATION_DAYS', 7))
     except ValueError:
@@ -86,7 +113,8 @@ def item_list(request):
     if 'expiring_soon' in filter_values:
         expiring_soon_q = Q(
             item__expiration_date__isnull=False,
-            item__expiration_date__lte=timezone.now().date() + timedelta(days=days_near_expiry),
+            item__expiration_date__lte=timezone.now().date()
+            + timedelta(days=days_near_expiry),
             item__expiration_date__gte=timezone.now().date(),  # Exclude expired items
         )
         filters_q |= expiring_soon_q
@@ -220,46 +248,15 @@ def item_list(request):
 
 
 @login_required
+@use_replica
 def low_stock(request):
-    """View for categories with low stock (efficient version)"""
-    # Find categories with <10 active items
-    categories = Category.objects.annotate(
-        active_items=Count(
-            'items__assignments',
-            filter=Q(items__assignments__remove_date__isnull=True),
-        )
-    ).filter(active_items__lt=10)
-
-    low_stock_categories = []
-    for category in categories:
-        # Find all shelves with at least one active item in this category
-        shelf_ids = (
-            ItemShelfAssignment.objects.filter(
-                item__category=category, remove_date__isnull=True
-            )
-            .values_list('shelf_id', flat=True)
-            .distinct()
-        )
-        # Fetch shelf objects and build location data
-        shelves = Shelf.objects.filter(id__in=shelf_ids)
-        location_data = [
-            {
-                'id': shelf.id,
-                'full_location': shelf.full_location,
-                'path': reverse('warehouse:shelf_detail', kwargs={'pk': shelf.id}),
-            }
-            for shelf in shelves
-        ]
-        low_stock_categories.append(
-            {
-                'name': category.name,
-                'active_items': category.active_items,
-                'locations': location_data,
-            }
-        )
-
+    """Categories and products below their minimum stock level"""
+    report = low_stock_report()
     return render(
         request,
         'warehouse/low_stock.html',
-        {'low_stock_categories': low_stock_categories},
+        {
+            'low_stock_categories': report['categories'],
+            'low_stock_products': report['products'],
+        },
     )
@@ -0,0 +1,111 @@
+"""
+Server-sent event stream of stock changes for live dashboards.
+"""
+
+import json
+import time
+
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, StreamingHttpResponse
+
+from warehouse import events
+from warehouse.models import Shelf
+
+# A comment line is sent when nothing happened for this long, so proxies
+# keep the connection open
+HEARTBEAT_SECONDS = 15
+
+# Browser reconnect delay after a stream ends
+RECONNECT_MS = 3000
+
+# Delay before pages retry when all stream slots are taken
+BUSY_RETRY_MS = 30000
+
+
+def _with_locations(batch):
+    """Add the rack and room of the events' shelves with a single query"""
+    shelf_ids = {event['shelf'] for event in batch} | {
+        event['target'] for event in batch if event['target']
+    }
+    locations = {
+        pk: (rack_id, room_id)
+        for pk, rack_id, room_id in Shelf.objects.filter(pk__in=shelf_ids).values_list(
+            'pk', 'rack_id', 'rack__room_id'
+        )
+    }
+    for event in batch:
+        event['rack'], event['room'] = locations.get(event['shelf'], (None, None))
+        event['target_rack'], event['target_room'] = locations.get(
+            event['target'], (None, None)
+        )
+    return batch
+
+
+def _stream(last_id, seconds):
+    yield f'retry: {RECONNECT_MS}\n\n'
+    deadline = time.monotonic() + seconds
+    while (remaining := deadline - time.monotonic()) > 0:
+        batch = events.bus.wait(last_id, min(HEARTBEAT_SECONDS, remaining))
+        if not batch:
+            yield ': keepalive\n\n'
+            continue
+        if batch[0]['id'] > last_id + 1:
+            # Older events fell out of the buffer; the page must reload
+            yield f'id: {batch[-1]["id"]}\nevent: reset\ndata: {{}}\n\n'
+        else:
+            for event in _with_locations([dict(event) for event in batch]):
+                yield f'id: {event["id"]}\nevent: stock\ndata: {json.dumps(event)}\n\n'
+        last_id = batch[-1]['id']
+
+
+class _StreamSlot:
+    """Stream content that frees its slot when the response is closed"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def __iter__(self):
+        return self._stream
+
+    def close(self):
+        # The server closes the response when the stream ends or the client
+        # goes away, whether or not the stream was ever started
+        self._stream.close()
+        events.release_stream()
+
+
+@login_required
+def event_stream(request):
+    """Stream add, remove and move events as text/event-stream"""
+    events.start_listener()
+
+    current = events.bus.last_id
+    # Pages reconnecting by hand (after a 503) pass the id as a parameter
+    last_event_id = request.headers.get(
+        'Last-Event-ID', request.GET.get('last_event_id', current)
+    )
+    try:
+        last_id = int(last_event_id)
+    except ValueError:
+        last_id = current
+    if last_id > current:
+        # An id from another process or from before a restart
+        last_id = current
+
+    if not events.acquire_stream():
+        # EventSource gives up on a 503; stock_events.js retries after a pause
+        response = HttpResponse(
+            f'retry: {BUSY_RETRY_MS}\n\n',
+            content_type='text/event-stream',
+            status=503,
+        )
+        response['Retry-After'] = str(BUSY_RETRY_MS // 1000)
+        return response
+
+    response = StreamingHttpResponse(
+        _StreamSlot(_stream(last_id, events.stream_seconds())),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -6,48 +6,55 @@ import io
 import xlsxwriter
 from datetime import timedelta
 
+from django.conf import settings
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import HttpResponse
-from django.urls import reverse
+from django.http import FileResponse, Http404, HttpResponse
 from django.utils import timezone
-from django.db.models import Q
-
-from warehouse.models import Room, Rack, Shelf, Category, ItemShelfAssignment
+from django.utils.cache import get_conditional_response
+from django.db.models import BooleanField, Case, Count, F, Max, Q, Value, When
+
+from ksp.routers import use_replica
+from warehouse.models import (
+    Room,
+    Rack,
+    Shelf,
+    Category,
+    ItemShelfAssignment,
+    ItemShelfAssignmentArchive,
+)
 from warehouse.forms import ExportForm
+from warehouse.views.as_of import stock_rows_as_of
 from warehouse.views.utils import is_admin
+from warehouse.qr import (
+    LABEL_CACHE_CONTROL,
+    LABEL_DIR,
+    find_location_by_uuid,
+    get_location_label,
+    label_etag,
+)
 
 
 @login_required
 @user_passes_test(is_admin)
 def generate_qr_codes(request):
     """Generate QR codes for shelves"""
-    # Get shelves with related entities to reduce db queries
-    shelves = (
-        Shelf.objects.all()
-        .select_related('rack', 'rack__room')
-        .order_by('rack__room__name', 'rack__name', 'number')
-    )
+    # Location display and ordering come from the shelf row, no joins needed
+    shelves = Shelf.objects.order_by('sort_key')
 
     if request.method == 'POST':
         selected_shelves = request.POST.getlist('shelves')
 
         if selected_shelves:
-            # Create an in-memory PDF file with QR codes
+            # Create an in-memory PDF file composed from cached QR label tiles
             from reportlab.pdfgen import canvas
             from reportlab.lib.pagesizes import A4
             from reportlab.lib.units import mm
-            import qrcode
-            import io
-            import tempfile
-            import os
-
-            # Get the selected shelves - select_related to avoid additional queries
-            selected_shelves = (
-                Shelf.objects.filter(id__in=selected_shelves)
-                .select_related('rack', 'rack__room')
-                .order_by('rack__room__name', 'rack__name', 'number')
+
+            # Get the selected shelves in location order
+            selected_shelves = Shelf.objects.filter(id__in=selected_shelves).order_by(
+                'sort_key'
             )
 
             # Create a BytesIO buffer to receive the PDF data
@@ -64,7 +71,7 @@ def generate_qr_codes(request):
             # Create the canvas
             p = canvas.Canvas(buffer, pagesize=A4)
 
-            # Generate QR codes for each shelf
+            # Place a QR code tile for each shelf
             qr_per_page = 4  # 2x2 grid
             for i, shelf in enumerate(selected_shelves):
                 if i > 0 and i % qr_per_page == 0:
@@ -79,46 +86,14 @@ def generate_qr_codes(request):
                 x = margin + col * (qr_size + spacing)
                 y = height - (margin + qr_size) - row * (qr_size + spacing)
 
-                # Generate QR code for the shelf's URL
-                qr = qrcode.QRCode(
-                    version=1,
-                    error_correction=qrcode.constants.ERROR_CORRECT_L,
-                    box_size=10,
-                    border=4,
-                )
-
                 # Make sure each shelf has a UUID
                 if not shelf.qr_code_uuid:
                     shelf.save()  # This will trigger the UUID generation
 
-                # Create the URL for the shelf detail page with the network IP
-                from warehouse.views.utils import build_network_absolute_uri
-
-                shelf_url = build_network_absolute_uri(
-                    request, reverse('warehouse:shelf_detail', kwargs={'pk': shelf.pk})
-                )
-
-                qr.add_data(shelf_url)
-                qr.make(fit=True)
-
-                # Create an image from the QR Code instance
-                img = qr.make_image(fill_color='black', back_color='white')
-
-                # Create a temporary file for the image
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-                temp_filename = temp_file.name
-
-                # Save the image to the temporary file
-                img.save(temp_filename)
-
-                # Draw the QR code image on the canvas from the file
-                p.drawImage(temp_filename, x, y, width=qr_size, height=qr_size)
-
-                # Clean up the temporary file
-                try:
-                    os.unlink(temp_filename)
-                except:  # noqa
-                    pass  # Ignore errors during cleanup
+                # Reuse the cached tile; it is only rendered on the first print
+                # or after the shelf URL or location changed
+                tile_path = get_location_label(request, shelf, fmt='png')
+                p.drawImage(str(tile_path), x, y, width=qr_size, height=qr_size)
 
                 # Draw shelf information below the QR code
                 p.setFont('Helvetica', 12)
@@ -146,8 +121,135 @@ def generate_qr_codes(request):
     return render(request, 'warehouse/generate_qr_codes.html', {'shelves': shelves})
 
 
+@login_required
+def qr_label(request, qr_uuid):
+    """Serve the cached SVG label of a shelf, rack or room"""
+    location = find_location_by_uuid(qr_uuid)
+    if location is None:
+        raise Http404('Nie znaleziono lokalizacji dla tego kodu QR.')
+
+    path = get_location_label(request, location, fmt='svg')
+    etag = label_etag(qr_uuid)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if settings.QR_LABEL_X_ACCEL_REDIRECT:
+            # nginx sends the file from its internal /media/qrcodes/ location
+            response = HttpResponse(content_type='image/svg+xml')
+            response['X-Accel-Redirect'] = (
+                f'{settings.MEDIA_URL}{LABEL_DIR}/{path.name}'
+            )
+        else:
+            response = FileResponse(open(path, 'rb'), content_type='image/svg+xml')
+    if etag:
+        response['ETag'] = etag
+    response['Cache-Control'] = LABEL_CACHE_CONTROL
+    return response
+
+
+def _group_assignments(assignments):
+    """Group live or archived assignments into export rows"""
+    return (
+        assignments.values(
+            'item__name',
+            'shelf',
+            'item__category',
+            'item__manufacturer',
+            'item__expiration_date',
+            'item__note',
+            'shelf__id',
+            'item__category__id',
+        )
+        .annotate(
+            item_name=F('item__name'),
+            count=Count('id'),
+            shelf_id=F('shelf__id'),
+            category_id=F('item__category__id'),
+            manufacturer=F('item__manufacturer'),
+            expiration_date=F('item__expiration_date'),
+            note=F('item__note'),
+            is_removed=Case(
+                When(remove_date__isnull=False, then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+            latest_remove_date=Max('remove_date'),
+        )
+        .order_by('item__name', 'shelf__id', 'is_removed')
+    )
+
+
+def _merge_groups(groups):
+    """
+    Merge export rows of the same group, e.g. a removal partly archived.
+
+    Counts are summed and the latest removal date is kept.
+    """
+    merged = {}
+    for group in groups:
+        key = (
+            group['item_name'],
+            group['shelf_id'],
+            group['category_id'],
+            group['manufacturer'],
+            group['expiration_date'],
+            group['note'],
+            group['is_removed'],
+        )
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = dict(group)
+            continue
+        existing['count'] += group['count']
+        dates = [
+            date
+            for date in (existing['latest_remove_date'], group['latest_remove_date'])
+            if date is not None
+        ]
+        existing['latest_remove_date'] = max(dates, default=None)
+    return list(merged.values())
+
+
+def _export_stock_as_of(day, shelves, category_id):
+    """Excel file with the stock at the end of a past day, per shelf and product"""
+    rows = stock_rows_as_of(day, shelves=shelves, category_id=category_id)
+
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output)
+    header_format = workbook.add_format(
+        {'bold': True, 'bg_color': '#4a86e8', 'font_color': 'white', 'border': 1}
+    )
+    cell_format = workbook.add_format({'border': 1})
+
+    worksheet = workbook.add_worksheet('Inwentarz')
+    worksheet.set_column('A:A', 25)
+    worksheet.set_column('B:B', 15)
+    worksheet.set_column('C:C', 20)
+    worksheet.set_column('D:D', 8)
+    for col, header in enumerate(
+        ['Nazwa przedmiotu', 'Kategoria', 'Lokalizacja', 'Liczba']
+    ):
+        worksheet.write(0, col, header, header_format)
+
+    for row_num, row in enumerate(rows, start=1):
+        worksheet.write(row_num, 0, row['product_name'], cell_format)
+        worksheet.write(row_num, 1, row['category'].name, cell_format)
+        worksheet.write(row_num, 2, row['shelf'].full_location, cell_format)
+        worksheet.write(row_num, 3, row['quantity'], cell_format)
+    workbook.close()
+
+    response = HttpResponse(
+        output.getvalue(),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="inventory_as_of_{day:%Y-%m-%d}.xlsx"'
+    )
+    return response
+
+
 @login_required
 @user_passes_test(is_admin)
+@use_replica
 def export_inventory(request):
     """Export inventory to Excel"""
     rooms = Room.objects.all()
@@ -174,6 +276,18 @@ def export_inventory(request):
             include_expired = form.cleaned_data.get('include_expired', False)
             include_removed = form.cleaned_data.get('include_removed', False)
 
+            as_of = form.cleaned_data.get('as_of')
+            if as_of and as_of < timezone.localdate():
+                if shelf_id:
+                    shelves = Shelf.objects.filter(pk=shelf_id)
+                elif rack_id:
+                    shelves = Shelf.objects.filter(rack_id=rack_id)
+                elif room_id:
+                    shelves = Shelf.objects.filter(rack__room_id=room_id)
+                else:
+                    shelves = None
+                return _export_stock_as_of(as_of, shelves, category_id)
+
             # Build query based on form data
             query = Q()
 
@@ -282,48 +396,20 @@ def export_inventory(request):
 
             # Group assignments by item name, shelf, category, and other properties
             # Similar to item_list view to maintain the same level of aggregation
-            from django.db.models import Count, F, Max, Case, When, Value, BooleanField
-
-            # Group items for the export
-            grouped_items_query = (
-                assignments.values(
-                    'item__name',
-                    'shelf',
-                    'item__category',
-                    'item__manufacturer',
-                    'item__expiration_date',
-                    'item__note',
-                    'shelf__id',
-                    'item__category__id',
+            groups = list(_group_assignments(assignments))
+            if include_removed:
+                # Removed assignments may have been moved to the history archive
+                archived = ItemShelfAssignmentArchive.objects.filter(query)
+                groups = _merge_groups([*groups, *_group_assignments(archived)])
+                groups.sort(
+                    key=lambda g: (g['item_name'], g['shelf_id'], g['is_removed'])
                 )
-                .annotate(
-                    item_name=F('item__name'),
-                    count=Count('id'),
-                    shelf_id=F('shelf__id'),
-                    category_id=F('item__category__id'),
-                    manufacturer=F('item__manufacturer'),
-                    expiration_date=F('item__expiration_date'),
-                    note=F('item__note'),
-                    is_removed=Case(
-                        When(remove_date__isnull=False, then=Value(True)),
-                        default=Value(False),
-                        output_field=BooleanField(),
-                    ),
-                    latest_remove_date=Max('remove_date'),
-                )
-                .order_by('item__name', 'shelf__id', 'is_removed')
-            )
 
             # Fetch related objects in bulk
-            shelf_ids = {item['shelf_id'] for item in grouped_items_query}
-            shelves = {
-                shelf.id: shelf
-                for shelf in Shelf.objects.filter(id__in=shelf_ids).select_related(
-                    'rack', 'rack__room'
-                )
-            }
+            shelf_ids = {item['shelf_id'] for item in groups}
+            shelves = Shelf.objects.in_bulk(shelf_ids)
 
-            category_ids = {item['category_id'] for item in grouped_items_query}
+            category_ids = {item['category_id'] for item in groups}
             categories = {
                 category.id: category
                 for category in Category.objects.filter(id__in=category_ids)
@@ -333,7 +419,7 @@ def export_inventory(request):
 
             row = 1  # Start from row 1 (after header)
 
-            for group in grouped_items_query:
+            for group in groups:
                 shelf = shelves.get(group['shelf_id'])
                 category = categories.get(group['category_id'])
 
@@ -477,7 +563,7 @@ def export_inventory(request):
                 row_num, 1, 'Tak' if include_removed else 'Nie', count_format
             )
 
-            # Add statistics
+            # Add statistics (from the groups, which include archived history)
             row_num += 2
             summary_sheet.write(row_num, 0, 'Statystyki', title_format)
             summary_sheet.write(row_num, 1, '', title_format)
@@ -486,26 +572,28 @@ def export_inventory(request):
             summary_sheet.write(
                 row_num, 0, 'Łączna liczba przedmiotów', subtitle_format
             )
-            summary_sheet.write(row_num, 1, assignments.count(), count_format)
+            summary_sheet.write(
+                row_num, 1, sum(g['count'] for g in groups), count_format
+            )
             row_num += 1
 
             # Count active items (not removed)
-            active_count = sum(1 for a in assignments if not a.remove_date)
+            active_count = sum(g['count'] for g in groups if not g['is_removed'])
             summary_sheet.write(row_num, 0, 'Aktywne przedmioty', subtitle_format)
             summary_sheet.write(row_num, 1, active_count, count_format)
             row_num += 1
 
             # Count removed items
-            removed_count = sum(1 for a in assignments if a.remove_date)
+            removed_count = sum(g['count'] for g in groups if g['is_removed'])
             summary_sheet.write(row_num, 0, 'Usunięte przedmioty', subtitle_format)
             summary_sheet.write(row_num, 1, removed_count, count_format)
             row_num += 1
 
             # Count expired items
             expired_count = sum(
-                1
-                for a in assignments
-                if a.item.expiration_date and a.item.expiration_date < today
+                g['count']
+                for g in groups
+                if g['expiration_date'] and g['expiration_date'] < today
             )
             summary_sheet.write(
                 row_num, 0, 'Przeterminowane przedmioty', subtitle_format
@@ -515,10 +603,10 @@ def export_inventory(request):
 
             # Count items expiring in next 30 days
             expiring_soon = sum(
-                1
-                for a in assignments
-                if a.item.expiration_date
-                and today <= a.item.expiration_date <= today + timedelta(days=30)
+                g['count']
+                for g in groups
+                if g['expiration_date']
+                and today <= g['expiration_date'] <= today + timedelta(days=30)
             )
             summary_sheet.write(
                 row_num, 0, 'Przedmioty kończące się w ciągu 30 dni', subtitle_format
@@ -534,11 +622,11 @@ def export_inventory(request):
 
             # Get category statistics
             category_stats = {}
-            for assignment in assignments:
-                category_name = assignment.item.category.name
+            for group in groups:
+                category_name = categories[group['category_id']].name
                 if category_name not in category_stats:
                     category_stats[category_name] = 0
-                category_stats[category_name] += 1
+                category_stats[category_name] += group['count']
 
             # Sort categories by name and write to sheet
             for category_name in sorted(category_stats.keys()):
@@ -558,11 +646,11 @@ def export_inventory(request):
 
             # Get location statistics
             location_stats = {}
-            for assignment in assignments:
-                location = assignment.shelf.full_location
+            for group in groups:
+                location = shelves[group['shelf_id']].full_location
                 if location not in location_stats:
                     location_stats[location] = 0
-                location_stats[location] += 1
+                location_stats[location] += group['count']
 
             # Sort locations and write to sheet
             for location in sorted(location_stats.keys()):
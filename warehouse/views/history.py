@@ -2,54 +2,237 @@
 History views for tracking item additions and removals.
 """
 
+from django.contrib.auth.models import User
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Q, Case, When, DateTimeField, F
+from django.db.models import BooleanField, Q, Case, When, DateTimeField, F, Value
 from django.utils import timezone
 from django.core.paginator import Paginator
 
-from warehouse.models import ItemShelfAssignment
+from ksp.routers import use_replica
+from warehouse.models import (
+    ItemShelfAssignment,
+    ItemShelfAssignmentArchive,
+    OperationBatch,
+)
 from warehouse.views.utils import is_admin
 
+VIEW_OPERATIONS = 'operations'
+VIEW_UNITS = 'units'
+
+HISTORY_PAGE_SIZE = 50
+
 
 @login_required
 @user_passes_test(is_admin)
+@use_replica
 def history_list(request):
-    """List view of all item additions and removals"""
+    """
+    List view of all item additions and removals.
+
+    By default one row is one operation (an OperationBatch, e.g. "50 x Ryż
+    added"); `view=units` lists single units, optionally only those of one
+    operation (`batch`).
+    """
     # Get filter parameters
+    view = request.GET.get('view')
+    if view != VIEW_UNITS:
+        view = VIEW_OPERATIONS
+    batch_id = request.GET.get('batch')
+    if not (batch_id or '').isdigit():
+        batch_id = None
     room_id = request.GET.get('room')
     rack_id = request.GET.get('rack')
     shelf_id = request.GET.get('shelf')
-    username = request.GET.get('username')
+    # The user autocomplete submits ids, so the filter hits the user indexes
+    user_id = request.GET.get('user')
+    if not (user_id or '').isdigit():
+        user_id = None
     item_search = request.GET.get('search')
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     action_type = request.GET.get('action_type')  # 'add' or 'remove'
 
-    # Base queryset with all related data to minimize database hits
-    assignments = ItemShelfAssignment.objects.select_related(
-        'item',
-        'shelf',
-        'shelf__rack',
-        'shelf__rack__room',
-        'item__category',
-        'added_by',
-        'removed_by',
+    # Live and archived assignments are filtered the same way (their columns
+    # match); the page is sorted across both tables and hydrated afterwards
+    filters = {
+        'room_id': room_id,
+        'rack_id': rack_id,
+        'shelf_id': shelf_id,
+        'user_id': user_id,
+        'item_search': item_search,
+        'date_from': date_from,
+        'date_to': date_to,
+        'action_type': action_type,
+    }
+    if view == VIEW_OPERATIONS:
+        history = _filter_operations(OperationBatch.objects.all(), **filters)
+    else:
+        live = _filter_history(
+            ItemShelfAssignment.objects.all(), batch_id=batch_id, **filters
+        )
+        history = live.annotate(archived=Value(False, output_field=BooleanField()))
+        if action_type != 'add':
+            # Archived assignments are always removals
+            archived = _filter_history(
+                ItemShelfAssignmentArchive.objects.all(), batch_id=batch_id, **filters
+            ).annotate(archived=Value(True, output_field=BooleanField()))
+            history = history.union(archived, all=True)
+        history = history.order_by('-sort_date', '-id')
+
+    # Get total count for stats (before pagination)
+    total_count = history.count()
+
+    # Add pagination
+    paginator = Paginator(history, HISTORY_PAGE_SIZE)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
+    if view == VIEW_UNITS:
+        page_obj.object_list = _hydrate_history(page_obj.object_list)
+
+    # Get all rooms for filter dropdown (for consistent UI with other list views)
+    from warehouse.models import Room, Rack, Shelf
+
+    rooms = Room.objects.all()
+
+    # Get racks filtered by room if needed
+    racks = Rack.objects.all()
+    if room_id:
+        racks = racks.filter(room_id=room_id)
+
+    # Get shelves filtered by rack or room if needed
+    shelves = Shelf.objects.all()
+    if rack_id:
+        shelves = shelves.filter(rack_id=rack_id)
+    elif room_id:
+        shelves = shelves.filter(rack__room_id=room_id)
+
+    return render(
+        request,
+        'warehouse/history_list.html',
+        {
+            'assignments': page_obj,
+            'page_obj': page_obj,
+            'total_count': total_count,
+            'rooms': rooms,
+            'racks': racks,
+            'shelves': shelves,
+            'selected_room': room_id,
+            'selected_rack': rack_id,
+            'selected_shelf': shelf_id,
+            'selected_user': User.objects.filter(pk=user_id).first()
+            if user_id
+            else None,
+            'search_query': item_search,
+            'date_from': date_from,
+            'date_to': date_to,
+            'action_type': action_type,
+            'view': view,
+            'batch': OperationBatch.objects.filter(pk=batch_id).first()
+            if batch_id
+            else None,
+        },
     )
 
+
+def _day_bounds(value, end=False):
+    """Aware start (or end) of a YYYY-MM-DD day, None if it does not parse"""
+    try:
+        day = timezone.datetime.strptime(value, '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        return None
+    time = timezone.datetime.max.time() if end else timezone.datetime.min.time()
+    return timezone.make_aware(timezone.datetime.combine(day, time))
+
+
+def _filter_operations(
+    batches,
+    room_id=None,
+    rack_id=None,
+    shelf_id=None,
+    user_id=None,
+    item_search=None,
+    date_from=None,
+    date_to=None,
+    action_type=None,
+):
+    """
+    Apply history filters to operation batches, newest first.
+
+    Moves match the location filters on either shelf and count as removals
+    (they take units off their source shelf).
+    """
+    batches = batches.filter(quantity__gt=0)
+    if room_id:
+        batches = batches.filter(
+            Q(shelf__rack__room_id=room_id) | Q(target_shelf__rack__room_id=room_id)
+        )
+    if rack_id:
+        batches = batches.filter(
+            Q(shelf__rack_id=rack_id) | Q(target_shelf__rack_id=rack_id)
+        )
+    if shelf_id:
+        batches = batches.filter(Q(shelf_id=shelf_id) | Q(target_shelf_id=shelf_id))
+    if user_id:
+        batches = batches.filter(user_id=user_id)
+    if item_search:
+        batches = batches.filter(name__icontains=item_search)
+    if from_datetime := _day_bounds(date_from):
+        batches = batches.filter(minute__gte=from_datetime)
+    if to_datetime := _day_bounds(date_to, end=True):
+        batches = batches.filter(minute__lte=to_datetime)
+    if action_type == 'add':
+        batches = batches.filter(kind=OperationBatch.KIND_ADD)
+    elif action_type == 'remove':
+        batches = batches.exclude(kind=OperationBatch.KIND_ADD)
+
+    return batches.select_related(
+        'user',
+        'category',
+        'shelf__rack__room',
+        'target_shelf__rack__room',
+    ).order_by('-minute', '-id')
+
+
+def _filter_history(
+    assignments,
+    room_id=None,
+    rack_id=None,
+    shelf_id=None,
+    user_id=None,
+    item_search=None,
+    date_from=None,
+    date_to=None,
+    action_type=None,
+    batch_id=None,
+):
+    """
+    Apply history filters to live or archived assignments.
+
+    Returns `id`/`sort_date` values, ready to be combined with union().
+    """
     # Apply filters if provided
+    if batch_id:
+        # Units opened or closed by one operation
+        assignments = assignments.filter(
+            Q(added_batch_id=batch_id) | Q(removed_batch_id=batch_id)
+        )
     if room_id:
         assignments = assignments.filter(shelf__rack__room_id=room_id)
     if rack_id:
         assignments = assignments.filter(shelf__rack_id=rack_id)
     if shelf_id:
         assignments = assignments.filter(shelf_id=shelf_id)
-    if username:
-        # Filter by either added_by or removed_by username
-        assignments = assignments.filter(
-            Q(added_by__username__icontains=username)
-            | Q(removed_by__username__icontains=username)
-        )
+    if user_id:
+        # Each side has a (user, date) index; only unfiltered actions need both
+        if action_type == 'add':
+            assignments = assignments.filter(added_by_id=user_id)
+        elif action_type == 'remove':
+            assignments = assignments.filter(removed_by_id=user_id)
+        else:
+            assignments = assignments.filter(
+                Q(added_by_id=user_id) | Q(removed_by_id=user_id)
+            )
     if item_search:
         # Filter by item name
         assignments = assignments.filter(item__name__icontains=item_search)
@@ -92,68 +275,56 @@ def history_list(request):
 
     # Filter by action type if provided
     if action_type == 'add':
-        # Only show additions (not removed)
+        # Only show additions (not removed), most recent additions first
         assignments = assignments.filter(remove_date__isnull=True)
-        # Sort by most recent additions first
-        assignments = assignments.order_by('-add_date')
+        sort_date = F('add_date')
     elif action_type == 'remove':
-        # Only show removals (filter for non-null remove_date)
+        # Only show removals, most recent removals first
         assignments = assignments.filter(remove_date__isnull=False)
-        # Sort by most recent removals first
-        assignments = assignments.order_by('-remove_date')
+        sort_date = F('remove_date')
     else:
-        # Show all actions (both additions and removals)
-        # Annotate with the latest operation date (remove_date if exists, else add_date)
-        assignments = assignments.annotate(
-            latest_operation=Case(
-                When(remove_date__isnull=False, then=F('remove_date')),
-                default=F('add_date'),
-                output_field=DateTimeField(),
-            )
-        ).order_by('-latest_operation')
-
-    # Get total count for stats (before pagination)
-    total_count = assignments.count()
-
-    # Add pagination
-    paginator = Paginator(assignments, 50)  # Show 50 items per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    # Get all rooms for filter dropdown (for consistent UI with other list views)
-    from warehouse.models import Room, Rack, Shelf
+        # Show all actions, sorted by the latest operation date
+        # (remove_date if exists, else add_date)
+        sort_date = Case(
+            When(remove_date__isnull=False, then=F('remove_date')),
+            default=F('add_date'),
+            output_field=DateTimeField(),
+        )
 
-    rooms = Room.objects.all()
+    return assignments.annotate(sort_date=sort_date).values('id', 'sort_date')
 
-    # Get racks filtered by room if needed
-    racks = Rack.objects.all()
-    if room_id:
-        racks = racks.filter(room_id=room_id)
 
-    # Get shelves filtered by rack or room if needed
-    shelves = Shelf.objects.all()
-    if rack_id:
-        shelves = shelves.filter(rack_id=rack_id)
-    elif room_id:
-        shelves = shelves.filter(rack__room_id=room_id)
-
-    return render(
-        request,
-        'warehouse/history_list.html',
-        {
-            'assignments': page_obj,
-            'page_obj': page_obj,
-            'total_count': total_count,
-            'rooms': rooms,
-            'racks': racks,
-            'shelves': shelves,
-            'selected_room': room_id,
-            'selected_rack': rack_id,
-            'selected_shelf': shelf_id,
-            'username': username,
-            'search_query': item_search,
-            'date_from': date_from,
-            'date_to': date_to,
-            'action_type': action_type,
-        },
+def _hydrate_history(rows):
+    """Load the live and archived assignments of one page, keeping its order"""
+    related = (
+        'item',
+        'shelf',
+        'shelf__rack',
+        'shelf__rack__room',
+        'item__category',
+        'added_by',
+        'removed_by',
     )
+    rows = list(rows)
+    live_ids = [row['id'] for row in rows if not row['archived']]
+    archived_ids = [row['id'] for row in rows if row['archived']]
+    objects = {
+        (False, obj.id): obj
+        for obj in ItemShelfAssignment.objects.filter(id__in=live_ids).select_related(
+            *related
+        )
+    }
+    if archived_ids:
+        objects.update(
+            {
+                (True, obj.id): obj
+                for obj in ItemShelfAssignmentArchive.objects.filter(
+                    id__in=archived_ids
+                ).select_related(*related)
+            }
+        )
+    return [
+        objects[(row['archived'], row['id'])]
+        for row in rows
+        if (row['archived'], row['id']) in objects
+    ]
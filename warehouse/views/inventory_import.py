@@ -0,0 +1,79 @@
+"""
+Inventory import views.
+"""
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse
+
+from warehouse.forms import ImportForm
+from warehouse.importer import start_import_job
+from warehouse.models import BulkOperation
+from warehouse.views.utils import is_admin
+
+
+@login_required
+@user_passes_test(is_admin)
+def import_inventory(request):
+    """Upload a CSV/XLSX inventory file and start a background import"""
+    if request.method == 'POST':
+        form = ImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            operation = start_import_job(
+                upload.read(),
+                upload.name,
+                request.user,
+                dry_run=form.cleaned_data['dry_run'],
+                create_categories=form.cleaned_data['create_categories'],
+            )
+            if form.cleaned_data['dry_run']:
+                messages.info(request, 'Rozpoczęto sprawdzanie pliku.')
+            elif operation.processed:
+                messages.info(
+                    request,
+                    'Wznowiono przerwany import tego pliku '
+                    f'({operation.processed} z {operation.total} już zapisanych).',
+                )
+            else:
+                messages.info(request, 'Rozpoczęto import inwentarza.')
+            return redirect(
+                f'{reverse("warehouse:import_inventory")}?job={operation.key}'
+            )
+    else:
+        form = ImportForm()
+
+    job = None
+    job_key = request.GET.get('job')
+    if job_key:
+        job = BulkOperation.objects.filter(
+            key=job_key, kind=BulkOperation.KIND_IMPORT
+        ).first()
+
+    return render(
+        request, 'warehouse/import_inventory.html', {'form': form, 'job': job}
+    )
+
+
+@login_required
+@user_passes_test(is_admin)
+def import_inventory_status(request, key):
+    """AJAX endpoint with the progress and result of an import job"""
+    operation = BulkOperation.objects.filter(
+        key=key, kind=BulkOperation.KIND_IMPORT
+    ).first()
+    if operation is None:
+        return JsonResponse({'error': 'Unknown import'}, status=404)
+
+    return JsonResponse(
+        {
+            'status': operation.status,
+            'total': operation.total,
+            'total_processed': operation.processed,
+            'progress': operation.progress,
+            'dry_run': operation.params.get('dry_run', False),
+            'result': operation.result,
+        }
+    )
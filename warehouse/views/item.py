@@ -2,6 +2,9 @@
 Item management views.
 """
 
+import json
+from datetime import date
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -10,12 +13,29 @@ from django.db import transaction
 from django.http import JsonResponse
 from django.urls import reverse
 
-from warehouse.models import Shelf, Category, Item, ItemShelfAssignment, Room
+from warehouse.models import (
+    BulkOperation,
+    Shelf,
+    Category,
+    ItemShelfAssignment,
+    OperationBatch,
+    Room,
+)
+from warehouse.events import EVENT_REMOVE, publish_stock_event
 from warehouse.forms import ItemShelfAssignmentForm
-from warehouse.views.location import (
-    batch_move_items_between_shelves,
-    move_item_between_shelves,
+from warehouse.stock import (
+    add_items_to_shelf,
+    close_units,
+    group_assignments,
+    item_product,
+    move_group,
+    move_groups,
+    operation_batch,
 )
+from warehouse.views.location import move_item_between_shelves
+
+# Upper bound of groups moved by one request
+MAX_MOVE_GROUPS = 500
 
 
 @login_required
@@ -66,56 +86,18 @@ def add_item_to_shelf(request, shelf_id):
                 }
                 return render(request, 'warehouse/add_item.html', context)
 
-            # Use transaction to ensure all database operations succeed or fail together
+            # Items are created in bulk batches inside a single transaction
             try:
-                # Determine optimal batch size based on quantity
-                # Larger quantities can use larger batches for better performance
-                if quantity <= 1000:
-                    batch_size = 1000
-                elif quantity <= 10000:
-                    batch_size = 2500
-                else:
-                    batch_size = 5000
-
-                # SQLite doesn't support parallel processing well due to locking
-                # So we'll use the optimized single-thread approach
-                with transaction.atomic():
-                    remaining = quantity
-
-                    while remaining > 0:
-                        # Process in batches of batch_size or remaining items, whichever is smaller
-                        current_batch = min(batch_size, remaining)
-
-                        # Create items for this batch - use a list comprehension instead of
-                        # appending in a loop for better performance
-                        items_to_create = [
-                            Item(
-                                name=item_name,
-                                category=category,
-                                manufacturer=manufacturer,
-                                expiration_date=expiration_date,
-                                note=note,
-                            )
-                            for _ in range(current_batch)
-                        ]
-
-                        # Bulk create the items for this batch
-                        created_items = Item.objects.bulk_create(items_to_create)
-
-                        # Create assignments for this batch of items - use a list comprehension
-                        # for better performance
-                        assignments_to_create = [
-                            ItemShelfAssignment(
-                                item=item, shelf=shelf, added_by=request.user
-                            )
-                            for item in created_items
-                        ]
-
-                        # Bulk create the assignments for this batch
-                        ItemShelfAssignment.objects.bulk_create(assignments_to_create)
-
-                        # Update remaining count
-                        remaining -= current_batch
+                add_items_to_shelf(
+                    shelf,
+                    request.user,
+                    quantity,
+                    name=item_name,
+                    category=category,
+                    manufacturer=manufacturer,
+                    expiration_date=expiration_date,
+                    note=note,
+                )
 
                 messages.success(
                     request,
@@ -211,17 +193,31 @@ def remove_item_from_shelf(request, pk):
             }
             return render(request, 'warehouse/remove_item.html', context)
 
-        # Mark the specified number of assignments as removed
-        assignments_to_remove = matching_assignments[:quantity]
-        for assignment_to_remove in assignments_to_remove:
-            assignment_to_remove.remove_date = timezone.now()
-            assignment_to_remove.removed_by = request.user
-            assignment_to_remove.save()
-
-        messages.success(
-            request,
-            f'{quantity} przedmiot(ów) "{item_name}" zostało pomyślnie zdjętych z półki.',
-        )
+        # Another volunteer may have taken some of the units since the page
+        # was loaded, so report what was really removed
+        with transaction.atomic():
+            batch = operation_batch(
+                OperationBatch.KIND_REMOVE,
+                request.user,
+                shelf_id,
+                item_product(assignment.item),
+            )
+            removed = close_units(
+                matching_assignments, request.user, quantity, batch=batch
+            )
+            batch.add_units(removed)
+            publish_stock_event(EVENT_REMOVE, shelf_id, removed, item_name)
+        if removed < quantity:
+            messages.warning(
+                request,
+                f'Zdjęto tylko {removed} z {quantity} przedmiot(ów) "{item_name}" '
+                '- pozostałe zostały już zdjęte przez kogoś innego.',
+            )
+        else:
+            messages.success(
+                request,
+                f'{quantity} przedmiot(ów) "{item_name}" zostało pomyślnie zdjętych z półki.',
+            )
 
         # Redirect to the next URL if provided, otherwise to shelf detail
         if next_url:
@@ -241,6 +237,62 @@ def remove_item_from_shelf(request, pk):
     )
 
 
+class BulkOperationConflict(Exception):
+    """The idempotency key was already used for a different operation"""
+
+
+def _bulk_operation_for(request, kind, total, params):
+    """
+    Fetch and lock the BulkOperation named by the request's `operation_key`.
+
+    Returns None for legacy clients that do not send a key. Must be called
+    inside a transaction so the cursor is advanced atomically with the batch.
+    """
+    key = request.POST.get('operation_key', '').strip()
+    if not key:
+        return None
+    if len(key) > 64:
+        raise BulkOperationConflict('Operation key is too long')
+
+    operation, created = BulkOperation.objects.select_for_update().get_or_create(
+        key=key,
+        defaults={
+            'kind': kind,
+            'user': request.user,
+            'params': params,
+            'total': total,
+        },
+    )
+    if not created and (
+        operation.kind != kind
+        or operation.user_id != request.user.id
+        or operation.params != params
+        or operation.total != total
+    ):
+        raise BulkOperationConflict(
+            'Operation key was already used for a different operation'
+        )
+    return operation
+
+
+def _bulk_operation_response(operation, message, **extra):
+    """Progress response for a batch that was not applied (replay or resume)"""
+    return JsonResponse(
+        {
+            'success': True,
+            'complete': operation.status == BulkOperation.STATUS_COMPLETE,
+            'replayed': True,
+            'progress': operation.progress,
+            'processed': 0,
+            'total_processed': operation.processed,
+            'remaining': operation.remaining,
+            'offset': operation.processed,
+            'message': message,
+            **extra,
+        }
+    )
+
+
 @login_required
 def ajax_bulk_add_items(request):
     """AJAX endpoint for adding large quantities of items with progress tracking"""
@@ -254,8 +306,6 @@ def ajax_bulk_add_items(request):
         category_id = int(request.POST.get('category_id'))
         manufacturer = request.POST.get('manufacturer', '').strip() or None
         expiration_date = request.POST.get('expiration_date')
-        # Get the next URL if provided
-        next_url = request.POST.get('next', '')
         if expiration_date and expiration_date != 'null':
             # Parse ISO format date
             from datetime import datetime
@@ -283,49 +333,60 @@ def ajax_bulk_add_items(request):
     except (Shelf.DoesNotExist, Category.DoesNotExist):
         return JsonResponse({'error': 'Invalid shelf or category'}, status=400)
 
-    # Calculate how many items to process in this request
-    items_to_process = min(batch_size, quantity - offset)
-
-    if items_to_process <= 0:
-        # All items have been processed
-        return JsonResponse(
-            {
-                'success': True,
-                'complete': True,
-                'message': f'Successfully added {quantity} items',
-                'total_processed': quantity,
-                'next_url': next_url,
-            }
-        )
+    operation_params = {
+        'shelf_id': shelf_id,
+        'item_name': item_name,
+        'category_id': category_id,
+        'manufacturer': manufacturer,
+        'expiration_date': expiration_date.isoformat() if expiration_date else None,
+        'note': note,
+    }
 
     # Use transaction to ensure all database operations succeed or fail together
     try:
         start_time = timezone.now()
 
         with transaction.atomic():
-            # Create items for this batch
-            items_to_create = [
-                Item(
-                    name=item_name,
-                    category=category,
-                    manufacturer=manufacturer,
-                    expiration_date=expiration_date,
-                    note=note,
+            operation = _bulk_operation_for(
+                request, BulkOperation.KIND_ADD, quantity, operation_params
+            )
+            if operation is not None and offset != operation.processed:
+                # A retried or out-of-order batch: the server-side cursor is
+                # authoritative, so report it instead of adding units twice
+                return _bulk_operation_response(
+                    operation,
+                    f'Batch at offset {offset} already applied',
+                    next_url=next_url,
                 )
-                for _ in range(items_to_process)
-            ]
 
-            # Bulk create the items for this batch
-            created_items = Item.objects.bulk_create(items_to_create)
+            # Calculate how many items to process in this request
+            items_to_process = min(batch_size, quantity - offset)
+
+            if items_to_process <= 0:
+                # All items have been processed
+                return JsonResponse(
+                    {
+                        'success': True,
+                        'complete': True,
+                        'message': f'Successfully added {quantity} items',
+                        'total_processed': quantity,
+                        'next_url': next_url,
+                    }
+                )
 
-            # Create assignments for this batch of items
-            assignments_to_create = [
-                ItemShelfAssignment(item=item, shelf=shelf, added_by=request.user)
-                for item in created_items
-            ]
+            add_items_to_shelf(
+                shelf,
+                request.user,
+                items_to_process,
+                name=item_name,
+                category=category,
+                manufacturer=manufacturer,
+                expiration_date=expiration_date,
+                note=note,
+            )
 
-            # Bulk create the assignments for this batch
-            ItemShelfAssignment.objects.bulk_create(assignments_to_create)
+            if operation is not None:
+                operation.advance(items_to_process)
 
         end_time = timezone.now()
         duration = (end_time - start_time).total_seconds()
@@ -349,10 +410,13 @@ def ajax_bulk_add_items(request):
                 'duration': duration,
                 'items_per_second': items_per_second,
                 'offset': new_offset,  # Pass the new offset for the next batch
+                'next_url': next_url,
                 'message': f'Processed {items_to_process} items in {duration:.2f} seconds ({items_per_second:.2f} items/s)',
             }
         )
 
+    except BulkOperationConflict as e:
+        return JsonResponse({'error': str(e)}, status=409)
     except Exception as e:
         return JsonResponse(
             {'error': f'Error processing items: {str(e)}', 'offset': offset}, status=500
@@ -373,10 +437,6 @@ def ajax_bulk_remove_items(request):
         offset = int(request.POST.get('offset', 0))
         # Get the next URL if provided
         next_url = request.POST.get('next', '')
-
-        # Debug information
-        print(f'Request POST data: {request.POST}')
-        print(f'Assignment ID: {assignment_id}')
     except (ValueError, TypeError) as e:
         return JsonResponse({'error': f'Invalid parameters: {str(e)}'}, status=400)
 
@@ -384,76 +444,88 @@ def ajax_bulk_remove_items(request):
     if not all([assignment_id, quantity > 0]):
         return JsonResponse({'error': 'Missing required parameters'}, status=400)
 
-    # Get the assignment
+    # Get the assignment (it may already be removed by an earlier batch)
     try:
-        # Try to get the assignment, first by looking for one that's not removed
-        try:
-            assignment = ItemShelfAssignment.objects.get(
-                pk=assignment_id, remove_date__isnull=True
-            )
-        except ItemShelfAssignment.DoesNotExist:
-            # If that fails, look for any assignment with this ID, even if it's already removed
-            assignment = ItemShelfAssignment.objects.get(pk=assignment_id)
-            print(f'Found assignment {assignment.pk} but it was already removed')
+        assignment = ItemShelfAssignment.objects.select_related('item').get(
+            pk=assignment_id
+        )
     except ItemShelfAssignment.DoesNotExist:
         return JsonResponse(
             {'error': f'Invalid assignment ID: {assignment_id}'}, status=400
         )
 
     # Get all matching assignments
-    try:
-        matching_assignments = ItemShelfAssignment.objects.filter(
-            item__name=assignment.item.name,
-            shelf_id=assignment.shelf.pk,
-            remove_date__isnull=True,
-            item__category=assignment.item.category,
-            item__manufacturer=assignment.item.manufacturer,
-            item__expiration_date=assignment.item.expiration_date,
-            item__note=assignment.item.note,
-        ).select_related('item')
-
-        total_available = matching_assignments.count()
-
-        if total_available == 0:
-            return JsonResponse(
-                {'error': 'No matching items available for removal'}, status=400
-            )
-    except Exception as e:
-        return JsonResponse(
-            {'error': f'Error finding matching assignments: {str(e)}'}, status=400
-        )
-
-    # Calculate how many items to process in this request
-    items_to_process = min(batch_size, quantity - offset)
-
-    if items_to_process <= 0:
-        # All items have been processed
-        return JsonResponse(
-            {
-                'success': True,
-                'complete': True,
-                'message': f'Successfully removed {quantity} items',
-                'total_processed': quantity,
-                'remaining': 0,
-                'progress': 100,
-                'next': next_url,
-            }
-        )
+    matching_assignments = ItemShelfAssignment.objects.filter(
+        item__name=assignment.item.name,
+        shelf_id=assignment.shelf_id,
+        remove_date__isnull=True,
+        item__category_id=assignment.item.category_id,
+        item__manufacturer=assignment.item.manufacturer,
+        item__expiration_date=assignment.item.expiration_date,
+        item__note=assignment.item.note,
+    )
 
     # Use transaction to ensure all database operations succeed or fail together
     try:
         start_time = timezone.now()
 
         with transaction.atomic():
-            # Get the batch of assignments to remove
-            assignments_to_remove = list(matching_assignments[0:items_to_process])
+            operation = _bulk_operation_for(
+                request,
+                BulkOperation.KIND_REMOVE,
+                quantity,
+                {'assignment_id': assignment_id},
+            )
+            if operation is not None and offset != operation.processed:
+                # A retried or out-of-order batch: report the server-side cursor
+                # instead of removing more units than requested
+                return _bulk_operation_response(
+                    operation,
+                    f'Batch at offset {offset} already applied',
+                    next=next_url,
+                )
+
+            # Calculate how many items to process in this request
+            items_to_process = min(batch_size, quantity - offset)
+
+            if items_to_process <= 0:
+                # All items have been processed
+                return JsonResponse(
+                    {
+                        'success': True,
+                        'complete': True,
+                        'message': f'Successfully removed {quantity} items',
+                        'total_processed': quantity,
+                        'remaining': 0,
+                        'progress': 100,
+                        'next': next_url,
+                    }
+                )
 
-            # Mark all assignments in this batch as removed
-            current_time = timezone.now()
-            for assignment_to_remove in assignments_to_remove:
-                assignment_to_remove.remove_date = current_time
-                assignment_to_remove.removed_by = request.user
-                assignment_to_remove.save(update_fields=['remove_date', 'removed_by'])
+            # Remove the batch; concurrent removals get different units
+            batch = operation_batch(
+                OperationBatch.KIND_REMOVE,
+                request.user,
+                assignment.shelf_id,
+                item_product(assignment.item),
+            )
+            items_to_process = close_units(
+                matching_assignments, request.user, items_to_process, batch=batch
+            )
+            if not items_to_process:
+                return JsonResponse(
+                    {'error': 'No matching items available for removal'}, status=400
+                )
+            batch.add_units(items_to_process)
+            publish_stock_event(
+                EVENT_REMOVE,
+                assignment.shelf_id,
+                items_to_process,
+                assignment.item.name,
+            )
+
+            if operation is not None:
+                operation.advance(items_to_process)
 
         end_time = timezone.now()
         duration = (end_time - start_time).total_seconds()
@@ -481,12 +553,35 @@ def ajax_bulk_remove_items(request):
             }
         )
 
+    except BulkOperationConflict as e:
+        return JsonResponse({'error': str(e)}, status=409)
     except Exception as e:
         return JsonResponse(
             {'error': f'Error processing items: {str(e)}', 'offset': offset}, status=500
         )
 
 
+@login_required
+def ajax_bulk_operation_status(request, key):
+    """AJAX endpoint reporting the server-side cursor of a bulk operation"""
+    operation = BulkOperation.objects.filter(key=key, user=request.user).first()
+    if operation is None:
+        return JsonResponse({'error': 'Unknown operation'}, status=404)
+
+    return JsonResponse(
+        {
+            'kind': operation.kind,
+            'status': operation.status,
+            'total': operation.total,
+            'total_processed': operation.processed,
+            'remaining': operation.remaining,
+            'progress': operation.progress,
+            'offset': operation.processed,
+            'complete': operation.status == BulkOperation.STATUS_COMPLETE,
+        }
+    )
+
+
 @login_required
 def add_new_item(request):
     """Add a new item with shelf selection - first step: select location"""
@@ -551,20 +646,18 @@ def move_group_items(request):
     )
     category = get_object_or_404(Category, pk=category_id)
 
-    # Find all items matching the criteria
-    matching_items = Item.objects.filter(
-        name=item_name,
-        category=category,
-        manufacturer=manufacturer if manufacturer else None,
-        expiration_date=expiration_date if expiration_date else None,
-    )
-
-    # Find all active assignments for these items on the source shelf
-    matching_assignments = ItemShelfAssignment.objects.filter(
-        item__in=matching_items, shelf=source_shelf, remove_date__isnull=True
-    ).select_related('item')
-
-    items_count = matching_assignments.count()
+    items_count = group_assignments(
+        source_shelf, item_name, category, manufacturer, expiration_date
+    ).count()
+    context = {
+        'rooms': Room.objects.all().order_by('name'),
+        'source_shelf': source_shelf,
+        'item_name': item_name,
+        'category': category,
+        'manufacturer': manufacturer,
+        'expiration_date': expiration_date,
+        'items_count': items_count,
+    }
 
     if request.method == 'POST':
         # Process form submission - get the target shelf ID
@@ -572,85 +665,146 @@ def move_group_items(request):
 
         if not target_shelf_id:
             messages.error(request, 'Proszę wybrać półkę docelową.')
-            # Get all rooms to repopulate the form
-            rooms = Room.objects.all().order_by('name')
-            return render(
-                request,
-                'warehouse/move_items.html',
-                {
-                    'rooms': rooms,
-                    'source_shelf': source_shelf,
-                    'item_name': item_name,
-                    'category': category,
-                    'manufacturer': manufacturer,
-                    'expiration_date': expiration_date,
-                    'items_count': items_count,
-                },
-            )
+            return render(request, 'warehouse/move_items.html', context)
 
         # Don't allow moving to the same shelf
         if int(target_shelf_id) == int(source_shelf_id):
             messages.error(request, 'Nie można przenieść przedmiotów na tę samą półkę.')
-            rooms = Room.objects.all().order_by('name')
-            return render(
+            return render(request, 'warehouse/move_items.html', context)
+
+        # An empty quantity moves the whole group
+        quantity = request.POST.get('quantity') or None
+        if quantity is not None:
+            try:
+                quantity = int(quantity)
+            except ValueError:
+                quantity = 0
+            if not 1 <= quantity <= items_count:
+                messages.error(request, f'Ilość musi być liczbą od 1 do {items_count}.')
+                return render(request, 'warehouse/move_items.html', context)
+
+        target_shelf = get_object_or_404(Shelf, pk=target_shelf_id)
+        moved_count = move_group(
+            source_shelf,
+            target_shelf,
+            request.user,
+            item_name,
+            category,
+            manufacturer,
+            expiration_date,
+            quantity=quantity,
+        )
+
+        if moved_count > 0:
+            messages.success(
                 request,
-                'warehouse/move_items.html',
-                {
-                    'rooms': rooms,
-                    'source_shelf': source_shelf,
-                    'item_name': item_name,
-                    'category': category,
-                    'manufacturer': manufacturer,
-                    'expiration_date': expiration_date,
-                    'items_count': items_count,
-                },
+                f'{moved_count} przedmiot(ów) "{item_name}" zostało pomyślnie przeniesionych na półkę {target_shelf.full_location}.',
             )
+            return redirect('warehouse:shelf_detail', pk=target_shelf_id)
+        else:
+            messages.warning(request, 'Nie udało się przenieść żadnych przedmiotów.')
+            return redirect('warehouse:item_list')
 
-        # Get list of item IDs to move
-        item_ids = [assignment.item_id for assignment in matching_assignments]
+    # GET request - show the form to select target location
+    return render(request, 'warehouse/move_items.html', context)
 
-        # Execute the move
-        with transaction.atomic():
-            moved_count, new_assignments, errors = batch_move_items_between_shelves(
-                item_ids=item_ids,
-                from_shelf_id=source_shelf_id,
-                to_shelf_id=target_shelf_id,
-                user=request.user,
-            )
 
-            # Display any errors
-            for error in errors:
-                messages.warning(request, error)
+class GroupMoveError(ValueError):
+    """Invalid move group; `group` is the zero-based index of the offending group"""
 
-            target_shelf = get_object_or_404(Shelf, pk=target_shelf_id)
+    def __init__(self, message, group=None):
+        super().__init__(message)
+        self.group = group
 
-            if moved_count > 0:
-                messages.success(
-                    request,
-                    f'{moved_count} przedmiot(ów) "{item_name}" zostało pomyślnie przeniesionych na półkę {target_shelf.full_location}.',
-                )
-                return redirect('warehouse:shelf_detail', pk=target_shelf_id)
-            else:
-                messages.warning(
-                    request, 'Nie udało się przenieść żadnych przedmiotów.'
-                )
-                return redirect('warehouse:item_list')
 
-    # GET request - show the form to select target location
-    rooms = Room.objects.all().order_by('name')
+def _parse_move_groups(payload, target_shelf):
+    """
+    Validate move groups and resolve their source shelves with a single query.
 
-    return render(
-        request,
-        'warehouse/move_items.html',
-        {
-            'rooms': rooms,
-            'source_shelf': source_shelf,
-            'item_name': item_name,
-            'category': category,
-            'manufacturer': manufacturer,
-            'expiration_date': expiration_date,
-            'items_count': items_count,
-        },
+    Each group is a dict with `shelf` (source shelf id), `name`, `category`
+    (id) and optional `manufacturer`, `expiration_date` (ISO date) and
+    `quantity` (all units of the group if omitted).
+    """
+    groups = payload.get('groups') if isinstance(payload, dict) else None
+    if not isinstance(groups, list) or not groups:
+        raise GroupMoveError('Missing "groups"')
+    if len(groups) > MAX_MOVE_GROUPS:
+        raise GroupMoveError(f'Too many groups (max {MAX_MOVE_GROUPS})')
+
+    parsed = []
+    for index, group in enumerate(groups):
+        if not isinstance(group, dict):
+            raise GroupMoveError('Group must be an object', index)
+        name = str(group.get('name') or '').strip()
+        try:
+            shelf_id = int(group.get('shelf'))
+            category_id = int(group.get('category'))
+        except (TypeError, ValueError):
+            raise GroupMoveError('Group requires "shelf", "name" and "category"', index)
+        if not name:
+            raise GroupMoveError('Group requires "shelf", "name" and "category"', index)
+        if shelf_id == target_shelf.pk:
+            raise GroupMoveError('Source and target shelf must differ', index)
+        quantity = group.get('quantity')
+        if quantity is not None:
+            try:
+                quantity = int(quantity)
+            except (TypeError, ValueError):
+                raise GroupMoveError('Invalid quantity', index)
+            if quantity < 1:
+                raise GroupMoveError('Quantity must be positive', index)
+        expiration_date = group.get('expiration_date') or None
+        if expiration_date:
+            try:
+                expiration_date = date.fromisoformat(str(expiration_date))
+            except ValueError:
+                raise GroupMoveError('Invalid expiration_date', index)
+        parsed.append(
+            {
+                'source_shelf': shelf_id,
+                'name': name,
+                'category': category_id,
+                'manufacturer': str(group.get('manufacturer') or '').strip() or None,
+                'expiration_date': expiration_date,
+                'quantity': quantity,
+            }
+        )
+
+    shelves = Shelf.objects.in_bulk({group['source_shelf'] for group in parsed})
+    for index, group in enumerate(parsed):
+        if group['source_shelf'] not in shelves:
+            raise GroupMoveError('Unknown shelf', index)
+        group['source_shelf'] = shelves[group['source_shelf']]
+    return parsed
+
+
+@login_required
+def api_move_groups(request):
+    """Move several product groups to one target shelf in one transaction"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    target_id = payload.get('target_shelf') if isinstance(payload, dict) else None
+    try:
+        target_shelf = Shelf.objects.filter(pk=int(target_id)).first()
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Missing "target_shelf"'}, status=400)
+    if target_shelf is None:
+        return JsonResponse({'error': 'Unknown shelf'}, status=404)
+
+    try:
+        groups = _parse_move_groups(payload, target_shelf)
+    except GroupMoveError as e:
+        return JsonResponse({'error': str(e), 'group': e.group}, status=400)
+
+    moved = move_groups(groups, target_shelf, request.user)
+    return JsonResponse(
+        {'success': True, 'target_shelf_id': target_shelf.pk, 'moved': moved}
     )
 
 
@@ -2,19 +2,39 @@
 Location management views for rooms, racks, and shelves.
 """
 
-from datetime import timedelta
+import json
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404, HttpResponse, JsonResponse
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from django.urls import reverse
 from django.db import IntegrityError, transaction
-from django.core.paginator import Paginator
+from django.db.models import Count, Q
 from django.utils import timezone
 
-from warehouse.models import Room, Rack, Shelf, ItemShelfAssignment
-from warehouse.forms import RoomForm, RackForm, ShelfForm
-from warehouse.views.utils import is_admin
+from warehouse.bulk import bulk_insert
+from warehouse.events import EVENT_MOVE, publish_stock_event
+from warehouse.models import (
+    BulkOperation,
+    ItemShelfAssignment,
+    OperationBatch,
+    Rack,
+    Room,
+    Shelf,
+)
+from warehouse.provisioning import provision_locations, start_label_job
+from warehouse.stock import item_product, operation_batch
+from warehouse.shelf_contents import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    content_groups,
+    expiry_bounds,
+    shelf_counters,
+)
+from warehouse.forms import ProvisionLocationsForm, RoomForm, RackForm, ShelfForm
+from warehouse.views.as_of import parse_as_of, render_stock_as_of
+from warehouse.views.utils import build_network_absolute_uri, is_admin
 
 
 def move_item_between_shelves(item_id, from_shelf_id, to_shelf_id, user):
@@ -32,19 +52,33 @@ def move_item_between_shelves(item_id, from_shelf_id, to_shelf_id, user):
     """
     try:
         with transaction.atomic():
-            # Find the active assignment for this item on the source shelf
-            assignment = ItemShelfAssignment.objects.get(
+            # Find and lock the active assignment for this item on the source
+            # shelf; a concurrent move of the same item finds it closed
+            assignment = ItemShelfAssignment.objects.select_for_update().get(
                 item_id=item_id, shelf_id=from_shelf_id, remove_date__isnull=True
             )
 
+            batch = operation_batch(
+                OperationBatch.KIND_MOVE,
+                user,
+                from_shelf_id,
+                item_product(assignment.item),
+                to_shelf_id,
+            )
+
             # Mark the old assignment as removed
             assignment.remove_date = timezone.now()
             assignment.removed_by = user
+            assignment.removed_batch = batch
             assignment.save()
 
             # Create a new assignment for the same item on the destination shelf
             new_assignment = ItemShelfAssignment.objects.create(
-                item_id=item_id, shelf_id=to_shelf_id, added_by=user
+                item_id=item_id, shelf_id=to_shelf_id, added_by=user, added_batch=batch
+            )
+            batch.add_units(1)
+            publish_stock_event(
+                EVENT_MOVE, from_shelf_id, 1, assignment.item.name, to_shelf_id
             )
 
             return (
@@ -74,7 +108,7 @@ def batch_move_items_between_shelves(item_ids, from_shelf_id, to_shelf_id, user)
         user (User): The user performing the move
 
     Returns:
-        tuple: (int, list, list) - Count of successfully moved items, list of new assignments, list of errors
+        tuple: (int, list, list) - Count of successfully moved items, list of new assignment IDs, list of errors
     """
     if not item_ids:
         return 0, [], []
@@ -88,46 +122,50 @@ def batch_move_items_between_shelves(item_ids, from_shelf_id, to_shelf_id, user)
             # Find all active assignments for these items on the source shelf
             active_assignments = ItemShelfAssignment.objects.filter(
                 item_id__in=item_ids, shelf_id=from_shelf_id, remove_date__isnull=True
-            ).select_related('item')
+            )
+            # Lock them, so a concurrent move or removal cannot take the same
+            # units between this read and the update below
+            moved_item_ids = list(
+                active_assignments.select_for_update().values_list('item_id', flat=True)
+            )
 
             # Check if we found all requested items
-            found_item_ids = set(
-                assignment.item_id for assignment in active_assignments
-            )
-            missing_item_ids = set(item_ids) - found_item_ids
+            missing_item_ids = set(item_ids) - set(moved_item_ids)
 
             if missing_item_ids:
                 errors.append(
                     f'Could not find {len(missing_item_ids)} items on the source shelf'
                 )
 
-            # Mark all old assignments as removed
-            now = timezone.now()
-            for assignment in active_assignments:
-                assignment.remove_date = now
-                assignment.removed_by = user
-
-            # Bulk update the removed assignments
-            if active_assignments:
-                ItemShelfAssignment.objects.bulk_update(
-                    active_assignments, ['remove_date', 'removed_by']
+            if moved_item_ids:
+                # Mark all old assignments as removed
+                now = timezone.now()
+                # The items may be different products: one mixed history line
+                batch = operation_batch(
+                    OperationBatch.KIND_MOVE,
+                    user,
+                    from_shelf_id,
+                    target_shelf_id=to_shelf_id,
+                    now=now,
                 )
-
-            # Create new assignments for all items
-            new_assignments_to_create = [
-                ItemShelfAssignment(
-                    item_id=assignment.item_id, shelf_id=to_shelf_id, added_by=user
+                active_assignments.update(
+                    remove_date=now, removed_by=user, removed_batch=batch
                 )
-                for assignment in active_assignments
-            ]
 
-            # Bulk create the new assignments
-            if new_assignments_to_create:
-                created_assignments = ItemShelfAssignment.objects.bulk_create(
-                    new_assignments_to_create
+                # Create new assignments for all items
+                new_assignments = bulk_insert(
+                    ItemShelfAssignment,
+                    ['item', 'shelf', 'added_by', 'add_date', 'added_batch'],
+                    (
+                        (item_id, to_shelf_id, user.pk, now, batch.pk)
+                        for item_id in moved_item_ids
+                    ),
+                )
+                successfully_moved = len(new_assignments)
+                batch.add_units(successfully_moved)
+                publish_stock_event(
+                    EVENT_MOVE, from_shelf_id, successfully_moved, None, to_shelf_id
                 )
-                new_assignments = created_assignments
-                successfully_moved = len(created_assignments)
 
             return successfully_moved, new_assignments, errors
     except Exception as e:
@@ -138,13 +176,170 @@ def batch_move_items_between_shelves(item_ids, from_shelf_id, to_shelf_id, user)
 @login_required
 @user_passes_test(is_admin)
 def room_list(request):
-    """List of all rooms with their racks and shelves"""
-    rooms = (
-        Room.objects.all().order_by('name').prefetch_related('racks', 'racks__shelves')
+    """List of rooms; racks and shelves are loaded when a room is expanded"""
+    rooms = Room.objects.order_by('name').annotate(
+        rack_count=Count('racks', distinct=True),
+        shelf_count=Count('racks__shelves'),
     )
     return render(request, 'warehouse/room_list.html', {'rooms': rooms})
 
 
+@login_required
+@user_passes_test(is_admin)
+def location_tree_racks(request, pk):
+    """JSON list of a room's racks with shelf and item counts"""
+    room = get_object_or_404(Room, pk=pk)
+    racks = (
+        Rack.objects.filter(room=room)
+        .order_by('name')
+        .annotate(
+            shelf_count=Count('shelves', distinct=True),
+            item_count=Count(
+                'shelves__assignments',
+                filter=Q(shelves__assignments__remove_date__isnull=True),
+            ),
+        )
+        .values('id', 'name', 'shelf_count', 'item_count')
+    )
+    results = [
+        {
+            **rack,
+            'urls': {
+                'shelves': reverse(
+                    'warehouse:location_tree_shelves', kwargs={'pk': rack['id']}
+                ),
+                'update': reverse('warehouse:rack_update', kwargs={'pk': rack['id']}),
+                'delete': reverse('warehouse:rack_delete', kwargs={'pk': rack['id']}),
+                'clean': reverse('warehouse:rack_clean', kwargs={'pk': rack['id']}),
+                'add_shelf': reverse(
+                    'warehouse:shelf_create', kwargs={'rack_id': rack['id']}
+                ),
+            },
+        }
+        for rack in racks
+    ]
+    return JsonResponse({'results': results})
+
+
+@login_required
+@user_passes_test(is_admin)
+def location_tree_shelves(request, pk):
+    """JSON list of a rack's shelves with their item counts"""
+    rack = get_object_or_404(Rack, pk=pk)
+    shelves = (
+        rack.shelves.order_by('number')
+        .annotate(
+            item_count=Count(
+                'assignments', filter=Q(assignments__remove_date__isnull=True)
+            )
+        )
+        .values('id', 'number', 'location_path', 'item_count')
+    )
+    results = [
+        {
+            'id': shelf['id'],
+            'number': shelf['number'],
+            'full_location': shelf['location_path'],
+            'item_count': shelf['item_count'],
+            'urls': {
+                'detail': reverse('warehouse:shelf_detail', kwargs={'pk': shelf['id']}),
+                'update': reverse('warehouse:shelf_update', kwargs={'pk': shelf['id']}),
+                'delete': reverse('warehouse:shelf_delete', kwargs={'pk': shelf['id']}),
+                'clean': reverse('warehouse:shelf_clean', kwargs={'pk': shelf['id']}),
+            },
+        }
+        for shelf in shelves
+    ]
+    return JsonResponse({'results': results})
+
+
+def _provision(form, request):
+    """Create the form's grid and optionally queue its QR labels"""
+    room = form.get_room()
+    result = provision_locations(room, form.rack_names(), form.shelf_numbers())
+    label_job = None
+    if form.cleaned_data['generate_labels']:
+        base_url = build_network_absolute_uri(request, '/').rstrip('/')
+        label_job = start_label_job(result['shelf_ids'], base_url, request.user)
+    return room, result, label_job
+
+
+@login_required
+@user_passes_test(is_admin)
+def provision_locations_view(request):
+    """Create racks and shelves of a room as a grid"""
+    if request.method == 'POST':
+        form = ProvisionLocationsForm(request.POST)
+        if form.is_valid():
+            room, result, label_job = _provision(form, request)
+            messages.success(
+                request,
+                f'Utworzono regałów: {result["racks_created"]}, '
+                f'półek: {result["shelves_created"]} '
+                f'(pominięto istniejących: {result["shelves_skipped"]}).',
+            )
+            if label_job is not None:
+                messages.info(request, 'Etykiety QR są przygotowywane w tle.')
+            return redirect(f'{reverse("warehouse:room_list")}?new_room={room.id}')
+    else:
+        form = ProvisionLocationsForm(initial={'room': request.GET.get('room')})
+
+    return render(request, 'warehouse/provision_locations.html', {'form': form})
+
+
+@login_required
+@user_passes_test(is_admin)
+def api_provision_locations(request):
+    """JSON API for provision_locations_view"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
+    try:
+        data = json.loads(request.body or b'{}')
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    form = ProvisionLocationsForm(data)
+    if not form.is_valid():
+        return JsonResponse(
+            {'error': 'Invalid data', 'errors': form.errors.get_json_data()},
+            status=400,
+        )
+
+    room, result, label_job = _provision(form, request)
+    response = {'room_id': room.pk, **result, 'label_job': None}
+    if label_job is not None:
+        response['label_job'] = {
+            'key': label_job.key,
+            'status_url': reverse(
+                'warehouse:label_job_status', kwargs={'key': label_job.key}
+            ),
+        }
+    return JsonResponse(response, status=201)
+
+
+@login_required
+@user_passes_test(is_admin)
+def label_job_status(request, key):
+    """Progress of a background QR label job"""
+    operation = BulkOperation.objects.filter(
+        key=key, kind=BulkOperation.KIND_LABELS
+    ).first()
+    if operation is None:
+        return JsonResponse({'error': 'Unknown label job'}, status=404)
+
+    return JsonResponse(
+        {
+            'status': operation.status,
+            'total': operation.total,
+            'total_processed': operation.processed,
+            'progress': operation.progress,
+            'result': operation.result,
+        }
+    )
+
+
 @login_required
 @user_passes_test(is_admin)
 def room_create(request):
@@ -423,54 +618,89 @@ def shelf_detail(request, pk):
     """Detail view of a shelf with its items and summary stats"""
     shelf = get_object_or_404(Shelf.objects.select_related('rack', 'rack__room'), pk=pk)
 
-    # Get active assignments with optimized related fields
-    assignments = ItemShelfAssignment.objects.filter(
-        shelf=shelf, remove_date__isnull=True
-    ).select_related('item', 'item__category', 'added_by')
-
-    # Expiration logic (same as item_list view)
-    today_date = timezone.now().date()
-    thirty_days_from_now = today_date + timedelta(days=30)
-
-    expired_count = assignments.filter(
-        item__expiration_date__isnull=False, item__expiration_date__lt=today_date
-    ).count()
-    nearly_expired_count = assignments.filter(
-        item__expiration_date__isnull=False,
-        item__expiration_date__gte=today_date,
-        item__expiration_date__lte=thirty_days_from_now,
-    ).count()
-
-    # Add pagination to handle large number of items on a shelf (not used in template, but kept for compatibility)
-    paginator = Paginator(assignments, 50)
-    page_number = request.GET.get('page')
-    assignments_page = paginator.get_page(page_number)
-
-    # Create a network-aware absolute URL for this shelf
-    from django.urls import reverse
-    from warehouse.views.utils import build_network_absolute_uri
-
-    shelf_url = build_network_absolute_uri(
-        request, reverse('warehouse:shelf_detail', kwargs={'pk': shelf.pk})
-    )
+    as_of = parse_as_of(request.GET.get('as_of'))
+    if as_of:
+        return render_stock_as_of(
+            request,
+            as_of,
+            f'Półka {shelf.full_location}',
+            Shelf.objects.filter(pk=shelf.pk),
+        )
+
+    # Header counters only; the contents are fetched page by page from
+    # shelf_contents as the user scrolls
+    counters = shelf_counters(shelf)
+    today_date, thirty_days_from_now = expiry_bounds()
+
+    # Create a network-aware absolute URL for this shelf (short UUID form)
+    from warehouse.qr import label_target_url, qr_version
+
+    if not shelf.qr_code_uuid:
+        shelf.save()  # This will trigger the UUID generation
+    shelf_url = label_target_url(request, shelf)
 
     return render(
         request,
         'warehouse/shelf_detail.html',
         {
             'shelf': shelf,
-            'assignments': assignments_page,
-            'page_obj': assignments_page,
-            'total_count': assignments.count(),
-            'expired_count': expired_count,
-            'nearly_expired_count': nearly_expired_count,
+            **counters,
             'today_date': today_date,
             'thirty_days_from_now': thirty_days_from_now,
             'shelf_url': shelf_url,
+            'qr_version': qr_version(shelf_url),
         },
     )
 
 
+@login_required
+def shelf_contents(request, pk):
+    """JSON page of a shelf's active units grouped by product"""
+    shelf = get_object_or_404(Shelf, pk=pk)
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    try:
+        groups, next_cursor = content_groups(
+            shelf, after=request.GET.get('after'), limit=limit
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+    for group in groups:
+        group['remove_url'] = reverse(
+            'warehouse:remove_item_from_shelf', kwargs={'pk': group['assignment_id']}
+        )
+    return JsonResponse({'results': groups, 'next': next_cursor})
+
+
+@login_required
+def shelf_qr(request, pk, fmt):
+    """QR code of a shelf's URL as SVG or PNG, rendered locally and cached"""
+    from warehouse.qr import (
+        QR_IMAGE_CACHE_CONTROL,
+        QR_IMAGE_CONTENT_TYPES,
+        label_target_url,
+        qr_image,
+    )
+
+    if fmt not in QR_IMAGE_CONTENT_TYPES:
+        raise Http404('Nieobsługiwany format kodu QR.')
+    shelf = get_object_or_404(Shelf, pk=pk)
+    if not shelf.qr_code_uuid:
+        shelf.save()  # This will trigger the UUID generation
+
+    response = HttpResponse(
+        qr_image(label_target_url(request, shelf), fmt),
+        content_type=QR_IMAGE_CONTENT_TYPES[fmt],
+    )
+    response['Cache-Control'] = QR_IMAGE_CACHE_CONTROL
+    return response
+
+
 @login_required
 @user_passes_test(is_admin)
 def clean_rack(request, pk):
@@ -0,0 +1,41 @@
+"""
+Operational metrics for administrators.
+"""
+
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db import connections
+from django.http import JsonResponse
+
+from warehouse.views.utils import is_admin
+
+
+def database_metrics(alias='default'):
+    """Connection settings and, when pooling is enabled, pool statistics"""
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    data = {
+        'alias': alias,
+        'vendor': connection.vendor,
+        'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+        'conn_health_checks': settings_dict.get('CONN_HEALTH_CHECKS'),
+        'pool': None,
+    }
+
+    # Only the psycopg 3 backend has a pool (Django 5.1+)
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        data['pool'] = {
+            'min_size': pool.min_size,
+            'max_size': pool.max_size,
+            **pool.get_stats(),
+        }
+    return data
+
+
+@login_required
+@user_passes_test(is_admin)
+def metrics(request):
+    """JSON metrics endpoint for monitoring"""
+    return JsonResponse(
+        {'databases': [database_metrics(alias) for alias in connections]}
+    )
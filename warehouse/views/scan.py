@@ -0,0 +1,197 @@
+"""
+QR code scanning views and the compact scan-and-act API used at intake stations.
+"""
+
+import json
+from datetime import date
+
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect
+from django.urls import reverse
+
+from warehouse.models import Category, ItemShelfAssignment, Rack, Shelf
+from warehouse.qr import find_location_by_uuid
+from warehouse.stock import add_items_to_shelf
+
+# Upper bounds for a single intake request (one pallet)
+MAX_INTAKE_LINES = 500
+MAX_INTAKE_QUANTITY = 100000
+
+
+def _location_page_url(location):
+    """Page a scanned shelf, rack or room should open"""
+    if isinstance(location, Shelf):
+        return reverse('warehouse:shelf_detail', kwargs={'pk': location.pk})
+    if isinstance(location, Rack):
+        return f'{reverse("warehouse:item_list")}?rack={location.pk}'
+    return f'{reverse("warehouse:item_list")}?room={location.pk}'
+
+
+def _get_location_or_404(qr_uuid):
+    location = find_location_by_uuid(qr_uuid)
+    if location is None:
+        raise Http404('Nie znaleziono lokalizacji dla tego kodu QR.')
+    return location
+
+
+@login_required
+def resolve_qr_code(request, qr_uuid):
+    """Short QR code target: redirect to the scanned shelf, rack or room"""
+    return redirect(_location_page_url(_get_location_or_404(qr_uuid)))
+
+
+@login_required
+def resolve_qr_code_json(request, qr_uuid):
+    """Lightweight QR code lookup for scanners"""
+    location = find_location_by_uuid(qr_uuid)
+    if location is None:
+        return JsonResponse({'error': 'Unknown QR code'}, status=404)
+
+    data = {
+        'uuid': str(location.qr_code_uuid),
+        'id': location.pk,
+        'url': _location_page_url(location),
+    }
+    if isinstance(location, Shelf):
+        data.update(
+            type='shelf',
+            location=location.full_location,
+            rack_id=location.rack_id,
+            room_id=location.rack.room_id,
+        )
+    elif isinstance(location, Rack):
+        data.update(
+            type='rack',
+            location=f'{location.room.name}.{location.name}',
+            room_id=location.room_id,
+        )
+    else:
+        data.update(type='room', location=location.name)
+    return JsonResponse(data)
+
+
+class IntakeError(ValueError):
+    """Invalid intake line; `line` is the zero-based index of the offending line"""
+
+    def __init__(self, message, line=None):
+        super().__init__(message)
+        self.line = line
+
+
+def _parse_intake_lines(payload):
+    """
+    Validate intake lines and resolve their categories with a single query.
+
+    Each line is a dict with `name`, `category` (id or name), `quantity` and
+    optional `expiration_date` (ISO date), `manufacturer` and `note`.
+    """
+    lines = payload.get('lines') if isinstance(payload, dict) else None
+    if not isinstance(lines, list) or not lines:
+        raise IntakeError('Missing "lines"')
+    if len(lines) > MAX_INTAKE_LINES:
+        raise IntakeError(f'Too many lines (max {MAX_INTAKE_LINES})')
+
+    parsed = []
+    for index, line in enumerate(lines):
+        if not isinstance(line, dict):
+            raise IntakeError('Line must be an object', index)
+        name = str(line.get('name') or '').strip()
+        category = line.get('category')
+        if not name or category in (None, ''):
+            raise IntakeError('Line requires "name" and "category"', index)
+        try:
+            quantity = int(line.get('quantity', 1))
+        except (TypeError, ValueError):
+            raise IntakeError('Invalid quantity', index)
+        if quantity < 1:
+            raise IntakeError('Quantity must be positive', index)
+        expiration_date = line.get('expiration_date') or None
+        if expiration_date:
+            try:
+                expiration_date = date.fromisoformat(str(expiration_date))
+            except ValueError:
+                raise IntakeError('Invalid expiration_date', index)
+        parsed.append(
+            {
+                'name': name,
+                'category': category,
+                'quantity': quantity,
+                'expiration_date': expiration_date,
+                'manufacturer': str(line.get('manufacturer') or '').strip() or None,
+                'note': str(line.get('note') or '').strip() or None,
+            }
+        )
+
+    if sum(line['quantity'] for line in parsed) > MAX_INTAKE_QUANTITY:
+        raise IntakeError(f'Too many units (max {MAX_INTAKE_QUANTITY})')
+
+    # Resolve categories by id or name in one query
+    ids = {str(line['category']) for line in parsed if str(line['category']).isdigit()}
+    names = {str(line['category']) for line in parsed}
+    categories = {}
+    for category in Category.objects.filter(Q(id__in=ids) | Q(name__in=names)):
+        categories[str(category.id)] = category
+        categories.setdefault(category.name, category)
+    for index, line in enumerate(parsed):
+        line['category'] = categories.get(str(line['category']))
+        if line['category'] is None:
+            raise IntakeError('Unknown category', index)
+    return parsed
+
+
+@login_required
+def scan_shelf(request, qr_uuid):
+    """Scanned shelf header for intake stations"""
+    shelf = Shelf.objects.filter(qr_code_uuid=qr_uuid).first()
+    if shelf is None:
+        return JsonResponse({'error': 'Unknown shelf'}, status=404)
+
+    return JsonResponse(
+        {
+            'id': shelf.pk,
+            'uuid': str(shelf.qr_code_uuid),
+            'location': shelf.full_location,
+            'count': ItemShelfAssignment.objects.filter(
+                shelf=shelf, remove_date__isnull=True
+            ).count(),
+        }
+    )
+
+
+@login_required
+def scan_intake(request, qr_uuid):
+    """Apply a batch of (product, quantity, expiry) lines to a scanned shelf"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Only POST requests are allowed'}, status=405)
+
+    shelf = Shelf.objects.filter(qr_code_uuid=qr_uuid).first()
+    if shelf is None:
+        return JsonResponse({'error': 'Unknown shelf'}, status=404)
+
+    try:
+        lines = _parse_intake_lines(json.loads(request.body or b'{}'))
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except IntakeError as e:
+        return JsonResponse({'error': str(e), 'line': e.line}, status=400)
+
+    # All lines succeed or fail together
+    with transaction.atomic():
+        added = [
+            add_items_to_shelf(
+                shelf,
+                request.user,
+                line['quantity'],
+                name=line['name'],
+                category=line['category'],
+                manufacturer=line['manufacturer'],
+                expiration_date=line['expiration_date'],
+                note=line['note'],
+            )
+            for line in lines
+        ]
+
+    return JsonResponse({'success': True, 'shelf_id': shelf.pk, 'added': added})